@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 import threading
@@ -6,21 +6,70 @@ import time
 import json
 import queue
 import requests
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import partial
 from datetime import datetime, timedelta
 import logging
 import sys
 import os
 import re
-from textblob import TextBlob
 
 # Add the parent directory to sys.path to import the trading bot
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+
+from balance_cache import BalanceCache
+from candle_store import GRANULARITY_SECONDS, MAX_CANDLES_PER_REQUEST, CandleStore
+from chart_data import append_ticks, chart_payload, pick_granularity
+from feed_cache import FeedCache
+from http_client import http_client
+from log_setup import configure_logging
+from market_feed import COINBASE_WS_URL, MarketDataFeed
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, registry as metrics_registry
+from order_ids import ClientOrderIdGenerator
+from paper_exchange import PaperExchange
+from price_buffer import PriceRingBuffer
+from rate_limiter import coinbase_rate_limiter
+from sentiment_pipeline import SentimentPipeline
+from state_sync import StateSync
+from trade_journal import TradeJournal
+from tracing import breakdown, read_trace_file, tracer
+
+# Paper trading: orders fill in process against the streamed book instead of on Coinbase
+PAPER_TRADING = os.getenv('PAPER_TRADING', '').lower() in ('1', 'true', 'yes')
+PAPER_BALANCE_USD = float(os.getenv('PAPER_BALANCE_USD', '10000'))
+PAPER_START_PRICE = float(os.getenv('PAPER_START_PRICE', '60000'))  # BTC random-walk start when the feed is off
+
+# Local candle history shared with the trading bot; relative paths resolve against the repo root, as in the bot
+CANDLE_STORE_DIR = os.path.join(REPO_ROOT, os.getenv('CANDLE_STORE_DIR', 'data/candles'))
+candle_store = CandleStore(CANDLE_STORE_DIR)
+
+# /api/chart limits: points per response, and stored candles read per line point for LTTB to choose from
+CHART_DEFAULT_POINTS = 500
+CHART_MAX_POINTS = 5000
+CHART_LINE_OVERSAMPLE = 8
+# Oldest start /api/chart accepts; ranges reaching further back are clamped
+CHART_MAX_LOOKBACK_SECONDS = 5 * 365 * 86400
+
+# Orders, fills and bot decisions, synced incrementally by the monitor loop; paper orders get their own journal, as in the bot
+if PAPER_TRADING:
+    TRADE_JOURNAL_PATH = os.path.join(REPO_ROOT, os.getenv('PAPER_TRADE_JOURNAL_PATH', 'data/paper_trade_journal.db'))
+else:
+    TRADE_JOURNAL_PATH = os.path.join(REPO_ROOT, os.getenv('TRADE_JOURNAL_PATH', 'data/trade_journal.db'))
+trade_journal = TradeJournal(TRADE_JOURNAL_PATH)
+
+# News sentiment scores, cached by article so each article is scored once
+SENTIMENT_CACHE_PATH = os.path.join(REPO_ROOT, os.getenv('SENTIMENT_CACHE_PATH', 'data/sentiment_cache.db'))
+sentiment_pipeline = SentimentPipeline(SENTIMENT_CACHE_PATH)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key'
 CORS(app, origins=["http://localhost:3000"], allow_headers=["Content-Type"], methods=["GET", "POST"])
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
 
+# Dashboard state goes out as one snapshot per client, then deltas to everyone
+state_sync = StateSync(socketio)
+
 # Global variables to store bot data
 bot_data = {
     'connected': False,
@@ -33,21 +82,69 @@ bot_data = {
     'daily_trades': 0,
     'position': None,
     'indicators': {},
-    'price_history': [],
+    'price_history': {'t': [], 'p': []},
     'last_update': None
 }
 
 # Multi-crypto data storage
 crypto_data = {
-    'BTC-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': []},
-    'ETH-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': []},
-    'SOL-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': []},
-    'ADA-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': []},
-    'DOGE-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': []},
-    'AVAX-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': []},
-    'MATIC-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': []},
-    'LINK-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': []}
+    'BTC-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': {'t': [], 'p': []}},
+    'ETH-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': {'t': [], 'p': []}},
+    'SOL-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': {'t': [], 'p': []}},
+    'ADA-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': {'t': [], 'p': []}},
+    'DOGE-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': {'t': [], 'p': []}},
+    'AVAX-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': {'t': [], 'p': []}},
+    'MATIC-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': {'t': [], 'p': []}},
+    'LINK-USDC': {'price': 0, 'change_24h': 0, 'volume_24h': 0, 'market_cap': 0, 'indicators': {}, 'price_history': {'t': [], 'p': []}}
+}
+
+# Fixed-size price histories; the columnar 'price_history' payloads above ({'t': epoch ms, 'p': prices}) come from these
+PRICE_HISTORY_POINTS = 100
+bot_price_buffer = PriceRingBuffer(PRICE_HISTORY_POINTS)
+crypto_price_buffers = {symbol: PriceRingBuffer(PRICE_HISTORY_POINTS) for symbol in crypto_data}
+# CoinGecko's last_updated per pair at its last history point; cached responses repeat it
+crypto_history_updated = {}
+
+# Streaming Coinbase prices; REST and CoinGecko remain the fallback when the feed is stale
+MARKET_FEED_URL = os.getenv('MARKET_FEED_URL', COINBASE_WS_URL)
+MARKET_FEED_MAX_AGE = 30
+market_feed = MarketDataFeed(list(crypto_data), url=MARKET_FEED_URL)
+
+# Streamed tickers reach the dashboard at most this often; updates in between are coalesced
+TICKER_PUBLISH_INTERVAL = 0.5
+live_tickers = {}
+_tickers_changed = threading.Event()
+
+def _on_market_ticker(channel, product_id, ticker):
+    # Runs on the feed thread: record the ticker and wake the publisher, never emit here
+    live_tickers[product_id] = {key: ticker[key] for key in ('price', 'best_bid', 'best_ask', 'volume_24h')}
+    _tickers_changed.set()
+
+def _publish_tickers():
+    """Push streamed ticker changes to the dashboard through the 'tickers' state channel"""
+    while True:
+        _tickers_changed.wait()
+        _tickers_changed.clear()
+        try:
+            state_sync.publish('tickers', dict(live_tickers))
+        except Exception as e:
+            logging.error(f"Error publishing tickers: {e}")
+        time.sleep(TICKER_PUBLISH_INTERVAL)
+
+market_feed.hub.subscribe(_on_market_ticker, channels=['ticker'])
+
+# Slow-changing external feeds: source -> (TTL, seconds a stale copy is served while revalidating)
+FEED_CACHE_TTLS = {
+    'fear_greed': (3600, 86400),       # published once a day
+    'coingecko_markets': (60, 120),
+    'coingecko_trending': (300, 600),
+    'coingecko_price': (30, 60),
+    'cryptocompare_news': (120, 600),
 }
+feed_cache = FeedCache(http_client, FEED_CACHE_TTLS)
+
+# Dashboard orders get their own id prefix so they stand apart from bot orders in the journal
+web_order_ids = ClientOrderIdGenerator(prefix='web')
 
 # Portfolio breakdown by crypto
 portfolio_data = {
@@ -101,16 +198,56 @@ whale_data = {
 # Message queue for bot communication
 message_queue = queue.Queue()
 
+# Seconds each monitor source may take before the cycle stops waiting for it
+MONITOR_SOURCE_DEADLINES = {
+    'bot': 15,
+    'sentiment': 20,
+    'whales': 5,
+    'crypto': 15,
+    'portfolio': 15,
+    'journal': 15
+}
+MONITOR_INTERVAL = 30
+
+# Trace file written by the standalone bot; the backend keeps its own traces in memory
+BOT_TRACE_PATH = os.path.join(REPO_ROOT, os.getenv('TRACE_PATH', 'data/traces.jsonl'))
+
+# Seconds account balances are served from memory; orders placed here invalidate sooner
+BALANCE_CACHE_TTL = 15
+
+MONITOR_CYCLE_SECONDS = metrics_registry.histogram('monitor_cycle_seconds', 'Wall time of one monitor collection cycle')
+MONITOR_SOURCE_SECONDS = metrics_registry.histogram('monitor_source_seconds', 'Collection time per monitor source', ['source'])
+MONITOR_ERRORS = metrics_registry.counter('monitor_errors_total', 'Monitor collection and publish failures', ['source', 'stage'])
+EXCHANGE_CALL_SECONDS = metrics_registry.histogram('exchange_call_seconds', 'Coinbase REST call latency', ['call'])
+INDICATOR_SECONDS = metrics_registry.histogram('indicator_seconds', 'Indicator update and analysis time', ['stage'])
+
 class TradingBotAdapter:
     """Adapter to connect with the existing trading bot"""
     
     def __init__(self):
         self.running = False
         self.coinbase_client = None
+        self.api_type = None
+        # Bounded pool for the concurrent monitor collection stage
+        self._collector = ThreadPoolExecutor(max_workers=len(MONITOR_SOURCE_DEADLINES), thread_name_prefix='monitor')
+        self._inflight = {}
+        # Chart candle fetches too large for one request run here, one (symbol, granularity) at a time
+        self._chart_sync = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chart-sync')
+        self._chart_syncing = set()
+        self._chart_sync_lock = threading.Lock()
+        # Every endpoint, the monitor loop and new socket connections share one accounts fetch
+        self.balance_cache = BalanceCache(self._fetch_accounts, ttl=BALANCE_CACHE_TTL)
         self._init_coinbase_client()
         
     def _init_coinbase_client(self):
         """Initialize Coinbase CDP client"""
+        if PAPER_TRADING:
+            # Priced by start_paper_prices() once it is known whether the market feed runs
+            self.coinbase_client = PaperExchange({'USDC': PAPER_BALANCE_USD})
+            self.api_type = "paper"
+            logging.info(f"Paper trading with {PAPER_BALANCE_USD} USDC")
+            return
+
         try:
             from dotenv import load_dotenv
             load_dotenv()
@@ -144,6 +281,118 @@ class TradingBotAdapter:
             logging.error(f"Failed to initialize Coinbase client: {e}")
             self.coinbase_client = None
         
+    def start_paper_prices(self, feed_running: bool):
+        """Price the paper exchange from the market feed if it started, else from a random walk"""
+        if self.api_type != 'paper':
+            return
+        if feed_running:
+            self.coinbase_client.attach_hub(market_feed.hub)
+        else:
+            self.coinbase_client.start_synthetic_feed({'BTC-USDC': PAPER_START_PRICE})
+
+    def _fetch_accounts(self):
+        """Fetch accounts from Coinbase; callers go through balance_cache"""
+        if not self.coinbase_client:
+            return None
+        with EXCHANGE_CALL_SECONDS.time(call='get_accounts'):
+            return self.coinbase_client.get_accounts()
+        
+    def _fetch_candles(self, product_id, granularity, fetch_start, fetch_end):
+        """get_candles for CandleStore.sync, under the bot's shared rate limiter; None tells the store to retry later"""
+        try:
+            coinbase_rate_limiter.acquire('private')
+            with EXCHANGE_CALL_SECONDS.time(call='get_candles'):
+                return self.coinbase_client.get_candles(
+                    product_id=product_id,
+                    start=fetch_start,
+                    end=fetch_end,
+                    granularity=granularity
+                )
+        except Exception as e:
+            response = getattr(e, 'response', None)
+            if getattr(response, 'status_code', None) == 429:
+                coinbase_rate_limiter.on_rate_limited('private')
+            logging.warning(f"Could not fetch candles for {product_id}: {e}")
+            return None
+
+    def warm_start_price_history(self, lookback_minutes=120):
+        """Seed price histories from the local candle store, fetching only the missing tail"""
+        try:
+            end = int(time.time())
+            start = end - lookback_minutes * 60
+            
+            for symbol in crypto_data:
+                if self.coinbase_client and self.api_type != 'paper':
+                    candle_store.sync(symbol, 'ONE_MINUTE', self._fetch_candles, start, end)
+                
+                candles = candle_store.read(symbol, 'ONE_MINUTE', start=start)
+                times_ns = candles['time'][-PRICE_HISTORY_POINTS:] * 1_000_000_000
+                closes = candles['close'][-PRICE_HISTORY_POINTS:]
+                
+                crypto_price_buffers[symbol].extend(closes.tolist(), times_ns.tolist())
+                crypto_data[symbol]['price_history'] = crypto_price_buffers[symbol].to_payload()
+                if symbol == 'BTC-USDC':
+                    bot_price_buffer.extend(closes.tolist(), times_ns.tolist())
+                    bot_data['price_history'] = bot_price_buffer.to_payload()
+            
+            logging.info(f"Warm-started price history for {len(crypto_data)} pairs from {CANDLE_STORE_DIR}")
+        except Exception as e:
+            logging.error(f"Error warm-starting price history: {e}")
+
+    def sync_chart_candles(self, symbol, granularity, start, end):
+        """Fetch candles missing from [start, end); True while a background fetch is still filling them
+
+        A gap one get_candles call covers is fetched in the request thread.
+        Larger gaps are fetched on the chart-sync thread, so the request
+        serves what is already stored.
+        """
+        # Paper candles only cover the session; storing them would mark real history as fetched
+        if not self.coinbase_client or self.api_type == 'paper':
+            return False
+        key = (symbol, granularity)
+        with self._chart_sync_lock:
+            if key in self._chart_syncing:
+                return True
+            step = GRANULARITY_SECONDS[granularity]
+            missing = candle_store.missing_ranges(symbol, granularity, int(start) // step * step, int(end) // step * step)
+            if sum(range_end - range_start for range_start, range_end in missing) > step * MAX_CANDLES_PER_REQUEST:
+                self._chart_syncing.add(key)
+                self._chart_sync.submit(self._run_chart_sync, key, start, end)
+                return True
+        candle_store.sync(symbol, granularity, self._fetch_candles, start, end)
+        return False
+
+    def _run_chart_sync(self, key, start, end):
+        symbol, granularity = key
+        try:
+            candle_store.sync(symbol, granularity, self._fetch_candles, start, end)
+        except Exception as e:
+            logging.warning(f"Chart candle sync failed for {symbol} {granularity}: {e}")
+        finally:
+            with self._chart_sync_lock:
+                self._chart_syncing.discard(key)
+
+    def get_chart_candles(self, symbol, granularity, start, end):
+        """(granularity read, candles, syncing) for [start, end), plus recent ticks no stored candle covers yet
+
+        Missing candles are fetched first, or in the background when there
+        are too many for one request. When nothing is stored at this
+        granularity, e.g. offline, the next finer series with data is read.
+        """
+        syncing = self.sync_chart_candles(symbol, granularity, start, end)
+        finer = sorted((g for g in GRANULARITY_SECONDS if GRANULARITY_SECONDS[g] < GRANULARITY_SECONDS[granularity]),
+                       key=GRANULARITY_SECONDS.get, reverse=True)
+        for source in [granularity] + finer:
+            candles = candle_store.read(symbol, source, start=int(start), end=int(end))
+            if len(candles['time']):
+                granularity = source
+                break
+
+        # The store never holds the candle still forming; the streamed ticks fill that gap
+        buffer = crypto_price_buffers[symbol]
+        return granularity, append_ticks(candles, GRANULARITY_SECONDS[granularity], buffer.timestamps(), buffer.prices(),
+                                         start, end), syncing
+        
     def start_bot_monitoring(self):
         """Start monitoring the trading bot"""
         self.running = True
@@ -155,29 +404,80 @@ class TradingBotAdapter:
         """Monitor bot status and data"""
         while self.running:
             try:
-                # Get real trading bot data
-                self._update_bot_data()
-                self._fetch_market_sentiment()
-                self._monitor_whale_activity()
-                
-                # Update multi-crypto data
-                self.update_crypto_data()
-                
-                # Update portfolio breakdown
-                portfolio_breakdown = self.get_portfolio_breakdown()
-                
-                # Emit updates to connected clients
-                socketio.emit('bot_update', bot_data)
-                socketio.emit('sentiment_update', sentiment_data)
-                socketio.emit('whale_update', whale_data)
-                socketio.emit('crypto_update', crypto_data)
-                socketio.emit('portfolio_update', portfolio_breakdown)
+                elapsed = self._collect_monitor_data()
+                MONITOR_CYCLE_SECONDS.observe(elapsed)
+                logging.debug(f"Monitor cycle collected in {elapsed:.2f}s")
                 
-                time.sleep(30)  # Update every 30 seconds
+                time.sleep(MONITOR_INTERVAL)  # Update every 30 seconds
                 
             except Exception as e:
+                MONITOR_ERRORS.inc(source='cycle', stage='collect')
                 logging.error(f"Error in bot monitoring: {e}")
                 time.sleep(60)
+    
+    def _monitor_sources(self):
+        """Collection functions and the socket event each one publishes"""
+        # Sources run concurrently, so portfolio values and sentiment volatility
+        # use prices from the previous cycle when those sources finish first
+        return {
+            'bot': (self._update_bot_data, lambda _: state_sync.publish('bot', bot_data)),
+            'sentiment': (self._fetch_market_sentiment, lambda _: state_sync.publish('sentiment', sentiment_data)),
+            'whales': (self._monitor_whale_activity, lambda _: state_sync.publish('whales', whale_data)),
+            'crypto': (self.update_crypto_data, lambda _: state_sync.publish('crypto', crypto_data)),
+            'portfolio': (self.get_portfolio_breakdown, lambda breakdown: state_sync.publish('portfolio', breakdown)),
+            'journal': (self.sync_trade_journal, lambda _: None)
+        }
+    
+    def _collect_monitor_data(self):
+        """Run every monitor source concurrently, publishing each as soon as it finishes
+        
+        Returns the seconds spent waiting, which is bounded by the slowest
+        source's deadline rather than the sum of all sources.
+        """
+        started = time.monotonic()
+        pending = {}
+        
+        for name, (collect, publish) in self._monitor_sources().items():
+            previous = self._inflight.get(name)
+            if previous and not previous.done():
+                logging.warning(f"Skipping {name} collection: previous run still in progress")
+                continue
+            
+            future = self._collector.submit(self._run_source, name, collect)
+            future.add_done_callback(partial(self._publish_source, name, publish))
+            self._inflight[name] = future
+            pending[name] = future
+        
+        for name, future in pending.items():
+            deadline = MONITOR_SOURCE_DEADLINES[name]
+            try:
+                future.result(timeout=max(0, started + deadline - time.monotonic()))
+            except FutureTimeoutError:
+                logging.warning(f"{name} collection exceeded its {deadline}s deadline, will publish when it completes")
+            except Exception:
+                pass  # Logged by _publish_source
+        
+        return time.monotonic() - started
+    
+    def _run_source(self, name, collect):
+        """Run one collection function, timing it per source"""
+        with MONITOR_SOURCE_SECONDS.time(source=name):
+            return collect()
+    
+    def _publish_source(self, name, publish, future):
+        """Emit a source's result to connected clients once it is ready"""
+        try:
+            result = future.result()
+        except Exception as e:
+            MONITOR_ERRORS.inc(source=name, stage='collect')
+            logging.error(f"Error collecting {name} data: {e}")
+            return
+        
+        try:
+            publish(result)
+        except Exception as e:
+            MONITOR_ERRORS.inc(source=name, stage='publish')
+            logging.error(f"Error publishing {name} update: {e}")
                 
     def _update_bot_data(self):
         """Update bot data with real Coinbase data"""
@@ -197,15 +497,9 @@ class TradingBotAdapter:
                     'last_update': datetime.now().isoformat()
                 })
                 
-                # Add to price history
-                bot_data['price_history'].append({
-                    'timestamp': datetime.now().isoformat(),
-                    'price': current_price
-                })
-                
-                # Keep only last 100 price points
-                if len(bot_data['price_history']) > 100:
-                    bot_data['price_history'] = bot_data['price_history'][-100:]
+                # Add to price history (the buffer keeps the last 100 points)
+                bot_price_buffer.append(current_price)
+                bot_data['price_history'] = bot_price_buffer.to_payload()
                     
                 # Get real technical indicators
                 self._update_technical_indicators()
@@ -227,9 +521,14 @@ class TradingBotAdapter:
     def _get_real_btc_price(self):
         """Get real BTC price from Coinbase"""
         try:
+            live_price = market_feed.hub.latest_price('BTC-USDC', max_age=MARKET_FEED_MAX_AGE)
+            if live_price:
+                return live_price
+
             if self.coinbase_client:
                 # Get product ticker using the REST client
-                ticker = self.coinbase_client.get_product('BTC-USDC')
+                with EXCHANGE_CALL_SECONDS.time(call='get_product'):
+                    ticker = self.coinbase_client.get_product('BTC-USDC')
                 if ticker:
                     # Handle different response formats
                     if hasattr(ticker, 'price'):
@@ -249,8 +548,8 @@ class TradingBotAdapter:
         """Get real portfolio value from Coinbase"""
         try:
             if self.coinbase_client:
-                # Get accounts using the REST client
-                accounts = self.coinbase_client.get_accounts()
+                # Get accounts from the shared balance cache
+                accounts = self.balance_cache.get()
                 if accounts and hasattr(accounts, 'accounts'):
                     total_value = 0
                     for account in accounts.accounts:
@@ -273,77 +572,34 @@ class TradingBotAdapter:
             logging.error(f"Error getting real portfolio value: {e}")
             return 500.0
             
-    def get_order_history(self, limit=50):
-        """Get real order history from Coinbase"""
+    def sync_trade_journal(self):
+        """Pull new orders and fills from Coinbase into the local trade journal"""
+        if not self.coinbase_client:
+            return None
         try:
-            if self.coinbase_client:
-                # Get orders using the REST client
-                orders = self.coinbase_client.get_orders(limit=limit)
-                processed_orders = []
-                
-                if orders and hasattr(orders, 'orders'):
-                    for order in orders.orders:
-                        processed_order = {
-                            'id': getattr(order, 'order_id', 'unknown'),
-                            'product_id': getattr(order, 'product_id', 'BTC-USDC'),
-                            'side': getattr(order, 'side', 'unknown'),
-                            'status': getattr(order, 'status', 'unknown'),
-                            'size': float(getattr(order, 'size', 0)),
-                            'filled_size': float(getattr(order, 'filled_size', 0)),
-                            'price': float(getattr(order, 'average_filled_price', 0)) if hasattr(order, 'average_filled_price') and order.average_filled_price else None,
-                            'created_time': getattr(order, 'created_time', datetime.now().isoformat()),
-                            'completion_percentage': getattr(order, 'completion_percentage', '0'),
-                            'fee': float(getattr(order, 'total_fees', 0)) if hasattr(order, 'total_fees') else 0,
-                            'total_value': 0  # Will calculate below
-                        }
-                        
-                        # Calculate total value
-                        if processed_order['price'] and processed_order['filled_size']:
-                            processed_order['total_value'] = processed_order['price'] * processed_order['filled_size']
-                        
-                        processed_orders.append(processed_order)
-                
-                return processed_orders
+            synced = trade_journal.sync(self.coinbase_client)
+            if synced['orders'] or synced['fills']:
+                logging.info(f"Trade journal synced {synced['orders']} orders, {synced['fills']} fills")
+            return synced
+        except Exception as e:
+            logging.error(f"Error syncing trade journal: {e}")
+            return None
             
-            return []
+    def get_order_history(self, limit=50, offset=0, **filters):
+        """Get order history from the local trade journal, newest first"""
+        try:
+            return trade_journal.query_orders(limit=limit, offset=offset, **filters)
         except Exception as e:
             logging.error(f"Error getting order history: {e}")
-            return []
+            return [], 0
             
-    def get_fills_history(self, limit=50):
-        """Get real fills/trades history from Coinbase"""
+    def get_fills_history(self, limit=50, offset=0, **filters):
+        """Get fills/trades history from the local trade journal, newest first"""
         try:
-            if self.coinbase_client:
-                # Get fills (executed trades) using the REST client
-                fills = self.coinbase_client.get_fills(limit=limit)
-                processed_fills = []
-                
-                if fills and hasattr(fills, 'fills'):
-                    for fill in fills.fills:
-                        processed_fill = {
-                            'trade_id': getattr(fill, 'trade_id', 'unknown'),
-                            'order_id': getattr(fill, 'order_id', 'unknown'),
-                            'product_id': getattr(fill, 'product_id', 'BTC-USDC'),
-                            'side': getattr(fill, 'side', 'unknown'),
-                            'size': float(getattr(fill, 'size', 0)),
-                            'price': float(getattr(fill, 'price', 0)),
-                            'fee': float(getattr(fill, 'commission', 0)) if hasattr(fill, 'commission') else 0,
-                            'created_at': getattr(fill, 'trade_time', datetime.now().isoformat()),
-                            'total_value': 0  # Will calculate below
-                        }
-                        
-                        # Calculate total value
-                        if processed_fill['price'] and processed_fill['size']:
-                            processed_fill['total_value'] = processed_fill['price'] * processed_fill['size']
-                        
-                        processed_fills.append(processed_fill)
-                
-                return processed_fills
-            
-            return []
+            return trade_journal.query_fills(limit=limit, offset=offset, **filters)
         except Exception as e:
             logging.error(f"Error getting fills history: {e}")
-            return []
+            return [], 0
             
     def update_crypto_data(self):
         """Update data for all supported cryptocurrencies"""
@@ -362,14 +618,12 @@ class TradingBotAdapter:
             
             # Get data from CoinGecko (more comprehensive than individual Coinbase calls)
             coin_ids = ','.join(coingecko_mapping.values())
-            response = requests.get(
-                f'https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd&ids={coin_ids}&order=market_cap_desc&per_page=20&page=1&sparkline=false&price_change_percentage=24h',
-                timeout=10
+            data = feed_cache.get_json(
+                'coingecko_markets',
+                f'https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd&ids={coin_ids}&order=market_cap_desc&per_page=20&page=1&sparkline=false&price_change_percentage=24h'
             )
             
-            if response.status_code == 200:
-                data = response.json()
-                
+            if data:
                 for coin in data:
                     # Find corresponding symbol
                     symbol = None
@@ -387,21 +641,32 @@ class TradingBotAdapter:
                             'last_update': datetime.now().isoformat()
                         })
                         
-                        # Add to price history
-                        crypto_data[symbol]['price_history'].append({
-                            'timestamp': datetime.now().isoformat(),
-                            'price': coin.get('current_price', 0)
-                        })
-                        
-                        # Keep only last 100 points
-                        if len(crypto_data[symbol]['price_history']) > 100:
-                            crypto_data[symbol]['price_history'] = crypto_data[symbol]['price_history'][-100:]
+                        # Add to price history (the buffer keeps the last 100 points), once per CoinGecko
+                        # update: a cached or unchanged response must not add flat duplicate points
+                        last_updated = coin.get('last_updated')
+                        if last_updated is None or last_updated != crypto_history_updated.get(symbol):
+                            crypto_history_updated[symbol] = last_updated
+                            try:
+                                updated_ns = int(datetime.fromisoformat(last_updated.replace('Z', '+00:00')).timestamp() * 1e9)
+                            except (AttributeError, ValueError):
+                                updated_ns = None
+                            crypto_price_buffers[symbol].append(coin.get('current_price') or 0, updated_ns)
+                            crypto_data[symbol]['price_history'] = crypto_price_buffers[symbol].to_payload()
                 
+                # Override with streamed Coinbase prices where the feed is current
+                for symbol in crypto_data:
+                    live_price = market_feed.hub.latest_price(symbol, max_age=MARKET_FEED_MAX_AGE)
+                    if live_price:
+                        crypto_data[symbol]['price'] = live_price
+
                 # Also try to get real Coinbase data for major pairs
                 if self.coinbase_client:
                     for symbol in ['BTC-USDC', 'ETH-USDC', 'SOL-USDC']:
+                        if market_feed.hub.ticker(symbol, max_age=MARKET_FEED_MAX_AGE):
+                            continue
                         try:
-                            ticker = self.coinbase_client.get_product(symbol)
+                            with EXCHANGE_CALL_SECONDS.time(call='get_product'):
+                                ticker = self.coinbase_client.get_product(symbol)
                             if ticker and hasattr(ticker, 'price'):
                                 # Override with more accurate Coinbase price if available
                                 crypto_data[symbol]['price'] = float(ticker.price)
@@ -419,7 +684,7 @@ class TradingBotAdapter:
             if not self.coinbase_client:
                 return portfolio_data
                 
-            accounts = self.coinbase_client.get_accounts()
+            accounts = self.balance_cache.get()
             if not accounts:
                 return portfolio_data
                 
@@ -526,13 +791,26 @@ class TradingBotAdapter:
             if action not in ['buy', 'sell']:
                 return {'success': False, 'error': 'Invalid action. Must be buy or sell'}
             
+            # Paper orders go straight to the simulated exchange
+            if self.api_type == "paper":
+                with tracer.span('paper_trade'):
+                    result = self._execute_advanced_trade(action, symbol, amount_type, amount)
+                if result['success']:
+                    self.balance_cache.invalidate()
+                return result
+
             # Try CDP service first, fallback to Advanced Trade API
-            cdp_result = self._execute_cdp_service_trade(action, symbol, amount_type, amount)
-            if cdp_result['success']:
-                return cdp_result
-            else:
-                logging.warning(f"CDP service failed: {cdp_result['error']}, falling back to Advanced Trade")
-                return self._execute_advanced_trade(action, symbol, amount_type, amount)
+            with tracer.span('cdp_service_trade'):
+                result = self._execute_cdp_service_trade(action, symbol, amount_type, amount)
+            if not result['success']:
+                logging.warning(f"CDP service failed: {result['error']}, falling back to Advanced Trade")
+                with tracer.span('advanced_trade'):
+                    result = self._execute_advanced_trade(action, symbol, amount_type, amount)
+            
+            if result['success']:
+                # Balances moved; the next read must come from the exchange
+                self.balance_cache.invalidate()
+            return result
                 
         except Exception as e:
             logging.error(f"Error executing market order: {e}")
@@ -541,10 +819,9 @@ class TradingBotAdapter:
     def _execute_cdp_service_trade(self, action, symbol, amount_type, amount):
         """Execute trade using CDP service (Node.js microservice)"""
         try:
-            import requests
-            
             # Get current price for calculations
-            current_price = self._get_real_btc_price() if symbol == 'BTC-USDC' else 0
+            with tracer.span('get_price'):
+                current_price = self._get_real_btc_price() if symbol == 'BTC-USDC' else 0
             if current_price <= 0:
                 return {'success': False, 'error': 'Unable to get current price'}
             
@@ -568,7 +845,7 @@ class TradingBotAdapter:
             
             # Call CDP service
             try:
-                response = requests.post('http://localhost:3001/trade', 
+                response = http_client.post('http://localhost:3001/trade', 
                     json={
                         'action': action,
                         'amount': trade_amount,
@@ -607,7 +884,8 @@ class TradingBotAdapter:
         """Execute trade using Advanced Trade API (fallback)"""
         try:
             # Get current price for calculations
-            current_price = self._get_real_btc_price() if symbol == 'BTC-USDC' else 0
+            with tracer.span('get_price'):
+                current_price = self._get_real_btc_price() if symbol == 'BTC-USDC' else 0
             if current_price <= 0:
                 return {'success': False, 'error': 'Unable to get current price'}
             
@@ -622,8 +900,7 @@ class TradingBotAdapter:
                 return {'success': False, 'error': f'Order size too small. Minimum 0.00001 BTC, requested: {crypto_amount:.8f}'}
             
             # Generate unique client order ID
-            import uuid
-            client_order_id = str(uuid.uuid4())
+            client_order_id = web_order_ids.next()
             
             # Prepare order parameters
             if action == 'buy':
@@ -648,7 +925,8 @@ class TradingBotAdapter:
             }
             
             logging.info(f"Creating Advanced Trade order with params: {order_params}")
-            order_response = self.coinbase_client.create_order(**order_params)
+            with EXCHANGE_CALL_SECONDS.time(call='create_order'), tracer.span('create_order'):
+                order_response = self.coinbase_client.create_order(**order_params)
             
             if hasattr(order_response, 'success') and order_response.success:
                 order_id = getattr(order_response, 'order_id', 'unknown')
@@ -704,7 +982,7 @@ class TradingBotAdapter:
             # First check what portfolios are available
             portfolios = self.get_portfolios()
             
-            accounts = self.coinbase_client.get_accounts()
+            accounts = self.balance_cache.get()
             balances = []
             
             # Handle different response formats
@@ -779,8 +1057,9 @@ class TradingBotAdapter:
     def _update_technical_indicators(self):
         """Update technical indicators with real data"""
         try:
-            if len(bot_data['price_history']) >= 20:
-                prices = [point['price'] for point in bot_data['price_history'][-20:]]
+            if len(bot_price_buffer) >= 20:
+                started = time.perf_counter()
+                prices = bot_price_buffer.prices(20).tolist()
                 current_price = prices[-1]
                 
                 # Simple technical indicators without external libraries
@@ -814,6 +1093,7 @@ class TradingBotAdapter:
                     'bollinger_middle': round(sma_20, 2),
                     'bollinger_lower': round(lower_bb, 2)
                 }
+                INDICATOR_SECONDS.observe(time.perf_counter() - started, stage='dashboard')
                 
                 # Calculate trading signal
                 self._calculate_trading_signal(current_price)
@@ -867,11 +1147,10 @@ class TradingBotAdapter:
     def _get_current_btc_price(self):
         """Get current BTC price from CoinGecko API"""
         try:
-            response = requests.get(
-                'https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd',
-                timeout=10
+            data = feed_cache.get_json(
+                'coingecko_price',
+                'https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd'
             )
-            data = response.json()
             return data['bitcoin']['usd']
         except:
             return 104000  # Fallback price
@@ -906,9 +1185,8 @@ class TradingBotAdapter:
     def _fetch_fear_greed_index(self):
         """Fetch Fear & Greed Index"""
         try:
-            response = requests.get('https://api.alternative.me/fng/', timeout=10)
-            if response.status_code == 200:
-                data = response.json()
+            data = feed_cache.get_json('fear_greed', 'https://api.alternative.me/fng/')
+            if data:
                 if 'data' in data and len(data['data']) > 0:
                     sentiment_data['fear_greed_index'] = int(data['data'][0]['value'])
         except Exception as e:
@@ -922,25 +1200,22 @@ class TradingBotAdapter:
             
             # Try CryptoCompare news API (free tier available)
             try:
-                response = requests.get(
-                    'https://min-api.cryptocompare.com/data/v2/news/?categories=BTC&lang=EN',
-                    timeout=10
+                data = feed_cache.get_json(
+                    'cryptocompare_news',
+                    'https://min-api.cryptocompare.com/data/v2/news/?categories=BTC&lang=EN'
                 )
-                if response.status_code == 200:
-                    data = response.json()
+                if data:
                     if 'Data' in data:
-                        for article in data['Data'][:10]:  # Get top 10 articles
-                            title = article.get('title', '')
-                            body = article.get('body', '')[:200]  # First 200 chars
-                            
-                            # Analyze sentiment using TextBlob
-                            title_sentiment = TextBlob(title).sentiment.polarity
-                            body_sentiment = TextBlob(body).sentiment.polarity if body else 0
-                            
-                            overall_sentiment = (title_sentiment + body_sentiment) / 2
-                            
+                        articles = [
+                            dict(article, body=article.get('body', '')[:200])  # First 200 chars
+                            for article in data['Data'][:10]  # Get top 10 articles
+                        ]
+                        # Scores come from the cache; only articles not seen before run TextBlob
+                        scores = sentiment_pipeline.score_articles(articles)
+                        
+                        for article, overall_sentiment in zip(articles, scores):
                             news_articles.append({
-                                'title': title,
+                                'title': article.get('title', ''),
                                 'url': article.get('url', ''),
                                 'published_on': datetime.fromtimestamp(article.get('published_on', 0)).isoformat(),
                                 'source': article.get('source_info', {}).get('name', 'Unknown'),
@@ -979,9 +1254,8 @@ class TradingBotAdapter:
         articles = []
         try:
             # Try CoinGecko trending
-            response = requests.get('https://api.coingecko.com/api/v3/search/trending', timeout=10)
-            if response.status_code == 200:
-                data = response.json()
+            data = feed_cache.get_json('coingecko_trending', 'https://api.coingecko.com/api/v3/search/trending')
+            if data:
                 if 'coins' in data:
                     for coin in data['coins'][:5]:
                         if 'item' in coin:
@@ -1070,8 +1344,8 @@ class TradingBotAdapter:
         """Calculate advanced market indicators"""
         try:
             # Get recent price history for volatility calculation
-            if len(bot_data['price_history']) >= 10:
-                prices = [point['price'] for point in bot_data['price_history'][-10:]]
+            if len(bot_price_buffer) >= 10:
+                prices = bot_price_buffer.prices(10).tolist()
                 
                 # Calculate volatility (standard deviation of returns)
                 returns = [(prices[i] - prices[i-1]) / prices[i-1] for i in range(1, len(prices))]
@@ -1383,35 +1657,121 @@ def get_products():
         logging.error(f"Error getting products: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus scrape endpoint for latency histograms and error counters"""
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/api/debug/traces')
+def get_traces():
+    """Get p50/p99 span breakdowns for backend trades and the bot's tick-to-order traces"""
+    limit = min(int(request.args.get('limit', 1000)), 10000)
+    bot_traces = read_trace_file(BOT_TRACE_PATH, limit)
+    backend_traces = tracer.recent(limit)
+    response = {'bot': breakdown(bot_traces), 'backend': breakdown(backend_traces)}
+    recent = int(request.args.get('recent', 0))
+    if recent > 0:
+        response['recent'] = {'bot': bot_traces[-recent:], 'backend': backend_traces[-recent:]}
+    return jsonify(response)
+
+@app.route('/api/debug/http')
+def get_http_metrics():
+    """Get outbound HTTP latency, error and circuit breaker metrics"""
+    return jsonify(http_client.stats())
+
+@app.route('/api/debug/feeds')
+def get_feed_cache_stats():
+    """Get external feed cache hits, revalidations and hit rate per source"""
+    return jsonify(feed_cache.stats())
+
+@app.route('/api/debug/state_sync')
+def get_state_sync_stats():
+    """Get dashboard delta sizes versus full-state sizes and channel sequence numbers"""
+    return jsonify({
+        'stats': state_sync.stats,
+        'channels': {name: channel['seq'] for name, channel in state_sync.channels.items()}
+    })
+
+@app.route('/api/debug/market_feed')
+def get_market_feed_status():
+    """Get websocket market data feed status and freshness"""
+    return jsonify({
+        'connected': market_feed.connected,
+        'url': market_feed.url,
+        'stats': market_feed.stats,
+        'prices': {symbol: market_feed.hub.latest_price(symbol) for symbol in market_feed.product_ids}
+    })
+
 @app.route('/api/whales')
 def get_whale_data():
     """Get whale tracking data"""
     return jsonify(whale_data)
 
+def _parse_time(value):
+    """Epoch seconds or an ISO 8601 timestamp"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+def _history_filters():
+    """Paging and filter query parameters shared by the history endpoints"""
+    return {
+        'limit': max(1, min(request.args.get('limit', 50, type=int), 1000)),
+        'offset': max(0, request.args.get('offset', 0, type=int)),
+        'product_id': request.args.get('product_id'),
+        'side': request.args.get('side'),
+        'start': request.args.get('start', type=_parse_time),
+        'end': request.args.get('end', type=_parse_time)
+    }
+
 @app.route('/api/orders')
 def get_orders():
-    """Get order history"""
+    """Get order history (query: limit, offset, product_id, side, status, start, end)"""
     try:
-        limit = request.args.get('limit', 50, type=int)
-        orders = bot_adapter.get_order_history(limit=limit)
+        filters = _history_filters()
+        orders, total = bot_adapter.get_order_history(status=request.args.get('status'), **filters)
         return jsonify({
             'success': True,
             'orders': orders,
-            'count': len(orders)
+            'count': len(orders),
+            'total': total,
+            'offset': filters['offset'],
+            'has_more': filters['offset'] + len(orders) < total
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/trades')
 def get_trades():
-    """Get fills/trades history"""
+    """Get fills/trades history (query: limit, offset, product_id, side, order_id, start, end)"""
     try:
-        limit = request.args.get('limit', 50, type=int)
-        trades = bot_adapter.get_fills_history(limit=limit)
+        filters = _history_filters()
+        trades, total = bot_adapter.get_fills_history(order_id=request.args.get('order_id'), **filters)
         return jsonify({
             'success': True,
             'trades': trades,
-            'count': len(trades)
+            'count': len(trades),
+            'total': total,
+            'offset': filters['offset'],
+            'has_more': filters['offset'] + len(trades) < total
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/decisions')
+def get_decisions():
+    """Get the trading bot's recorded decisions (query: limit, offset, product_id, start, end)"""
+    try:
+        filters = _history_filters()
+        filters.pop('side')
+        decisions, total = trade_journal.query_decisions(**filters)
+        return jsonify({
+            'success': True,
+            'decisions': decisions,
+            'count': len(decisions),
+            'total': total,
+            'has_more': filters['offset'] + len(decisions) < total
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -1447,6 +1807,56 @@ def get_crypto_detail(symbol):
         'data': crypto_data[symbol]
     })
 
+@app.route('/api/chart/<symbol>')
+def get_chart(symbol):
+    """Chart data for any time range (query: start, end, type=ohlc|line, resolution in seconds, points)"""
+    symbol = symbol.upper()
+    if symbol not in crypto_data:
+        return jsonify({'success': False, 'error': 'Cryptocurrency not supported'}), 404
+    try:
+        now = time.time()
+        # No candles exist after now, and the lookback bounds how much history one request can pull in
+        end = min(request.args.get('end', type=_parse_time) or now, now)
+        start = max(request.args.get('start', type=_parse_time) or end - 86400, now - CHART_MAX_LOOKBACK_SECONDS)
+        kind = request.args.get('type', 'ohlc')
+        if kind not in ('ohlc', 'line'):
+            return jsonify({'success': False, 'error': "type must be 'ohlc' or 'line'"}), 400
+        if start >= end:
+            return jsonify({'success': False, 'error': 'start must be before end'}), 400
+        points = max(2, min(request.args.get('points', CHART_DEFAULT_POINTS, type=int), CHART_MAX_POINTS))
+        span = end - start
+
+        if kind == 'line':
+            granularity = pick_granularity(span / (points * CHART_LINE_OVERSAMPLE))
+        else:
+            # Never more than CHART_MAX_POINTS bars, and always whole source candles per bar
+            requested = request.args.get('resolution', type=int)
+            resolution = max(requested or span / points, span / CHART_MAX_POINTS, 60)
+            granularity = pick_granularity(resolution)
+            step = GRANULARITY_SECONDS[granularity]
+            resolution = int(-(-resolution // step) * step)
+
+        granularity, candles, syncing = bot_adapter.get_chart_candles(symbol, granularity, start, end)
+        if kind == 'line':
+            # Line points are stored candles picked by LTTB, so their spacing is the source's
+            resolution = GRANULARITY_SECONDS[granularity]
+        data = chart_payload(candles, kind, resolution, points)
+        return jsonify({
+            'success': True,
+            'symbol': symbol,
+            'type': kind,
+            'start': start,
+            'end': end,
+            'granularity': granularity,
+            'resolution': resolution,
+            'count': len(data['t']),
+            # Older candles are still being fetched; asking again later returns more of the range
+            'syncing': syncing,
+            'data': data
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/execute-trade', methods=['POST'])
 def execute_trade():
     """Execute a real trade using Coinbase Advanced API"""
@@ -1463,16 +1873,20 @@ def execute_trade():
                 'error': 'Coinbase client not initialized. Check API credentials.'
             }), 400
         
-        # Execute the trade
-        result = bot_adapter.execute_market_order(action, symbol, amount_type, amount)
+        with tracer.trace('api_trade', symbol=symbol, action=action):
+            # Execute the trade
+            with tracer.span('execute_market_order'):
+                result = bot_adapter.execute_market_order(action, symbol, amount_type, amount)
+            
+            if result['success']:
+                # Log the trade
+                logging.info(f"Trade executed: {action} {amount} {amount_type} of {symbol}")
+                
+                # Refresh the portfolio once from the exchange and push it to dashboards
+                with tracer.span('publish_portfolio'):
+                    state_sync.publish('portfolio', bot_adapter.get_portfolio_breakdown())
         
         if result['success']:
-            # Log the trade
-            logging.info(f"Trade executed: {action} {amount} {amount_type} of {symbol}")
-            
-            # Update portfolio data
-            bot_adapter.get_portfolio_breakdown()
-            
             return jsonify({
                 'success': True,
                 'message': result['message'],
@@ -1617,12 +2031,20 @@ def process_voice_command():
 def handle_connect():
     """Handle client connection"""
     print('Client connected')
-    # Emit initial data to the newly connected client
-    socketio.emit('bot_update', bot_data)
-    socketio.emit('sentiment_update', sentiment_data)
-    socketio.emit('whale_update', whale_data)
-    socketio.emit('crypto_update', crypto_data)
-    socketio.emit('portfolio_update', bot_adapter.get_portfolio_breakdown())
+    # Seed channels the monitor loop hasn't published yet, then snapshot only to this client
+    for channel, data in (('bot', bot_data), ('sentiment', sentiment_data), ('whales', whale_data),
+                          ('crypto', crypto_data), ('tickers', dict(live_tickers))):
+        if not state_sync.has(channel):
+            state_sync.publish(channel, data)
+    if not state_sync.has('portfolio'):
+        state_sync.publish('portfolio', bot_adapter.get_portfolio_breakdown())
+    state_sync.send_snapshot(request.sid)
+
+@socketio.on('state_resync')
+def handle_state_resync(data=None):
+    """Resend a snapshot to a client that detected a sequence gap"""
+    channels = data.get('channels') if isinstance(data, dict) else None
+    state_sync.send_snapshot(request.sid, channels)
 
 @socketio.on('disconnect')
 def handle_disconnect():
@@ -1630,11 +2052,23 @@ def handle_disconnect():
     print('Client disconnected')
 
 if __name__ == '__main__':
-    logging.basicConfig(level=logging.INFO)
+    backend_log_path = os.getenv('BACKEND_LOG_PATH')
+    configure_logging(os.getenv('LOG_LEVEL', 'INFO'), os.path.join(REPO_ROOT, backend_log_path) if backend_log_path else None)
     print("Starting AI Trading Co-Pilot Backend...")
     
     # Initialize crypto data on startup
     print("Initializing cryptocurrency data...")
+    feed_running = False
+    if MARKET_FEED_URL:
+        try:
+            market_feed.start()
+            threading.Thread(target=_publish_tickers, name='ticker-publisher', daemon=True).start()
+            feed_running = True
+        except RuntimeError as e:
+            logging.warning(f"Market data feed disabled: {e}")
+    bot_adapter.start_paper_prices(feed_running)
+    bot_adapter.warm_start_price_history()
+    bot_adapter.sync_trade_journal()
     bot_adapter.update_crypto_data()
     
     # Start bot monitoring
@@ -0,0 +1,125 @@
+"""TTL cache with conditional revalidation for slow-changing external feeds
+
+The fear & greed index changes daily and CoinGecko markets and trending
+change at most every minute, yet the monitor loop asks for them every
+30 seconds. FeedCache keeps the last parsed JSON body per URL, with a
+TTL set per source:
+
+- fresh: served from memory without a request
+- stale, within the stale window: served from memory immediately while
+  one background request revalidates it
+- expired or missing: fetched inline
+
+Revalidation sends If-None-Match / If-Modified-Since when the server
+provided an ETag or Last-Modified, so an unchanged feed costs a 304
+without a body. When a fetch fails, the last good body is served.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FeedEntry:
+    """Last good response body for one URL"""
+    body: Any
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class FeedCache:
+    """Per-source TTL cache over an HttpClient with stale-while-revalidate"""
+
+    def __init__(self, http, sources: Dict[str, Tuple[float, float]],
+                 clock: Callable[[], float] = time.monotonic):
+        self.http = http
+        # source name -> (ttl seconds, extra seconds a stale body may be served while revalidating)
+        self.sources = sources
+        self.clock = clock
+        self._entries = {}
+        self._stats = {}
+        self._revalidating = set()
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='feed-revalidate')
+
+    def _count(self, source: str, event: str):
+        with self._lock:
+            stats = self._stats.setdefault(source, {'hits': 0, 'stale_hits': 0, 'misses': 0,
+                                                    'not_modified': 0, 'errors': 0})
+            stats[event] += 1
+
+    def get_json(self, source: str, url: str, timeout: float = 10) -> Optional[Any]:
+        """Parsed JSON for url, or None if it has never been fetched successfully"""
+        ttl, stale_window = self.sources.get(source, (0, 0))
+        with self._lock:
+            entry = self._entries.get(url)
+        age = self.clock() - entry.fetched_at if entry else None
+
+        if entry and age < ttl:
+            self._count(source, 'hits')
+            return entry.body
+
+        if entry and age < ttl + stale_window:
+            self._count(source, 'stale_hits')
+            with self._lock:
+                refresh = url not in self._revalidating
+                self._revalidating.add(url)
+            if refresh:
+                self._refresher.submit(self._revalidate, source, url, timeout)
+            return entry.body
+
+        self._count(source, 'misses')
+        entry = self._fetch(source, url, timeout)
+        return entry.body if entry else None
+
+    def _revalidate(self, source: str, url: str, timeout: float):
+        try:
+            self._fetch(source, url, timeout)
+        finally:
+            with self._lock:
+                self._revalidating.discard(url)
+
+    def _fetch(self, source: str, url: str, timeout: float) -> Optional[FeedEntry]:
+        with self._lock:
+            entry = self._entries.get(url)
+
+        headers = {}
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+
+        try:
+            response = self.http.get(url, headers=headers, timeout=timeout)
+            if response.status_code == 304 and entry:
+                self._count(source, 'not_modified')
+                entry = FeedEntry(entry.body, self.clock(), entry.etag, entry.last_modified)
+            elif response.status_code == 200:
+                entry = FeedEntry(response.json(), self.clock(),
+                                  response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            else:
+                raise ValueError(f"HTTP {response.status_code}")
+        except Exception as e:
+            self._count(source, 'errors')
+            logger.warning(f"Feed {source} fetch failed{', serving last good copy' if entry else ''}: {e}")
+            return entry
+
+        with self._lock:
+            self._entries[url] = entry
+        return entry
+
+    def stats(self) -> Dict:
+        """Per-source request counters and hit rate"""
+        with self._lock:
+            stats = {source: dict(counts) for source, counts in self._stats.items()}
+        for counts in stats.values():
+            served = counts['hits'] + counts['stale_hits'] + counts['misses']
+            counts['hit_rate'] = round((counts['hits'] + counts['stale_hits']) / served, 4) if served else 0.0
+        return stats
@@ -0,0 +1,248 @@
+"""Shared HTTP client for the backend's outbound calls
+
+Keeps one pooled keep-alive requests.Session per host, retries
+idempotent requests with jittered exponential backoff, trips a
+per-host circuit breaker after repeated failures, and records
+per-endpoint latency and error metrics.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Statuses worth retrying; 5xx also count as circuit breaker failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while a host's circuit is open"""
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open probe after a cool-down"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._probe_thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self.probing:
+                # Let exactly one probe request through
+                self.probing = True
+                self._probe_thread = threading.get_ident()
+                return True
+            return False
+
+    def end_probe(self):
+        """Free the half-open slot if this thread's probe ended without recording a result"""
+        with self._lock:
+            if self.probing and self._probe_thread == threading.get_ident():
+                self.probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.probing = False
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+class EndpointStats:
+    """Latency and error counters for one host + path"""
+
+    def __init__(self, window: int = 256):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.recent = deque(maxlen=window)
+
+    def record(self, latency: float, error: bool):
+        self.requests += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.recent.append(latency)
+        if error:
+            self.errors += 1
+
+    def snapshot(self) -> Dict:
+        recent = sorted(self.recent)
+
+        def percentile(fraction):
+            return round(recent[min(len(recent) - 1, int(fraction * len(recent)))] * 1000, 1) if recent else None
+
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'error_rate': round(self.errors / self.requests, 4) if self.requests else 0.0,
+            'avg_ms': round(self.total_latency / self.requests * 1000, 1) if self.requests else None,
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'max_ms': round(self.max_latency * 1000, 1)
+        }
+
+
+class HttpClient:
+    """Pooled HTTP client with retries, circuit breakers and metrics"""
+
+    def __init__(self, timeout: float = 10, max_retries: int = 3, backoff_base: float = 0.25,
+                 backoff_cap: float = 4.0, pool_maxsize: int = 10,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.pool_maxsize = pool_maxsize
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._sessions = {}
+        self._breakers = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _session(self, host: str) -> requests.Session:
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # Retries are handled here so backoff and metrics see every attempt
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[host] = session
+            return session
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[host] = breaker
+            return breaker
+
+    def _endpoint_stats(self, endpoint: str) -> EndpointStats:
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = EndpointStats()
+                self._stats[endpoint] = stats
+            return stats
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        if response is not None and response.status_code == 429:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(float(retry_after), self.backoff_cap)
+        # Full jitter: uniform over [0, capped exponential]
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> requests.Response:
+        """Send a request, retrying transient failures
+
+        Non-idempotent methods are not retried unless `retries` is given,
+        so a POST that reached the server is never sent twice.
+        """
+        method = method.upper()
+        parts = urlsplit(url)
+        host = parts.netloc
+        stats = self._endpoint_stats(f"{host}{parts.path}")
+        breaker = self._breaker(host)
+        session = self._session(host)
+        kwargs.setdefault('timeout', self.timeout)
+        if retries is None:
+            retries = self.max_retries if method in IDEMPOTENT_METHODS else 0
+
+        attempt = 0
+        response = None
+        while True:
+            if not breaker.allow():
+                if response is not None:
+                    # The circuit opened during our own retries; report the last answer
+                    return response
+                stats.record(0.0, error=True)
+                raise CircuitOpenError(f"Circuit open for {host}")
+
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                stats.record(time.perf_counter() - started, error=True)
+                breaker.record_failure()
+                if attempt >= retries:
+                    raise
+                logging.debug(f"Retrying {method} {host}{parts.path} after error: {e}")
+                response = None
+            except Exception:
+                # Not retried (a broken chunked body, an invalid request), but it still counts against the host
+                stats.record(time.perf_counter() - started, error=True)
+                breaker.record_failure()
+                raise
+            else:
+                failed = response.status_code >= 500
+                stats.record(time.perf_counter() - started, error=failed or response.status_code == 429)
+                if failed:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+            finally:
+                # Whatever ended the attempt, a half-open probe must not hold the circuit shut
+                breaker.end_probe()
+
+            stats.retries += 1
+            time.sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def stats(self) -> Dict:
+        """Per-endpoint metrics and per-host circuit states"""
+        with self._lock:
+            endpoints = dict(self._stats)
+            breakers = dict(self._breakers)
+        return {
+            'endpoints': {endpoint: stats.snapshot() for endpoint, stats in endpoints.items()},
+            'circuits': {host: breaker.state for host, breaker in breakers.items()}
+        }
+
+
+http_client = HttpClient()
@@ -0,0 +1,126 @@
+"""Versioned snapshot-plus-delta state sync over socket.io
+
+Each channel ('bot', 'crypto', ...) keeps the last state sent to
+clients and a sequence number. Clients get one snapshot of every
+channel when they connect; after that publish() broadcasts only the
+operations that turn the previous state into the new one:
+
+    ['set', path, value]          replace the value at path
+    ['del', path]                 remove a dict key
+    ['shift', path, trim, items]  drop `trim` items from the front of a list, append `items`
+
+'shift' covers the rolling price histories and feeds, which otherwise
+would be re-sent whole every cycle. A client that sees a sequence gap
+emits 'state_resync' and receives a fresh snapshot.
+"""
+
+import json
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from metrics import SIZE_BUCKETS, registry
+
+SOCKET_EMIT_BYTES = registry.histogram('socket_emit_bytes', 'Serialized size of dashboard socket emits',
+                                       ['event', 'channel'], buckets=SIZE_BUCKETS)
+
+
+def _plain(data):
+    """JSON-normalized deep copy, so later mutation of the source can't leak into stored state"""
+    return json.loads(json.dumps(data, default=str))
+
+
+def _list_shift(old: List, new: List) -> Optional[Tuple[int, List]]:
+    """(trim, items) if new is old with items dropped from the front and appended at the end"""
+    if not new:
+        return None
+    count = len(old)
+    for start in range(count):
+        overlap = count - start
+        if overlap <= len(new) and old[start] == new[0] and old[start:] == new[:overlap]:
+            return start, new[overlap:]
+    return None
+
+
+def diff(old, new, path: Optional[List] = None, ops: Optional[List] = None) -> List:
+    """Operations that turn old into new"""
+    path = [] if path is None else path
+    ops = [] if ops is None else ops
+    if old == new:
+        return ops
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old.keys() - new.keys():
+            ops.append(['del', path + [key]])
+        for key, value in new.items():
+            if key in old:
+                diff(old[key], value, path + [key], ops)
+            else:
+                ops.append(['set', path + [key], value])
+        return ops
+
+    if isinstance(old, list) and isinstance(new, list):
+        shift = _list_shift(old, new)
+        if shift is not None:
+            ops.append(['shift', path, shift[0], shift[1]])
+            return ops
+        if len(old) == len(new):
+            nested = []
+            for index, (old_item, new_item) in enumerate(zip(old, new)):
+                diff(old_item, new_item, path + [index], nested)
+            # Element-wise edits only pay off when fewer bytes than the whole list
+            if len(json.dumps(nested)) < len(json.dumps(new)):
+                ops.extend(nested)
+                return ops
+
+    ops.append(['set', path, new])
+    return ops
+
+
+class StateSync:
+    """Per-channel versioned state broadcast as snapshot plus deltas"""
+
+    def __init__(self, socketio):
+        self.socketio = socketio
+        self.channels = {}
+        self.stats = {'deltas': 0, 'snapshots': 0, 'delta_bytes': 0, 'full_bytes': 0}
+        self._lock = threading.Lock()
+
+    def has(self, channel: str) -> bool:
+        return channel in self.channels
+
+    def publish(self, channel: str, data) -> Optional[int]:
+        """Broadcast the changes since the last publish; returns the new sequence number"""
+        state = _plain(data)
+        with self._lock:
+            previous = self.channels.get(channel)
+            if previous is None:
+                ops = [['set', [], state]]
+                seq = 1
+            else:
+                ops = diff(previous['state'], state)
+                if not ops:
+                    return previous['seq']
+                seq = previous['seq'] + 1
+            self.channels[channel] = {'seq': seq, 'state': state}
+
+            payload = {'channel': channel, 'seq': seq, 'ops': ops}
+            delta_bytes = len(json.dumps(payload))
+            self.stats['deltas'] += 1
+            self.stats['delta_bytes'] += delta_bytes
+            self.stats['full_bytes'] += len(json.dumps(state))
+            SOCKET_EMIT_BYTES.observe(delta_bytes, event='state_delta', channel=channel)
+            # Emitting under the lock keeps deltas in sequence order on the wire
+            self.socketio.emit('state_delta', payload)
+            return seq
+
+    def snapshot(self, channels: Optional[Iterable[str]] = None) -> Dict:
+        names = self.channels.keys() if channels is None else channels
+        return {'channels': {name: self.channels[name] for name in names if name in self.channels}}
+
+    def send_snapshot(self, sid: str, channels: Optional[Iterable[str]] = None):
+        """Send the current state of every (or the given) channel to one client"""
+        with self._lock:
+            snapshot = self.snapshot(channels)
+            self.stats['snapshots'] += 1
+            SOCKET_EMIT_BYTES.observe(len(json.dumps(snapshot)), event='state_snapshot', channel='*')
+            self.socketio.emit('state_snapshot', snapshot, to=sid)
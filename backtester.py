@@ -0,0 +1,355 @@
+"""Event-driven backtester that replays historical candles through TradingBot
+
+Candles are streamed bar by bar through the same TradingBot methods used
+live (get_market_data, check_stop_loss_take_profit, analyze_market and
+execute_trade), with a simulated CoinbaseClient filling orders at the
+candle close.
+
+Usage:
+    python backtester.py candles.csv --initial-cash 500 --fee 0.006
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from coinbase_trading_bot import CoinbaseClient, TradingBot, TradingConfig
+from log_setup import configure_logging
+from order_manager import OrderManager
+
+logger = logging.getLogger(__name__)
+
+CANDLE_COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+# Alternative column names found in Coinbase and exchange exports
+COLUMN_ALIASES = {
+    'start': 'time',
+    'timestamp': 'time',
+    'date': 'time',
+    'o': 'open',
+    'h': 'high',
+    'l': 'low',
+    'c': 'close',
+    'v': 'volume'
+}
+
+
+def load_candles(path: str) -> Dict[str, np.ndarray]:
+    """Load OHLCV candles from a .csv, .parquet or .npz file
+
+    Returns a dict of column arrays sorted by time, with time as int64
+    epoch seconds and prices/volume as float64.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.npz':
+        with np.load(path) as data:
+            frame = pd.DataFrame({name: data[name] for name in data.files})
+    elif extension == '.parquet':
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path)
+
+    frame = frame.rename(columns=lambda name: COLUMN_ALIASES.get(name.lower(), name.lower()))
+    missing = [column for column in CANDLE_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"Candle file {path} is missing columns: {', '.join(missing)}")
+
+    times = frame['time']
+    if not pd.api.types.is_numeric_dtype(times):
+        times = pd.to_datetime(times, utc=True).astype('int64') // 10**9
+    frame['time'] = times
+
+    frame = frame.sort_values('time', kind='stable')
+    candles = {'time': frame['time'].to_numpy(dtype=np.int64)}
+    for column in CANDLE_COLUMNS[1:]:
+        candles[column] = frame[column].to_numpy(dtype=np.float64)
+    return candles
+
+
+class SimulatedCoinbaseClient(CoinbaseClient):
+    """In-memory stand-in for CoinbaseClient that fills orders at the current bar
+
+    Market orders fill immediately at the bar close adjusted by slippage,
+    and fees are charged in the quote currency.
+    """
+
+    def __init__(self, base_currency: str, quote_currency: str, initial_cash: float,
+                 fee_rate: float = 0.006, slippage: float = 0.0):
+        # No RESTClient: every call is answered from simulated state
+        self.base_currency = base_currency
+        self.quote_currency = quote_currency
+        self.fee_rate = fee_rate
+        self.slippage = slippage
+        self.cash = initial_cash
+        self.holdings = 0.0
+        self.price = 0.0
+        self.timestamp = None
+        self.fills = []
+        self._orders = {}
+
+        # Response objects are reused to keep per-bar allocations down
+        self._ticker = {'price': 0.0}
+        self._quote_balance = SimpleNamespace(value='0')
+        self._base_balance = SimpleNamespace(value='0')
+        self._accounts = SimpleNamespace(accounts=[
+            SimpleNamespace(currency=quote_currency, available_balance=self._quote_balance),
+            SimpleNamespace(currency=base_currency, available_balance=self._base_balance)
+        ])
+
+    def set_bar(self, timestamp: datetime, price: float):
+        """Advance the simulated market to a new bar"""
+        self.timestamp = timestamp
+        self.price = price
+
+    def get_account_balance(self) -> Dict:
+        """Get simulated account balances"""
+        self._quote_balance.value = self.cash
+        self._base_balance.value = self.holdings
+        return self._accounts
+
+    def get_product_ticker(self, product_id: str) -> Dict:
+        """Get the close of the current bar"""
+        self._ticker['price'] = self.price
+        return self._ticker
+
+    def get_product_candles(self, product_id: str, granularity: int, start: str, end: str) -> List:
+        """Historical candles are not available before the replay starts"""
+        return None
+
+    @staticmethod
+    def _rejection(reason: str, message: str) -> Dict:
+        # An explicit failure, as the exchange answers; a missing response would leave the order UNKNOWN
+        return {'success': False, 'failure_reason': reason, 'error_response': {'message': message}}
+
+    def place_market_order(self, product_id: str, side: str, size: str,
+                           client_order_id: Optional[str] = None) -> Dict:
+        """Fill a market order at the current bar price"""
+        if side.lower() == 'buy':
+            fill_price = self.price * (1 + self.slippage)
+            quote_size = min(float(size), self.cash)
+            fee = quote_size * self.fee_rate
+            base_size = (quote_size - fee) / fill_price
+            if base_size <= 0:
+                return self._rejection('INSUFFICIENT_FUND', f"Not enough {self.quote_currency} to buy")
+            self.cash -= quote_size
+            self.holdings += base_size
+        else:
+            fill_price = self.price * (1 - self.slippage)
+            base_size = min(float(size), self.holdings)
+            if base_size <= 0:
+                return self._rejection('INSUFFICIENT_FUND', f"No {self.base_currency} to sell")
+            quote_size = base_size * fill_price
+            fee = quote_size * self.fee_rate
+            self.holdings -= base_size
+            self.cash += quote_size - fee
+
+        fill = {
+            'order_id': f"sim_{len(self.fills) + 1}",
+            'product_id': product_id,
+            'side': side.lower(),
+            'price': fill_price,
+            'size': base_size,
+            'quote_size': quote_size,
+            'fee': fee,
+            'timestamp': self.timestamp
+        }
+        self.fills.append(fill)
+        self._orders[fill['order_id']] = {
+            'order_id': fill['order_id'],
+            'client_order_id': client_order_id,
+            'product_id': product_id,
+            'status': 'FILLED',
+            'filled_size': base_size,
+            'average_filled_price': fill_price,
+            'total_fees': fee
+        }
+        return fill
+
+    def get_orders(self, order_ids: List[str]) -> List[Dict]:
+        """Every simulated order fills when placed"""
+        return [self._orders[order_id] for order_id in order_ids if order_id in self._orders]
+
+    def list_recent_orders(self, product_id: str, since: float) -> List[Dict]:
+        """Every simulated order, since each placement is answered at once"""
+        return [order for order in self._orders.values() if order['product_id'] == product_id]
+
+    def list_open_orders(self, product_id: str) -> List[Dict]:
+        """Simulated orders never rest on the book"""
+        return []
+
+    def place_limit_order(self, product_id: str, side: str, size: str, price: str,
+                          client_order_id: Optional[str] = None) -> Dict:
+        """Fill a limit order only if it is marketable at the current bar"""
+        limit_price = float(price)
+        if side.lower() == 'buy' and self.price <= limit_price:
+            return self.place_market_order(product_id, side, str(float(size) * self.price), client_order_id)
+        if side.lower() == 'sell' and self.price >= limit_price:
+            return self.place_market_order(product_id, side, size, client_order_id)
+        return self._rejection('UNFILLABLE', f"Limit {side.lower()} at {price} is not marketable at {self.price}")
+
+    def equity(self) -> float:
+        """Account value marked at the current bar price"""
+        return self.cash + self.holdings * self.price
+
+
+@dataclass
+class BacktestResult:
+    """Outcome of a backtest run"""
+    initial_cash: float
+    final_equity: float
+    bot_pnl: float
+    max_drawdown: float
+    max_drawdown_percent: float
+    bars: int
+    elapsed_seconds: float
+    trades: List[Dict] = field(default_factory=list)
+    fills: List[Dict] = field(default_factory=list)
+    equity_curve: Optional[np.ndarray] = None
+
+    @property
+    def total_return_percent(self) -> float:
+        return (self.final_equity / self.initial_cash - 1) * 100 if self.initial_cash else 0.0
+
+    @property
+    def bars_per_second(self) -> float:
+        return self.bars / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def summary(self) -> Dict:
+        """Headline metrics as a JSON-serializable dict"""
+        return {
+            'bars': self.bars,
+            'initial_cash': round(self.initial_cash, 2),
+            'final_equity': round(self.final_equity, 2),
+            'total_return_percent': round(self.total_return_percent, 3),
+            'bot_pnl': round(self.bot_pnl, 2),
+            'max_drawdown': round(self.max_drawdown, 2),
+            'max_drawdown_percent': round(self.max_drawdown_percent, 3),
+            'trades': len(self.trades),
+            'fills': len(self.fills),
+            'fees': round(sum(fill['fee'] for fill in self.fills), 2),
+            'elapsed_seconds': round(self.elapsed_seconds, 3),
+            'bars_per_second': round(self.bars_per_second)
+        }
+
+
+class Backtester:
+    """Replays candles through a TradingBot backed by SimulatedCoinbaseClient"""
+
+    def __init__(self, config: TradingConfig, candles: Dict[str, np.ndarray],
+                 initial_cash: float = 500.0, fee_rate: float = 0.006,
+                 slippage: float = 0.0, quiet: bool = True):
+        # Warm-starting from live local candles would leak data into the replay,
+        # simulated decisions don't belong in the live trade journal, and the
+        # simulated client only fills at bar closes, so exits are checked per bar
+        self.config = replace(config, candle_store_dir=None, journal_path=None, protective_orders=False)
+        self.candles = candles
+        self.initial_cash = initial_cash
+        self.fee_rate = fee_rate
+        self.slippage = slippage
+        self.quiet = quiet
+
+    def run(self) -> BacktestResult:
+        """Stream every candle through the bot and collect the results"""
+        client = SimulatedCoinbaseClient(
+            self.config.base_currency,
+            self.config.quote_currency,
+            self.initial_cash,
+            fee_rate=self.fee_rate,
+            slippage=self.slippage
+        )
+
+        # Per-bar INFO and risk-limit WARNING logs, and rejected orders when cash runs out, would dominate the replay
+        loggers = [logging.getLogger(TradingBot.__module__), logging.getLogger(OrderManager.__module__)]
+        previous_levels = [quieted.level for quieted in loggers]
+        if self.quiet:
+            loggers[0].setLevel(logging.ERROR)
+            loggers[1].setLevel(logging.CRITICAL)
+
+        times = self.candles['time']
+        closes = self.candles['close']
+        equity_curve = np.empty(len(closes))
+        start_time = datetime.fromtimestamp(int(times[0])) if len(times) else datetime.now()
+        client.set_bar(start_time, float(closes[0]) if len(closes) else 0.0)
+
+        try:
+            # Orders fill inline so each one lands on the bar that placed it
+            bot = TradingBot(self.config, client=client, clock=lambda: client.timestamp,
+                             order_manager=OrderManager(client, background=False))
+
+            started = time.perf_counter()
+            for i, (timestamp, close) in enumerate(zip(times.tolist(), closes.tolist())):
+                client.set_bar(datetime.fromtimestamp(timestamp), close)
+
+                market_data = bot.get_market_data()
+                if market_data:
+                    bot.process_tick(market_data)
+
+                equity_curve[i] = client.cash + client.holdings * close
+            elapsed = time.perf_counter() - started
+        finally:
+            for quieted, level in zip(loggers, previous_levels):
+                quieted.setLevel(level)
+
+        if len(equity_curve):
+            peaks = np.maximum.accumulate(np.maximum(equity_curve, self.initial_cash))
+            drawdowns = peaks - equity_curve
+            worst = int(np.argmax(drawdowns))
+            max_drawdown = float(drawdowns[worst])
+            max_drawdown_percent = max_drawdown / peaks[worst] * 100 if peaks[worst] else 0.0
+            final_equity = float(equity_curve[-1])
+        else:
+            max_drawdown = max_drawdown_percent = 0.0
+            final_equity = self.initial_cash
+
+        return BacktestResult(
+            initial_cash=self.initial_cash,
+            final_equity=final_equity,
+            bot_pnl=bot.total_pnl,
+            max_drawdown=max_drawdown,
+            max_drawdown_percent=max_drawdown_percent,
+            bars=len(closes),
+            elapsed_seconds=elapsed,
+            trades=bot.trades_executed,
+            fills=client.fills,
+            equity_curve=equity_curve
+        )
+
+
+def main():
+    """Run a backtest from the command line"""
+    parser = argparse.ArgumentParser(description='Backtest TradingBot on historical candles')
+    parser.add_argument('candles', help='Path to a .csv, .parquet or .npz candle file')
+    parser.add_argument('--initial-cash', type=float, default=500.0)
+    parser.add_argument('--fee', type=float, default=0.006, help='Fee rate per fill (0.006 = 0.6%%)')
+    parser.add_argument('--slippage', type=float, default=0.0, help='Fractional price slippage per fill')
+    parser.add_argument('--trade-log', help='Write fills to this CSV file')
+    args = parser.parse_args()
+    configure_logging(path=None)
+
+    candles = load_candles(args.candles)
+    result = Backtester(
+        TradingConfig(),
+        candles,
+        initial_cash=args.initial_cash,
+        fee_rate=args.fee,
+        slippage=args.slippage
+    ).run()
+
+    print(json.dumps(result.summary(), indent=2))
+
+    if args.trade_log:
+        pd.DataFrame(result.fills).to_csv(args.trade_log, index=False)
+        print(f"Wrote {len(result.fills)} fills to {args.trade_log}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Shared, short-lived cache of exchange account balances
+
+Balances change only when orders fill, yet the bot, every REST endpoint
+and every new dashboard connection used to fetch them on their own.
+BalanceCache serves the last accounts response for `ttl` seconds.
+Concurrent callers that find it stale share a single refresh (single
+flight). Order placement calls invalidate(), so the next read after a
+fill always reaches the exchange.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BalanceCache:
+    """TTL cache around an accounts fetch with single-flight refresh"""
+
+    def __init__(self, fetch: Callable[[], object], ttl: float = 15.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = {'hits': 0, 'refreshes': 0, 'coalesced': 0, 'errors': 0, 'invalidations': 0}
+        self._value = None
+        self._fetched_at = None
+        # Bumped by invalidate(); a refresh that started before a fill must not count as fresh
+        self._generation = 0
+        self._inflight = None
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, max_age: float) -> bool:
+        return self._fetched_at is not None and self.clock() - self._fetched_at < max_age
+
+    def get(self, max_age: Optional[float] = None, timeout: Optional[float] = 30.0):
+        """Cached accounts, refreshed if older than max_age (default ttl)
+
+        If the refresh fails, the last good value is returned even when stale.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            if self._is_fresh(max_age):
+                self.stats['hits'] += 1
+                return self._value
+            if self._inflight is not None:
+                self.stats['coalesced'] += 1
+                waiter = self._inflight
+            else:
+                waiter = None
+                self._inflight = future = Future()
+                generation = self._generation
+
+        if waiter is not None:
+            return waiter.result(timeout)
+
+        value = None
+        try:
+            self.stats['refreshes'] += 1
+            value = self.fetch()
+        except Exception as e:
+            logger.error(f"Error refreshing account balances: {e}")
+        finally:
+            with self._lock:
+                if value is not None:
+                    self._value = value
+                    self._fetched_at = self.clock() if generation == self._generation else None
+                else:
+                    self.stats['errors'] += 1
+                self._inflight = None
+                result = self._value
+            future.set_result(result)
+        return result
+
+    def invalidate(self):
+        """Force the next get() to refetch, e.g. after an order fills"""
+        with self._lock:
+            self._fetched_at = None
+            self._generation += 1
+            self.stats['invalidations'] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            age = None if self._fetched_at is None else round(self.clock() - self._fetched_at, 3)
+            return dict(self.stats, age_seconds=age, ttl=self.ttl)
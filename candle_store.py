@@ -0,0 +1,310 @@
+"""Persistent columnar candle store with memory-mapped reads
+
+Each (product, granularity) series lives in its own directory with one
+append-only raw little-endian file per column (time.i8, open.f8, ...) and
+a meta.json recording the committed row count and which time ranges have
+already been fetched. Reads map the column files with np.memmap, so
+slicing a range never copies data. Rows are kept sorted by time: new
+candles are appended, and the rare backfill of an older gap rewrites the
+series once.
+
+The bot and the backend write the same store from separate processes, so
+every write holds an fcntl lock on the series' .lock file. A rewrite puts
+the merged columns in new files of the next generation (time.1.i8, ...),
+and only the meta.json swap that follows switches readers to them. A
+crash at any point leaves the old, consistent series in place.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within one process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = (
+    ('time', np.dtype('<i8')),
+    ('open', np.dtype('<f8')),
+    ('high', np.dtype('<f8')),
+    ('low', np.dtype('<f8')),
+    ('close', np.dtype('<f8')),
+    ('volume', np.dtype('<f8'))
+)
+
+GRANULARITY_SECONDS = {
+    'ONE_MINUTE': 60,
+    'FIVE_MINUTE': 300,
+    'FIFTEEN_MINUTE': 900,
+    'THIRTY_MINUTE': 1800,
+    'ONE_HOUR': 3600,
+    'TWO_HOUR': 7200,
+    'SIX_HOUR': 21600,
+    'ONE_DAY': 86400
+}
+
+# Coinbase Advanced Trade returns at most 350 candles per request
+MAX_CANDLES_PER_REQUEST = 350
+
+
+def _field(candle, name: str, index: int):
+    if isinstance(candle, dict):
+        return candle.get(name, candle.get(name[0]))
+    if isinstance(candle, (list, tuple)):
+        return candle[index]
+    return getattr(candle, name, None)
+
+
+def parse_candles(response) -> Dict[str, np.ndarray]:
+    """Convert a get_candles response into sorted column arrays
+
+    Accepts SDK response objects, dicts, or lists in the
+    [time, low, high, open, close, volume] layout.
+    """
+    candle_data = response
+    if hasattr(response, 'candles'):
+        candle_data = response.candles
+    elif isinstance(response, dict):
+        candle_data = response.get('candles', [])
+    elif hasattr(response, '__dict__') and not isinstance(response, (list, tuple)):
+        candle_data = response.__dict__.get('candles', [])
+
+    rows = []
+    # Positions in the [time, low, high, open, close, volume] list layout
+    positions = {'time': 0, 'low': 1, 'high': 2, 'open': 3, 'close': 4, 'volume': 5}
+    for candle in candle_data or []:
+        try:
+            start = _field(candle, 'start', 0)
+            if start is None:
+                start = _field(candle, 'time', 0)
+            row = [int(start)]
+            for name, _ in COLUMNS[1:]:
+                row.append(float(_field(candle, name, positions[name])))
+            rows.append(row)
+        except (ValueError, TypeError, AttributeError, IndexError):
+            continue
+
+    if not rows:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+
+    table = np.array(rows, dtype=np.float64)
+    order = np.argsort(table[:, 0], kind='stable')
+    table = table[order]
+    return {name: table[:, index].astype(dtype) for index, (name, dtype) in enumerate(COLUMNS)}
+
+
+def _merge_ranges(ranges: List[List[int]]) -> List[List[int]]:
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class CandleStore:
+    """On-disk candle series keyed by product and granularity"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _series_dir(self, product_id: str, granularity: str) -> str:
+        return os.path.join(self.root, product_id.upper(), granularity.upper())
+
+    def _meta_path(self, product_id: str, granularity: str) -> str:
+        return os.path.join(self._series_dir(product_id, granularity), 'meta.json')
+
+    def _column_path(self, product_id: str, granularity: str, name: str, dtype: np.dtype,
+                     generation: int = 0) -> str:
+        suffix = 'i8' if dtype.kind == 'i' else 'f8'
+        filename = f"{name}.{suffix}" if not generation else f"{name}.{generation}.{suffix}"
+        return os.path.join(self._series_dir(product_id, granularity), filename)
+
+    @contextmanager
+    def _locked(self, product_id: str, granularity: str):
+        """Hold the series' write lock, against other threads and other processes"""
+        with self._lock:
+            os.makedirs(self._series_dir(product_id, granularity), exist_ok=True)
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self._series_dir(product_id, granularity), '.lock'), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_meta(self, product_id: str, granularity: str) -> Dict:
+        try:
+            with open(self._meta_path(product_id, granularity)) as meta_file:
+                return json.load(meta_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'count': 0, 'coverage': []}
+
+    def _save_meta(self, product_id: str, granularity: str, meta: Dict):
+        path = self._meta_path(product_id, granularity)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as meta_file:
+            json.dump(meta, meta_file)
+        # Atomic rename commits the new row count only after the columns are written
+        os.replace(temp_path, path)
+
+    def read(self, product_id: str, granularity: str, start: Optional[int] = None,
+             end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Memory-mapped column views for candles with start <= time < end"""
+        for attempt in range(2):
+            meta = self._load_meta(product_id, granularity)
+            count, generation = meta['count'], meta.get('generation', 0)
+            if count == 0:
+                return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+            try:
+                columns = {
+                    name: np.memmap(self._column_path(product_id, granularity, name, dtype, generation),
+                                    dtype=dtype, mode='r', shape=(count,))
+                    for name, dtype in COLUMNS
+                }
+                break
+            except FileNotFoundError:
+                # A rewrite in another process replaced this generation after meta.json was read
+                if attempt:
+                    raise
+
+        times = columns['time']
+        lower = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+        upper = count if end is None else int(np.searchsorted(times, end, side='left'))
+        return {name: column[lower:upper] for name, column in columns.items()}
+
+    def last_time(self, product_id: str, granularity: str) -> Optional[int]:
+        times = self.read(product_id, granularity)['time']
+        return int(times[-1]) if len(times) else None
+
+    def latest_closes(self, product_id: str, granularity: str, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(times, closes) of the newest `count` candles"""
+        candles = self.read(product_id, granularity)
+        return candles['time'][-count:], candles['close'][-count:]
+
+    def append(self, product_id: str, granularity: str, candles: Dict[str, np.ndarray],
+               covered: Optional[Tuple[int, int]] = None) -> int:
+        """Add candles to a series and return how many new rows were stored
+
+        `covered` marks a [start, end) range as fetched even when the
+        exchange returned no candles for parts of it.
+        """
+        with self._locked(product_id, granularity):
+            meta = self._load_meta(product_id, granularity)
+            count, generation = meta['count'], meta.get('generation', 0)
+            existing_times = self.read(product_id, granularity)['time']
+
+            new_times = candles['time']
+            if len(new_times) and count and new_times[0] <= existing_times[-1]:
+                # Only candles at or before the stored tail can be duplicates
+                fresh = (new_times > existing_times[-1]) | ~np.isin(new_times, existing_times)
+                candles = {name: column[fresh] for name, column in candles.items()}
+                new_times = candles['time']
+
+            added = len(new_times)
+            replaced = None
+            if added and count and new_times[0] <= existing_times[-1]:
+                replaced = generation
+                meta['generation'] = self._rewrite(product_id, granularity, candles, generation)
+            elif added:
+                for name, dtype in COLUMNS:
+                    path = self._column_path(product_id, granularity, name, dtype, generation)
+                    with open(path, 'ab') as column_file:
+                        # Drop bytes from an append that crashed before meta.json was committed
+                        column_file.truncate(count * dtype.itemsize)
+                        column_file.write(np.ascontiguousarray(candles[name], dtype=dtype).tobytes())
+
+            meta['count'] = count + added
+            if covered:
+                meta['coverage'] = _merge_ranges(meta.get('coverage', []) + [list(covered)])
+            self._save_meta(product_id, granularity, meta)
+            if replaced is not None:
+                for name, dtype in COLUMNS:
+                    try:
+                        os.remove(self._column_path(product_id, granularity, name, dtype, replaced))
+                    except FileNotFoundError:
+                        pass
+            return added
+
+    def _rewrite(self, product_id: str, granularity: str, candles: Dict[str, np.ndarray], generation: int) -> int:
+        """Write the series merged with out-of-order candles as the next generation; returns it
+
+        Nothing changes for readers until the caller commits meta.json.
+        """
+        existing = self.read(product_id, granularity)
+        merged = {name: np.concatenate((np.array(existing[name]), candles[name])) for name, _ in COLUMNS}
+        order = np.argsort(merged['time'], kind='stable')
+
+        generation += 1
+        for name, dtype in COLUMNS:
+            path = self._column_path(product_id, granularity, name, dtype, generation)
+            with open(path, 'wb') as column_file:
+                column_file.write(np.ascontiguousarray(merged[name][order], dtype=dtype).tobytes())
+                column_file.flush()
+                os.fsync(column_file.fileno())
+        return generation
+
+    def missing_ranges(self, product_id: str, granularity: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """Parts of [start, end) that have never been fetched"""
+        missing = []
+        cursor = start
+        for covered_start, covered_end in self._load_meta(product_id, granularity).get('coverage', []):
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > cursor:
+                missing.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end:
+            missing.append((cursor, end))
+        return missing
+
+    def sync(self, product_id: str, granularity: str,
+             fetch: Callable[[str, str, str, str], object],
+             start: int, end: Optional[int] = None) -> int:
+        """Fetch and store every missing candle between start and end
+
+        `fetch(product_id, granularity, start, end)` must return a
+        get_candles response (start and end are epoch-second strings).
+        The still-forming candle at the end of the range is never stored.
+        """
+        step = GRANULARITY_SECONDS[granularity.upper()]
+        end = int(end if end is not None else time.time())
+        # Align to candle boundaries and exclude the candle that is still open
+        start = int(start) // step * step
+        end = end // step * step
+
+        added = 0
+        for missing_start, missing_end in self.missing_ranges(product_id, granularity, start, end):
+            chunk_start = missing_start
+            while chunk_start < missing_end:
+                chunk_end = min(missing_end, chunk_start + step * MAX_CANDLES_PER_REQUEST)
+                response = fetch(product_id, granularity, str(chunk_start), str(chunk_end))
+                if response is None:
+                    logger.warning(f"Candle fetch failed for {product_id} {granularity}, will retry next sync")
+                    return added
+
+                candles = parse_candles(response)
+                # The end bound is inclusive on the exchange side; keep [start, end)
+                in_range = candles['time'] < chunk_end
+                candles = {name: column[in_range] for name, column in candles.items()}
+                added += self.append(product_id, granularity, candles, covered=(chunk_start, chunk_end))
+                chunk_start = chunk_end
+
+        if added:
+            logger.info(f"Stored {added} new {granularity} candles for {product_id}")
+        return added
@@ -0,0 +1,115 @@
+"""Chart series at a requested resolution: OHLC bars and LTTB-downsampled lines
+
+The dashboard used to receive raw point lists, capped at 100 points to
+keep payloads small. The functions here turn stored candles (and the
+recent ticks that no stored candle covers yet) into:
+
+- OHLC bars of any width. aggregate_ohlc() merges candles or ticks into
+  fixed time buckets with numpy reduceat, with no Python loop per bar.
+- line series of at most n points. lttb() keeps the points that
+  Largest-Triangle-Three-Buckets picks, so peaks and troughs survive the
+  downsampling where plain decimation would drop them.
+
+pick_granularity() chooses which stored candle series to read, so a
+request spanning months reads hours-wide candles rather than every minute.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from candle_store import COLUMNS, GRANULARITY_SECONDS
+
+
+def pick_granularity(bucket_seconds: float) -> str:
+    """The coarsest stored granularity no wider than bucket_seconds (ONE_MINUTE at the finest)"""
+    best = 'ONE_MINUTE'
+    for granularity, seconds in GRANULARITY_SECONDS.items():
+        if GRANULARITY_SECONDS[best] < seconds <= bucket_seconds:
+            best = granularity
+    return best
+
+
+def append_ticks(candles: Dict[str, np.ndarray], step: int, timestamps_ns: np.ndarray, prices: np.ndarray,
+                 start: float, end: float) -> Dict[str, np.ndarray]:
+    """Add ticks newer than the last candle as zero-volume candles, so they aggregate like candles"""
+    times = np.asarray(timestamps_ns, dtype=np.int64) // 1_000_000_000
+    covered_until = int(candles['time'][-1]) + step if len(candles['time']) else start
+    recent = (times >= max(covered_until, start)) & (times < end) & (np.asarray(prices) > 0)
+    if not recent.any():
+        return candles
+    ticks = np.asarray(prices, dtype=np.float64)[recent]
+    columns = {'time': times[recent], 'volume': np.zeros(len(ticks))}
+    return {
+        name: np.concatenate((candles[name], columns.get(name, ticks)))
+        for name in candles
+    }
+
+
+def aggregate_ohlc(candles: Dict[str, np.ndarray], bucket_seconds: int) -> Dict[str, np.ndarray]:
+    """Merge time-sorted candles into bars starting on multiples of bucket_seconds"""
+    times = np.asarray(candles['time'], dtype=np.int64)
+    if not len(times):
+        return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+
+    buckets = times // bucket_seconds * bucket_seconds
+    # Index of the first candle in each bucket
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(times)] - 1
+    return {
+        'time': buckets[starts],
+        'open': np.asarray(candles['open'])[starts],
+        'high': np.maximum.reduceat(candles['high'], starts),
+        'low': np.minimum.reduceat(candles['low'], starts),
+        'close': np.asarray(candles['close'])[ends],
+        'volume': np.add.reduceat(candles['volume'], starts)
+    }
+
+
+def lttb(times: np.ndarray, values: np.ndarray, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Downsample a line to `threshold` points with Largest-Triangle-Three-Buckets
+
+    The first and last points are kept. Every bucket in between keeps the
+    point that forms the largest triangle with the point kept before it
+    and the average of the next bucket.
+    """
+    x = np.asarray(times, dtype=np.float64)
+    y = np.asarray(values, dtype=np.float64)
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return np.asarray(times), y
+
+    # Bucket boundaries over the points between the first and the last
+    edges = (np.arange(threshold - 1) * (length - 2) / (threshold - 2)).astype(np.int64) + 1
+    edges[-1] = length - 1
+    # The next bucket's averages do not depend on the points picked, so they are computed up front
+    average_x = np.r_[np.add.reduceat(x[:-1], edges[:-1]) / np.diff(edges), x[-1]]
+    average_y = np.r_[np.add.reduceat(y[:-1], edges[:-1]) / np.diff(edges), y[-1]]
+
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, length - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_x, next_y = average_x[bucket + 1], average_y[bucket + 1]
+        previous_x, previous_y = x[previous], y[previous]
+        # Twice the triangle area; only the largest matters
+        areas = np.abs((previous_x - next_x) * (y[start:end] - previous_y)
+                       - (previous_x - x[start:end]) * (next_y - previous_y))
+        previous = start + int(np.argmax(areas))
+        picked[bucket + 1] = previous
+    return np.asarray(times)[picked], y[picked]
+
+
+def chart_payload(candles: Dict[str, np.ndarray], kind: str, resolution: int,
+                  points: Optional[int] = None) -> Dict:
+    """Compact columnar chart data: epoch-ms 't' plus OHLCV columns, or 'p' prices for a line"""
+    if kind == 'line':
+        times, prices = lttb(candles['time'], candles['close'], points or len(candles['close']))
+        return {'t': (np.asarray(times, dtype=np.int64) * 1000).tolist(), 'p': prices.tolist()}
+
+    bars = aggregate_ohlc(candles, resolution)
+    payload = {'t': (bars['time'] * 1000).tolist()}
+    for name in ('open', 'high', 'low', 'close', 'volume'):
+        payload[name[0]] = bars[name].tolist()
+    return payload
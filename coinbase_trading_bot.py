@@ -5,30 +5,57 @@ import json
 import logging
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, replace
+from decimal import ROUND_DOWN, ROUND_HALF_EVEN, Decimal
 from coinbase.rest import RESTClient
 import requests
-from threading import Thread
+from threading import RLock, Thread
 import signal
 import sys
 from dotenv import load_dotenv
+from balance_cache import BalanceCache
+from candle_store import CandleStore
+from price_buffer import PriceRingBuffer
+from rate_limiter import RateLimiter, coinbase_rate_limiter
+from order_ids import client_order_ids
+from order_manager import ManagedOrder, OrderManager
+from trade_journal import TradeJournal
+from trigger_index import PositionTriggers, TriggerIndex
+from paper_exchange import PaperExchange
+from log_setup import configure_logging
+from market_feed import COINBASE_WS_URL, MarketDataFeed, MarketDataHub
+from metrics import registry, start_exporter
+from tracing import tracer
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('trading_bot.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Handlers are installed by configure_logging() in main(), not on import
 logger = logging.getLogger(__name__)
 
+EXCHANGE_CALL_SECONDS = registry.histogram('exchange_call_seconds', 'Coinbase REST call latency', ['call'])
+EXCHANGE_CALL_ERRORS = registry.counter('exchange_call_errors_total', 'Coinbase REST calls that raised', ['call'])
+RATE_LIMIT_WAIT_SECONDS = registry.histogram('rate_limit_wait_seconds', 'Time spent waiting for a rate limit token', ['budget'])
+INDICATOR_SECONDS = registry.histogram('indicator_seconds', 'Indicator update and analysis time', ['stage'])
+SIGNAL_TO_ORDER_SECONDS = registry.histogram('signal_to_order_seconds', 'Time from a BUY/SELL signal to the order being accepted', ['side'])
+TICK_SECONDS = registry.histogram('bot_tick_seconds', 'Full process_tick duration', ['product'])
+# Bound once: these run on every price update, including in backtests
+INDICATOR_UPDATE_SECONDS = INDICATOR_SECONDS.labels(stage='update')
+INDICATOR_ANALYZE_SECONDS = INDICATOR_SECONDS.labels(stage='analyze')
+
+# Relative data paths resolve against the repo root, whatever the working directory, as in the backend
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def repo_path(path: Optional[str]) -> Optional[str]:
+    """An absolute path for a repo-relative one; absolute paths pass through and empty ones stay disabled"""
+    return os.path.join(REPO_ROOT, path) if path else None
+
+
 @dataclass
 class TradingConfig:
     """Configuration class for trading parameters"""
@@ -40,6 +67,8 @@ class TradingConfig:
     max_position_size: float = 400.0  # 80% of $500 account
     stop_loss_percentage: float = 1.5  # Tighter stop loss
     take_profit_percentage: float = 2.5  # Quicker profits
+    trailing_stop_percentage: Optional[float] = float(os.getenv('TRAILING_STOP_PERCENTAGE')) if os.getenv('TRAILING_STOP_PERCENTAGE') else None  # None disables
+    break_even_percentage: Optional[float] = float(os.getenv('BREAK_EVEN_PERCENTAGE')) if os.getenv('BREAK_EVEN_PERCENTAGE') else None  # gain over break even that moves the stop there; None disables
     rsi_oversold: int = 35  # More sensitive signals
     rsi_overbought: int = 65  # More sensitive signals
     sma_short_period: int = 5  # Faster signals
@@ -47,6 +76,36 @@ class TradingConfig:
     check_interval: int = 30  # seconds
     max_daily_trades: int = 15  # More opportunities
     risk_per_trade_percent: float = 1.0
+    candle_store_dir: Optional[str] = repo_path(os.getenv('CANDLE_STORE_DIR', 'data/candles'))  # None disables
+    market_feed_url: Optional[str] = os.getenv('MARKET_FEED_URL', COINBASE_WS_URL)  # None disables
+    journal_path: Optional[str] = repo_path(os.getenv('TRADE_JOURNAL_PATH', 'data/trade_journal.db'))  # None disables
+    trace_path: Optional[str] = repo_path(os.getenv('TRACE_PATH', 'data/traces.jsonl'))  # None keeps traces in memory only
+    log_level: str = os.getenv('LOG_LEVEL', 'INFO')
+    log_path: Optional[str] = repo_path(os.getenv('LOG_PATH', 'trading_bot.log'))  # None logs to the console only
+    metrics_port: Optional[int] = int(os.getenv('METRICS_PORT')) if os.getenv('METRICS_PORT') else None  # None disables
+    protective_orders: bool = os.getenv('PROTECTIVE_ORDERS', '').lower() in ('1', 'true', 'yes')  # exchange-side exits
+    paper_trading: bool = os.getenv('PAPER_TRADING', '').lower() in ('1', 'true', 'yes')
+    paper_balance_usd: float = float(os.getenv('PAPER_BALANCE_USD', '10000'))
+    paper_start_price: Optional[float] = float(os.getenv('PAPER_START_PRICE')) if os.getenv('PAPER_START_PRICE') else None  # None waits for the feed
+    paper_journal_path: Optional[str] = repo_path(os.getenv('PAPER_TRADE_JOURNAL_PATH', 'data/paper_trade_journal.db'))  # None disables
+
+def order_rejection(error: Exception) -> Optional[Dict]:
+    """A failed create_order response when the exchange answered with a 4xx, else None
+
+    Any other error (timeout, connection reset, 5xx) leaves it unknown
+    whether the order was placed.
+    """
+    response = getattr(error, 'response', None)
+    status = getattr(response, 'status_code', None)
+    if status is not None and 400 <= status < 500:
+        return {'success': False, 'failure_reason': f'HTTP_{status}', 'error_response': {'message': str(error)}}
+    return None
+
+
+def round_to_increment(value: float, increment: str, rounding: str = ROUND_HALF_EVEN) -> str:
+    """Format a price or size as a multiple of the product's increment, as the exchange requires"""
+    step = Decimal(increment)
+    return format((Decimal(repr(value)) / step).quantize(Decimal(1), rounding=rounding) * step, 'f')
 
 class TechnicalIndicators:
     """Technical analysis indicators for trading decisions"""
@@ -113,18 +172,344 @@ class TechnicalIndicators:
 
         return upper_band, sma, lower_band
 
+    # ===== BATCH MODE =====
+    # Vectorized kernels over a whole float64 array of closes. Element i of
+    # every series equals the per-tick function applied to closes[:i + 1],
+    # with NaN where that function would return None.
+
+    # Rows per block for the strided rolling std, bounding temporary memory
+    STD_BLOCK_ROWS = 65536
+
+    @staticmethod
+    def _window_sums(values: np.ndarray, period: int) -> np.ndarray:
+        """Sums of every full window of `period` values via a cumulative sum"""
+        # Centering keeps the cumulative sum small so window differences stay precise
+        offset = values[0]
+        cumulative = np.concatenate(([0.0], np.cumsum(values - offset)))
+        return cumulative[period:] - cumulative[:-period] + offset * period
+
+    @staticmethod
+    def calculate_sma_series(closes: np.ndarray, period: int) -> np.ndarray:
+        """Simple Moving Average for every bar"""
+        closes = np.asarray(closes, dtype=np.float64)
+        result = np.full(closes.shape, np.nan)
+        if len(closes) < period:
+            return result
+
+        result[period - 1:] = TechnicalIndicators._window_sums(closes, period) / period
+        return result
+
+    @staticmethod
+    def calculate_ema_series(closes: np.ndarray, period: int) -> np.ndarray:
+        """Exponential Moving Average for every bar, seeded with the first SMA
+
+        The recursion ema[t] = k * price[t] + (1 - k) * ema[t - 1] is a
+        first-order IIR filter. It is solved in closed form with a scaled
+        cumulative sum, blockwise so the scale factors never overflow.
+        """
+        closes = np.asarray(closes, dtype=np.float64)
+        result = np.full(closes.shape, np.nan)
+        if len(closes) < period:
+            return result
+
+        offset = closes[0]
+        values = closes - offset
+        k = 2 / (period + 1)
+        decay = 1 - k
+
+        ema = values[:period].mean()
+        result[period - 1] = ema
+        if decay == 0:
+            result[period:] = values[period:]
+            return result + offset
+
+        # Longest block for which decay ** -block stays below 1e100
+        block = max(1, int(100 / -np.log10(decay)))
+        powers = decay ** np.arange(block + 1)
+        inverse_powers = 1 / powers
+
+        start = period
+        while start < len(values):
+            chunk = values[start:start + block]
+            n = len(chunk)
+            scaled = np.cumsum(chunk * inverse_powers[:n])
+            block_ema = powers[1:n + 1] * ema + k * powers[:n] * scaled
+            result[start:start + n] = block_ema
+            ema = block_ema[-1]
+            start += n
+
+        return result + offset
+
+    @staticmethod
+    def calculate_rsi_series(closes: np.ndarray, period: int = 14) -> np.ndarray:
+        """Relative Strength Index for every bar"""
+        closes = np.asarray(closes, dtype=np.float64)
+        result = np.full(closes.shape, np.nan)
+        if len(closes) < period + 1:
+            return result
+
+        changes = np.diff(closes)
+        gains = np.where(changes > 0, changes, 0.0)
+        losses = np.where(changes < 0, -changes, 0.0)
+
+        avg_gain = TechnicalIndicators._window_sums(gains, period) / period
+        avg_loss = TechnicalIndicators._window_sums(losses, period) / period
+        # Count losing bars exactly so a window without losses is always RSI 100
+        loss_counts = np.concatenate(([0], np.cumsum(losses > 0)))
+        has_loss = (loss_counts[period:] - loss_counts[:-period]) > 0
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+        result[period:] = np.where(has_loss & (avg_loss > 0), rsi, 100.0)
+        return result
+
+    @staticmethod
+    def calculate_bollinger_bands_series(closes: np.ndarray, period: int = 20,
+                                         std_dev: float = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Bollinger Bands for every bar as (upper, middle, lower) arrays"""
+        closes = np.asarray(closes, dtype=np.float64)
+        middle = TechnicalIndicators.calculate_sma_series(closes, period)
+        std = np.full(closes.shape, np.nan)
+        if len(closes) < period:
+            return middle.copy(), middle, middle.copy()
+
+        # Two-pass std over strided window views, processed in blocks
+        windows = np.lib.stride_tricks.sliding_window_view(closes, period)
+        block = TechnicalIndicators.STD_BLOCK_ROWS
+        for start in range(0, len(windows), block):
+            std[period - 1 + start:period - 1 + start + block] = windows[start:start + block].std(axis=1)
+
+        return middle + (std_dev * std), middle, middle - (std_dev * std)
+
+    @staticmethod
+    def calculate_indicator_frame(closes: np.ndarray, config: 'TradingConfig',
+                                  rsi_period: int = 10, bb_period: int = 15,
+                                  bb_std_dev: float = 1.5) -> pd.DataFrame:
+        """All indicators used by TradingBot.analyze_market as a DataFrame"""
+        closes = np.asarray(closes, dtype=np.float64)
+        upper_bb, middle_bb, lower_bb = TechnicalIndicators.calculate_bollinger_bands_series(
+            closes, bb_period, bb_std_dev)
+        return pd.DataFrame({
+            'price': closes,
+            'sma_short': TechnicalIndicators.calculate_sma_series(closes, config.sma_short_period),
+            'sma_long': TechnicalIndicators.calculate_sma_series(closes, config.sma_long_period),
+            'rsi': TechnicalIndicators.calculate_rsi_series(closes, rsi_period),
+            'bollinger_upper': upper_bb,
+            'bollinger_middle': middle_bb,
+            'bollinger_lower': lower_bb
+        })
+
+class RollingSMA:
+    """Simple Moving Average maintained with a running window sum"""
+
+    # Re-sum the window periodically so floating point drift cannot accumulate
+    RESYNC_INTERVAL = 1024
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.updates = 0
+
+    def update(self, price: float) -> Optional[float]:
+        """Add a price and return the current SMA"""
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(price)
+        self.total += price
+
+        self.updates += 1
+        if self.updates % self.RESYNC_INTERVAL == 0:
+            self.total = sum(self.window)
+
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self.window) < self.period:
+            return None
+        return self.total / self.period
+
+class RollingEMA:
+    """Exponential Moving Average seeded with the SMA of the first period prices"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.k = 2 / (period + 1)
+        self.seed = []
+        self.ema = None
+
+    def update(self, price: float) -> Optional[float]:
+        """Add a price and return the current EMA"""
+        if self.ema is None:
+            self.seed.append(price)
+            if len(self.seed) == self.period:
+                self.ema = sum(self.seed) / self.period
+                self.seed = []
+        else:
+            self.ema = (price * self.k) + (self.ema * (1 - self.k))
+        return self.ema
+
+    @property
+    def value(self) -> Optional[float]:
+        return self.ema
+
+class RollingRSI:
+    """Relative Strength Index over rolling sums of the last period gains and losses
+
+    Matches TechnicalIndicators.calculate_rsi, which averages the last
+    `period` price changes rather than applying Wilder smoothing.
+    """
+
+    RESYNC_INTERVAL = 1024
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.gains = deque(maxlen=period)
+        self.losses = deque(maxlen=period)
+        self.gain_total = 0.0
+        self.loss_total = 0.0
+        self.loss_count = 0  # Number of non-zero losses in the window
+        self.last_price = None
+        self.updates = 0
+
+    def update(self, price: float) -> Optional[float]:
+        """Add a price and return the current RSI"""
+        if self.last_price is not None:
+            change = price - self.last_price
+            gain = change if change > 0 else 0
+            loss = -change if change < 0 else 0
+
+            if len(self.gains) == self.period:
+                self.gain_total -= self.gains[0]
+                self.loss_total -= self.losses[0]
+                if self.losses[0]:
+                    self.loss_count -= 1
+            self.gains.append(gain)
+            self.losses.append(loss)
+            self.gain_total += gain
+            self.loss_total += loss
+            if loss:
+                self.loss_count += 1
+
+            self.updates += 1
+            if self.updates % self.RESYNC_INTERVAL == 0:
+                self.gain_total = sum(self.gains)
+                self.loss_total = sum(self.losses)
+
+        self.last_price = price
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self.gains) < self.period:
+            return None
+
+        avg_gain = self.gain_total / self.period
+        avg_loss = self.loss_total / self.period
+
+        # Rolling subtraction can leave a tiny residue instead of an exact zero
+        if self.loss_count == 0 or avg_loss <= 0:
+            return 100
+
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+class RollingBollingerBands:
+    """Bollinger Bands using a sliding-window Welford mean and variance"""
+
+    RESYNC_INTERVAL = 1024
+
+    def __init__(self, period: int = 20, std_dev: float = 2):
+        self.period = period
+        self.std_dev = std_dev
+        self.window = deque(maxlen=period)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.updates = 0
+
+    def update(self, price: float) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """Add a price and return (upper, middle, lower)"""
+        if len(self.window) < self.period:
+            # Growing phase: standard Welford update
+            self.window.append(price)
+            delta = price - self.mean
+            self.mean += delta / len(self.window)
+            self.m2 += delta * (price - self.mean)
+        else:
+            # Sliding phase: replace the oldest price in a single step
+            old_price = self.window[0]
+            self.window.append(price)
+            old_mean = self.mean
+            self.mean += (price - old_price) / self.period
+            self.m2 += (price - old_price) * (price - self.mean + old_price - old_mean)
+
+        self.updates += 1
+        if self.updates % self.RESYNC_INTERVAL == 0:
+            self.mean = sum(self.window) / len(self.window)
+            self.m2 = sum((p - self.mean) ** 2 for p in self.window)
+
+        return self.value
+
+    @property
+    def value(self) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        if len(self.window) < self.period:
+            return None, None, None
+
+        std = max(self.m2 / self.period, 0.0) ** 0.5
+        return self.mean + (self.std_dev * std), self.mean, self.mean - (self.std_dev * std)
+
+class StreamingIndicators:
+    """Constant-time-per-tick indicator engine used by TradingBot.analyze_market
+
+    Produces the same values as the TechnicalIndicators batch functions
+    applied to the full price stream, without rescanning the history.
+    """
+
+    def __init__(self, config: TradingConfig, rsi_period: int = 10,
+                 bb_period: int = 15, bb_std_dev: float = 1.5):
+        self.sma_short = RollingSMA(config.sma_short_period)
+        self.sma_long = RollingSMA(config.sma_long_period)
+        self.rsi = RollingRSI(rsi_period)
+        self.bollinger = RollingBollingerBands(bb_period, bb_std_dev)
+        self.count = 0
+        self.last_price = None
+
+    def update(self, price: float):
+        """Feed a new price into every indicator"""
+        self.sma_short.update(price)
+        self.sma_long.update(price)
+        self.rsi.update(price)
+        self.bollinger.update(price)
+        self.count += 1
+        self.last_price = price
+
+    def snapshot(self) -> Dict:
+        """Current indicator values in the shape returned by analyze_market"""
+        upper_bb, middle_bb, lower_bb = self.bollinger.value
+        return {
+            'price': self.last_price,
+            'sma_short': self.sma_short.value,
+            'sma_long': self.sma_long.value,
+            'rsi': self.rsi.value,
+            'bollinger_upper': upper_bb,
+            'bollinger_middle': middle_bb,
+            'bollinger_lower': lower_bb
+        }
+
 class RiskManager:
     """Risk management for trading operations"""
 
-    def __init__(self, config: TradingConfig):
+    def __init__(self, config: TradingConfig, clock: Callable[[], datetime] = datetime.now):
         self.config = config
+        self.clock = clock
         self.daily_trades = 0
         self.daily_pnl = 0.0
-        self.last_reset_date = datetime.now().date()
+        self.last_reset_date = self.clock().date()
 
     def reset_daily_counters(self):
         """Reset daily counters at start of new day"""
-        today = datetime.now().date()
+        today = self.clock().date()
         if today != self.last_reset_date:
             self.daily_trades = 0
             self.daily_pnl = 0.0
@@ -164,26 +549,59 @@ class RiskManager:
 class CoinbaseClient:
     """Coinbase API client wrapper with error handling"""
 
-    def __init__(self, api_key: str, api_secret: str):
-        self.client = RESTClient(api_key=api_key, api_secret=api_secret)
-        self.last_request_time = 0
-        self.min_request_interval = 0.1  # Rate limiting
-
-    def _rate_limit(self):
-        """Simple rate limiting"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            time.sleep(self.min_request_interval - time_since_last)
-        self.last_request_time = time.time()
-
-    def get_account_balance(self) -> Dict:
-        """Get account balances with error handling"""
+    def __init__(self, api_key: str, api_secret: str, rate_limiter: Optional[RateLimiter] = None,
+                 rest_client=None):
+        # Any object with RESTClient's methods works here, e.g. a PaperExchange
+        self.client = rest_client or RESTClient(api_key=api_key, api_secret=api_secret)
+        # Shared by default: Coinbase counts requests per key, not per client object
+        self.rate_limiter = rate_limiter or coinbase_rate_limiter
+        # Balances only move on fills, so reads are served from memory between orders
+        self.balances = BalanceCache(self._fetch_account_balance)
+        # Shared by default so ids stay unique and deduped across every client in the process
+        self.order_ids = client_order_ids
+        self._increments = {}
+
+    def _rate_limit(self, budget: str = 'private'):
+        """Wait for a token from the given endpoint budget
+
+        Every method here hits an authenticated /brokerage endpoint, so they
+        all draw from 'private'; 'public' covers the unauthenticated /market
+        endpoints.
+        """
+        with RATE_LIMIT_WAIT_SECONDS.time(budget=budget), tracer.span('rate_limit', budget=budget):
+            self.rate_limiter.acquire(budget)
+
+    @contextmanager
+    def _instrumented(self, call: str):
+        """Record latency, and errors, of one REST call"""
+        with EXCHANGE_CALL_SECONDS.time(call=call), tracer.span(call):
+            try:
+                yield
+            except Exception:
+                EXCHANGE_CALL_ERRORS.inc(call=call)
+                raise
+
+    def _check_rate_limited(self, error: Exception, budget: str = 'private'):
+        """Back off the budget when the exchange answered 429"""
+        response = getattr(error, 'response', None)
+        if response is not None and getattr(response, 'status_code', None) == 429:
+            retry_after = response.headers.get('Retry-After', '')
+            self.rate_limiter.on_rate_limited(budget, float(retry_after) if retry_after.isdigit() else None)
+            logger.warning(f"Rate limited on {budget} endpoints, slowing down")
+
+    def get_account_balance(self, max_age: Optional[float] = None) -> Dict:
+        """Get account balances, cached until the next order or the cache TTL"""
+        return self.balances.get(max_age)
+
+    def _fetch_account_balance(self) -> Dict:
+        """Fetch account balances from the exchange with error handling"""
         self._rate_limit()
         try:
-            accounts = self.client.get_accounts()
+            with self._instrumented('get_accounts'):
+                accounts = self.client.get_accounts()
             return accounts
         except Exception as e:
+            self._check_rate_limited(e)
             logger.error(f"Error getting account balance: {e}")
             return None
 
@@ -191,89 +609,282 @@ class CoinbaseClient:
         """Get current ticker price"""
         self._rate_limit()
         try:
-            ticker = self.client.get_product(product_id)
+            with self._instrumented('get_product'):
+                ticker = self.client.get_product(product_id)
             # Convert to dict if it's an object
             if hasattr(ticker, '__dict__'):
                 return ticker.__dict__
             return ticker
         except Exception as e:
+            self._check_rate_limited(e)
             logger.error(f"Error getting ticker for {product_id}: {e}")
             return None
 
+    def get_best_bid_ask(self, product_ids: List[str]) -> Dict[str, Dict]:
+        """Bid, ask and mid price for many products in a single request"""
+        self._rate_limit()
+        try:
+            with self._instrumented('get_best_bid_ask'):
+                response = self.client.get_best_bid_ask(product_ids=product_ids)
+            pricebooks = response.get('pricebooks', []) if isinstance(response, dict) else getattr(response, 'pricebooks', [])
+
+            quotes = {}
+            for book in pricebooks or []:
+                book = book if isinstance(book, dict) else book.__dict__
+                bids, asks = book.get('bids') or [], book.get('asks') or []
+                if not bids or not asks:
+                    continue
+                bid = float(bids[0]['price'] if isinstance(bids[0], dict) else bids[0].price)
+                ask = float(asks[0]['price'] if isinstance(asks[0], dict) else asks[0].price)
+                quotes[book['product_id']] = {'bid': bid, 'ask': ask, 'price': (bid + ask) / 2}
+            return quotes
+        except Exception as e:
+            self._check_rate_limited(e)
+            logger.error(f"Error getting best bid/ask for {len(product_ids)} products: {e}")
+            return None
+
+    def get_orders(self, order_ids: List[str]) -> List[Dict]:
+        """Current state of many orders in a single request"""
+        self._rate_limit()
+        try:
+            with self._instrumented('list_orders'):
+                response = self.client.list_orders(order_ids=order_ids)
+            return response.get('orders', []) if isinstance(response, dict) else getattr(response, 'orders', [])
+        except Exception as e:
+            self._check_rate_limited(e)
+            logger.error(f"Error getting status of {len(order_ids)} orders: {e}")
+            return None
+
+    def list_open_orders(self, product_id: str) -> List[Dict]:
+        """Orders still open on the exchange for a product"""
+        self._rate_limit()
+        try:
+            with self._instrumented('list_orders'):
+                response = self.client.list_orders(product_ids=[product_id], order_status=['OPEN'])
+            return response.get('orders', []) if isinstance(response, dict) else getattr(response, 'orders', [])
+        except Exception as e:
+            self._check_rate_limited(e)
+            logger.error(f"Error listing open orders for {product_id}: {e}")
+            return None
+
+    def list_recent_orders(self, product_id: str, since: float) -> List[Dict]:
+        """Orders created for a product since an epoch time, e.g. to find one whose placement response was lost"""
+        self._rate_limit()
+        try:
+            with self._instrumented('list_orders'):
+                response = self.client.list_orders(
+                    product_ids=[product_id],
+                    start_date=datetime.fromtimestamp(since, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+                )
+            return response.get('orders', []) if isinstance(response, dict) else getattr(response, 'orders', [])
+        except Exception as e:
+            self._check_rate_limited(e)
+            logger.error(f"Error listing recent orders for {product_id}: {e}")
+            return None
+
     def get_product_candles(self, product_id: str, granularity: int, start: str, end: str) -> List:
         """Get historical candle data"""
         self._rate_limit()
         try:
-            candles = self.client.get_candles(
-                product_id=product_id,
-                start=start,
-                end=end,
-                granularity=granularity
-            )
+            with self._instrumented('get_candles'):
+                candles = self.client.get_candles(
+                    product_id=product_id,
+                    start=start,
+                    end=end,
+                    granularity=granularity
+                )
             return candles
         except Exception as e:
+            self._check_rate_limited(e)
             logger.error(f"Error getting candles for {product_id}: {e}")
             return None
 
-    def place_market_order(self, product_id: str, side: str, size: str) -> Dict:
+    def _claim_order_id(self, client_order_id: str) -> Optional[Dict]:
+        """None if the id may be submitted, else a failed response refusing it
+
+        Only ids the exchange already answered are refused; an id whose
+        placement got no answer is resent as is.
+        """
+        if self.order_ids.claim(client_order_id):
+            return None
+        logger.error(f"Refusing to resubmit client_order_id {client_order_id}")
+        return {'success': False, 'failure_reason': 'DUPLICATE_CLIENT_ORDER_ID',
+                'error_response': {'message': f'client_order_id {client_order_id} was already submitted'}}
+
+    def place_market_order(self, product_id: str, side: str, size: str,
+                           client_order_id: Optional[str] = None) -> Dict:
         """Place a market order"""
+        client_order_id = client_order_id or self.order_ids.next()
+        refused = self._claim_order_id(client_order_id)
+        if refused:
+            return refused
         self._rate_limit()
         try:
-            if side.lower() == 'buy':
-                order = self.client.market_order_buy(
-                    client_order_id=f"bot_{int(time.time())}",
-                    product_id=product_id,
-                    quote_size=size
-                )
-            else:
-                order = self.client.market_order_sell(
-                    client_order_id=f"bot_{int(time.time())}",
-                    product_id=product_id,
-                    base_size=size
-                )
-
-            logger.info(f"Order placed: {side} {size} {product_id}")
+            with self._instrumented(f'market_order_{side.lower()}'):
+                if side.lower() == 'buy':
+                    order = self.client.market_order_buy(
+                        client_order_id=client_order_id,
+                        product_id=product_id,
+                        quote_size=size
+                    )
+                else:
+                    order = self.client.market_order_sell(
+                        client_order_id=client_order_id,
+                        product_id=product_id,
+                        base_size=size
+                    )
+
+            self.order_ids.answered(client_order_id)
+            logger.info("Order placed: %s %s %s", side, size, product_id,
+                        extra={'product': product_id, 'side': side, 'size': size})
+            self.balances.invalidate()
             return order
         except Exception as e:
+            self._check_rate_limited(e)
             logger.error(f"Error placing {side} order: {e}")
-            return None
+            rejection = order_rejection(e)
+            if rejection:
+                self.order_ids.answered(client_order_id)
+            return rejection
 
-    def place_limit_order(self, product_id: str, side: str, size: str, price: str) -> Dict:
+    def place_limit_order(self, product_id: str, side: str, size: str, price: str,
+                          client_order_id: Optional[str] = None) -> Dict:
         """Place a limit order"""
+        client_order_id = client_order_id or self.order_ids.next()
+        refused = self._claim_order_id(client_order_id)
+        if refused:
+            return refused
         self._rate_limit()
         try:
-            if side.lower() == 'buy':
-                order = self.client.limit_order_buy(
-                    client_order_id=f"bot_{int(time.time())}",
-                    product_id=product_id,
-                    base_size=size,
-                    limit_price=price
-                )
-            else:
-                order = self.client.limit_order_sell(
-                    client_order_id=f"bot_{int(time.time())}",
+            with self._instrumented(f'limit_order_{side.lower()}'):
+                if side.lower() == 'buy':
+                    order = self.client.limit_order_gtc_buy(
+                        client_order_id=client_order_id,
+                        product_id=product_id,
+                        base_size=size,
+                        limit_price=price
+                    )
+                else:
+                    order = self.client.limit_order_gtc_sell(
+                        client_order_id=client_order_id,
+                        product_id=product_id,
+                        base_size=size,
+                        limit_price=price
+                    )
+
+            self.order_ids.answered(client_order_id)
+            logger.info("Limit order placed: %s %s %s at %s", side, size, product_id, price,
+                        extra={'product': product_id, 'side': side, 'size': size, 'limit_price': price})
+            self.balances.invalidate()
+            return order
+        except Exception as e:
+            self._check_rate_limited(e)
+            logger.error(f"Error placing limit {side} order: {e}")
+            rejection = order_rejection(e)
+            if rejection:
+                self.order_ids.answered(client_order_id)
+            return rejection
+
+    def place_bracket_order(self, product_id: str, size: str, limit_price: str, stop_trigger_price: str,
+                            client_order_id: Optional[str] = None) -> Dict:
+        """Place an exchange-resident take-profit/stop-loss exit for a long position
+
+        One GTC sell order rests at limit_price; if the price falls to
+        stop_trigger_price first, the exchange turns it into a stop exit.
+        Either leg filling ends the other, like an OCO pair.
+        """
+        client_order_id = client_order_id or self.order_ids.next()
+        refused = self._claim_order_id(client_order_id)
+        if refused:
+            return refused
+        self._rate_limit()
+        try:
+            with self._instrumented('bracket_order_sell'):
+                order = self.client.trigger_bracket_order_gtc_sell(
+                    client_order_id=client_order_id,
                     product_id=product_id,
                     base_size=size,
-                    limit_price=price
+                    limit_price=limit_price,
+                    stop_trigger_price=stop_trigger_price
                 )
 
-            logger.info(f"Limit order placed: {side} {size} {product_id} at {price}")
+            self.order_ids.answered(client_order_id)
+            logger.info("Bracket order placed: sell %s %s, take profit %s, stop %s", size, product_id,
+                        limit_price, stop_trigger_price,
+                        extra={'product': product_id, 'side': 'sell', 'size': size, 'limit_price': limit_price,
+                               'stop_price': stop_trigger_price})
+            self.balances.invalidate()
             return order
         except Exception as e:
-            logger.error(f"Error placing limit {side} order: {e}")
+            self._check_rate_limited(e)
+            logger.error(f"Error placing bracket order for {product_id}: {e}")
+            rejection = order_rejection(e)
+            if rejection:
+                self.order_ids.answered(client_order_id)
+            return rejection
+
+    def cancel_orders(self, order_ids: List[str]) -> List[Dict]:
+        """Cancel open orders; returns the per-order results"""
+        self._rate_limit()
+        try:
+            with self._instrumented('cancel_orders'):
+                response = self.client.cancel_orders(order_ids=order_ids)
+            self.balances.invalidate()
+            return response.get('results', []) if isinstance(response, dict) else getattr(response, 'results', [])
+        except Exception as e:
+            self._check_rate_limited(e)
+            logger.error(f"Error cancelling {len(order_ids)} orders: {e}")
             return None
 
+    def get_increments(self, product_id: str) -> Tuple[str, str]:
+        """(base_increment, quote_increment) for a product, fetched once"""
+        increments = self._increments.get(product_id)
+        if increments is None:
+            product = self.get_product_ticker(product_id) or {}
+            increments = (product.get('base_increment') or '0.00000001', product.get('quote_increment') or '0.01')
+            if product:
+                self._increments[product_id] = increments
+        return increments
+
+
 class TradingBot:
     """Main trading bot class"""
 
-    def __init__(self, config: TradingConfig):
+    def __init__(self, config: TradingConfig, client: Optional[CoinbaseClient] = None,
+                 clock: Callable[[], datetime] = datetime.now,
+                 market_hub: Optional[MarketDataHub] = None, journal: Optional[TradeJournal] = None,
+                 order_manager: Optional[OrderManager] = None):
         self.config = config
-        self.client = CoinbaseClient(config.api_key, config.api_secret)
-        self.risk_manager = RiskManager(config)
+        # A simulated client and clock can be injected for offline runs
+        self.client = client or CoinbaseClient(config.api_key, config.api_secret)
+        # Orders are placed off the tick loop; positions are booked from their fills
+        self.orders = order_manager or OrderManager(self.client)
+        self._owns_orders = order_manager is None
+        self.pending_order = None
+        # Fills are booked, and brackets placed, as soon as the order manager sees them
+        self._settle_lock = RLock()
+        self._unsubscribe_orders = self.orders.subscribe(self._on_order_done)
+        # Exchange-resident take-profit/stop exit for the open position, when protective orders are on
+        self.protective_order = None
+        self.clock = clock
+        # Streaming prices replace ticker polling while the feed is fresh
+        self.market_hub = market_hub
+        # Decisions and trades survive restarts in the SQLite journal
+        self.journal = journal or (TradeJournal(config.journal_path) if config.journal_path else None)
+        self.risk_manager = RiskManager(config, clock)
         self.running = False
-        self.price_history = []
+        # A signal handler and main()'s finally can both call stop(); only the first shuts down
+        self._stopped = False
+        self._stop_lock = RLock()
+        # Keep only last 50 prices for calculations
+        self.price_history = PriceRingBuffer(50)
+        self.indicators = StreamingIndicators(config)
         self.current_position = None
+        # Exit levels of the open position, checked per price without comparing every level
+        self.triggers = TriggerIndex()
+        self.position_triggers = None
         self.product_id = f"{config.base_currency}-{config.quote_currency}"
+        self._tick_seconds = TICK_SECONDS.labels(product=self.product_id)
 
         # Performance tracking
         self.trades_executed = []
@@ -284,9 +895,12 @@ class TradingBot:
 
     def bootstrap_price_history(self):
         """Fetch historical data to initialize price history"""
+        if self.config.candle_store_dir and self.bootstrap_from_candle_store():
+            return
+
         try:
             # Get last 30 minutes of 1-minute candles
-            end_time = datetime.now()
+            end_time = self.clock()
             start_time = end_time - timedelta(minutes=30)
             
             candles = self.client.get_product_candles(
@@ -318,7 +932,7 @@ class TradingBot:
                             continue
                             
                         if price > 0:
-                            self.price_history.append(price)
+                            self.record_price(price)
                             price_count += 1
                             if price_count >= 20:  # Get 20 prices max
                                 break
@@ -335,8 +949,46 @@ class TradingBot:
         except Exception as e:
             logger.warning(f"Failed to bootstrap price history: {e}")
 
+    def bootstrap_from_candle_store(self, lookback_minutes: int = 60) -> bool:
+        """Warm start from the local candle store, fetching only the missing tail"""
+        try:
+            store = CandleStore(self.config.candle_store_dir)
+            end = int(self.clock().timestamp())
+            start = end - lookback_minutes * 60
+
+            store.sync(self.product_id, 'ONE_MINUTE', self.client.get_product_candles, start, end)
+            candles = store.read(self.product_id, 'ONE_MINUTE', start=start)
+
+            for candle_time, price in zip(candles['time'][-50:].tolist(), candles['close'][-50:].tolist()):
+                if price > 0:
+                    self.record_price(price, candle_time * 1_000_000_000)
+
+            if self.price_history:
+                logger.info(f"Bootstrapped with {len(self.price_history)} prices from candle store")
+                return True
+        except Exception as e:
+            logger.warning(f"Failed to bootstrap from candle store: {e}")
+        return False
+
+    def record_price(self, price: float, timestamp_ns: Optional[int] = None):
+        """Append a price to the history and update the streaming indicators"""
+        self.price_history.append(price, timestamp_ns)
+        started = time.perf_counter()
+        self.indicators.update(price)
+        INDICATOR_UPDATE_SECONDS.observe(time.perf_counter() - started)
+
     def get_market_data(self) -> Optional[Dict]:
         """Fetch current market data and update price history"""
+        if self.market_hub:
+            ticker = self.market_hub.ticker(self.product_id, max_age=self.config.check_interval)
+            if ticker:
+                now = self.clock()
+                self.record_price(ticker['price'], int(now.timestamp() * 1_000_000_000))
+                return {
+                    'price': ticker['price'],
+                    'timestamp': now
+                }
+
         ticker = self.client.get_product_ticker(self.product_id)
         if not ticker:
             return None
@@ -356,17 +1008,15 @@ class TradingBot:
                     current_price = float(ticker.bid)
             
             if current_price > 0:
-                self.price_history.append(current_price)
-                # Keep only last 50 prices for calculations
-                if len(self.price_history) > 50:
-                    self.price_history = self.price_history[-50:]
+                now = self.clock()
+                self.record_price(current_price, int(now.timestamp() * 1_000_000_000))
 
                 return {
                     'price': current_price,
-                    'timestamp': datetime.now()
+                    'timestamp': now
                 }
             else:
-                logger.warning(f"No valid price found in ticker response: {ticker}")
+                logger.warning("No valid price found in ticker response: %r", ticker)
         except (ValueError, TypeError) as e:
             logger.error(f"Error processing price data: {e}")
 
@@ -377,13 +1027,16 @@ class TradingBot:
         if len(self.price_history) < max(self.config.sma_long_period, 10):
             return {'signal': 'HOLD', 'reason': 'Insufficient data'}
 
-        current_price = self.price_history[-1]
-
-        # Calculate technical indicators
-        sma_short = TechnicalIndicators.calculate_sma(self.price_history, self.config.sma_short_period)
-        sma_long = TechnicalIndicators.calculate_sma(self.price_history, self.config.sma_long_period)
-        rsi = TechnicalIndicators.calculate_rsi(self.price_history, 10)
-        upper_bb, middle_bb, lower_bb = TechnicalIndicators.calculate_bollinger_bands(self.price_history, 15, 1.5)
+        analysis_started = time.perf_counter()
+        # Technical indicators are maintained incrementally as prices arrive
+        indicators = self.indicators.snapshot()
+        current_price = indicators['price']
+        sma_short = indicators['sma_short']
+        sma_long = indicators['sma_long']
+        rsi = indicators['rsi']
+        upper_bb = indicators['bollinger_upper']
+        middle_bb = indicators['bollinger_middle']
+        lower_bb = indicators['bollinger_lower']
 
         signals = []
 
@@ -422,29 +1075,21 @@ class TradingBot:
             signal = 'HOLD'
             reason = f"Mixed signals - Buy: {buy_signals}, Sell: {sell_signals}"
 
+        INDICATOR_ANALYZE_SECONDS.observe(time.perf_counter() - analysis_started)
         return {
             'signal': signal,
             'reason': reason,
-            'indicators': {
-                'price': current_price,
-                'sma_short': sma_short,
-                'sma_long': sma_long,
-                'rsi': rsi,
-                'bollinger_upper': upper_bb,
-                'bollinger_middle': middle_bb,
-                'bollinger_lower': lower_bb
-            }
+            'indicators': indicators
         }
 
     def execute_trade(self, signal: str, market_data: Dict):
-        """Execute trade based on signal"""
-        if signal == 'HOLD':
+        """Submit an order for the signal; returns it, or None when nothing was placed"""
+        if signal == 'HOLD' or self.pending_order:
             return
 
-        current_price = market_data['price']
-
         # Get current portfolio value
-        accounts = self.client.get_account_balance()
+        with tracer.span('get_account_balance'):
+            accounts = self.client.get_account_balance()
         if not accounts:
             logger.error("Could not retrieve account balance")
             return
@@ -465,35 +1110,7 @@ class TradingBot:
             return
 
         if signal == 'BUY' and not self.current_position:
-            # Calculate position size
-            position_size = self.risk_manager.calculate_position_size(current_price, portfolio_value)
-
-            # Place buy order
-            order = self.client.place_market_order(
-                self.product_id, 
-                'buy', 
-                str(self.config.trade_amount_usd)
-            )
-
-            if order:
-                self.current_position = {
-                    'side': 'long',
-                    'entry_price': current_price,
-                    'size': position_size,
-                    'timestamp': datetime.now(),
-                    'stop_loss': current_price * (1 - self.config.stop_loss_percentage / 100),
-                    'take_profit': current_price * (1 + self.config.take_profit_percentage / 100)
-                }
-
-                self.risk_manager.daily_trades += 1
-                self.trades_executed.append({
-                    'type': 'BUY',
-                    'price': current_price,
-                    'size': position_size,
-                    'timestamp': datetime.now()
-                })
-
-                logger.info(f"Opened long position at {current_price}")
+            return self.submit_order('buy', str(self.config.trade_amount_usd), 'Signal')
 
         elif signal == 'SELL':
             if not self.current_position:
@@ -502,89 +1119,307 @@ class TradingBot:
             elif self.current_position['side'] != 'long':
                 logger.info("SELL signal received but not in long position")
                 return
-            # Only sell if we actually have a position
             # Close long position
-            order = self.client.place_market_order(
-                self.product_id, 
-                'sell', 
-                str(self.current_position['size'])
-            )
-
-            if order:
-                # Calculate P&L
-                pnl = (current_price - self.current_position['entry_price']) * self.current_position['size']
-                self.total_pnl += pnl
-                self.risk_manager.daily_pnl += pnl
+            return self.close_position('Signal')
+
+    def submit_order(self, side: str, size: str, reason: str) -> ManagedOrder:
+        """Hand a market order to the order manager; the position changes once it fills"""
+        with self._settle_lock:
+            with tracer.span('submit_order', side=side):
+                order = self.orders.submit(self.product_id, side, size, tag=reason)
+            self.pending_order = order
+            # Synchronous order managers (backtests) have already filled it
+            self.settle_orders()
+            return order
 
-                self.trades_executed.append({
-                    'type': 'SELL',
-                    'price': current_price,
-                    'size': self.current_position['size'],
-                    'timestamp': datetime.now(),
-                    'pnl': pnl
-                })
+    def close_position(self, reason: str) -> Optional[ManagedOrder]:
+        """Sell the open position at market, first pulling any exchange-side exit that holds it"""
+        with self._settle_lock:
+            protective = self.protective_order
+            if protective is not None:
+                # Detached first, so the cancel's notification does not book it and re-arm a new bracket
+                self.protective_order = None
+                if not self.orders.cancel(protective):
+                    logger.warning(f"Could not cancel protective order {protective.order_id}; leaving the exit to it")
+                    self.protective_order = protective
+                    return None
+                # It may have filled, in part or in full, before the cancel landed
+                self._book_protective_exit(protective)
+                if not self.current_position:
+                    return None
+            return self.submit_order('sell', str(self.current_position['size']), reason)
+
+    def _on_order_done(self, order: ManagedOrder):
+        # Runs on the order manager's threads as soon as an order is final
+        if order is self.pending_order or order is self.protective_order:
+            self.settle_orders()
+
+    def settle_orders(self):
+        """Book pending and protective orders that reached a final status, then re-arm protection"""
+        with self._settle_lock:
+            order = self.pending_order
+            if order is not None and order.done:
+                self.pending_order = None
+                self._book_fill(order)
+
+            protective = self.protective_order
+            if protective is not None and protective.done:
+                self.protective_order = None
+                self._book_protective_exit(protective)
+
+            # A trigger that fired without closing the whole position (rejected or partial exit) is watched again
+            triggers = self.position_triggers
+            if triggers is not None and triggers.fired and self.current_position and not self.pending_order:
+                self.triggers.add(triggers)
+            self._arm_protection()
+
+    def reconcile_open_orders(self):
+        """Adopt or cancel bracket exits that a previous run left resting on the exchange"""
+        for snapshot in self.client.list_open_orders(self.product_id) or []:
+            if 'trigger_bracket_gtc' not in (snapshot.get('order_configuration') or {}):
+                continue
+            with self._settle_lock:
+                if self.config.protective_orders and not self.current_position and not self.protective_order:
+                    self._adopt_bracket(snapshot)
+                    continue
+            # It holds base currency this run knows nothing about
+            logger.warning(f"Cancelling bracket order {snapshot.get('order_id')} left from a previous run")
+            self.client.cancel_orders([snapshot.get('order_id')])
+
+    def _adopt_bracket(self, snapshot: Dict):
+        """Rebuild the position a resting bracket protects and track the bracket as its exit"""
+        order = self.orders.adopt(snapshot, tag='Protective')
+        size = float(order.size) - order.filled_size
+        stop_loss, take_profit = float(order.stop_price), float(order.limit_price)
+        last_trade = self.journal.last_bot_trade(self.product_id) if self.journal else None
+        if last_trade and last_trade['type'] == 'BUY':
+            entry_price = last_trade['price']
+        else:
+            # No journal entry: estimate the entry from the stop the bracket was armed with
+            entry_price = stop_loss / (1 - self.config.stop_loss_percentage / 100)
+        self.current_position = {
+            'side': 'long',
+            'entry_price': entry_price,
+            'size': size,
+            'entry_fees': 0.0,
+            'order_id': order.order_id,
+            'timestamp': self.clock(),
+            'stop_loss': stop_loss,
+            'take_profit': take_profit
+        }
+        self.protective_order = order
+        self._watch_position()
+        logger.info(f"Adopted bracket {order.order_id} protecting {size:.8f} {self.product_id} "
+                    f"(stop {stop_loss:.2f}, take profit {take_profit:.2f})")
+
+    def _book_protective_exit(self, order: ManagedOrder):
+        if order.filled_size > 0 and order.average_price and self.current_position:
+            order.tag = "Stop Loss" if order.trigger_status == 'STOP_TRIGGERED' else "Take Profit"
+            self._book_fill(order)
+        elif order.status != 'CANCELLED' or order.error:
+            # Rejected, or expired on the exchange: watch the levels locally instead
+            logger.warning(f"Protective order for {self.product_id} ended {order.status}"
+                           f"{': ' + order.error if order.error else ''}; using local stop checks")
+            if self.current_position:
+                self.current_position['exchange_protection'] = False
+
+    def _arm_protection(self):
+        """Rest a bracket exit on the exchange for the open position, when protective orders are on"""
+        position = self.current_position
+        if (not self.config.protective_orders or not position or self.pending_order or self.protective_order
+                or not position.get('exchange_protection', True)):
+            return
+        base_increment, quote_increment = self.client.get_increments(self.product_id)
+        size = round_to_increment(position['size'], base_increment, ROUND_DOWN)
+        if Decimal(size) <= 0:
+            position['exchange_protection'] = False
+            return
+        self.protective_order = self.orders.submit(
+            self.product_id, 'sell', size,
+            limit_price=round_to_increment(position['take_profit'], quote_increment),
+            stop_price=round_to_increment(position['stop_loss'], quote_increment),
+            tag='Protective'
+        )
+
+    def _book_fill(self, order: ManagedOrder):
+        """Apply a final order's fills to the position and P&L"""
+        if order.filled_size <= 0 or not order.average_price:
+            logger.warning(f"{order.side.upper()} order for {self.product_id} ended {order.status} without fills"
+                           f"{': ' + order.error if order.error else ''}")
+            return
 
-                logger.info(f"Closed long position at {current_price}, P&L: {pnl:.2f}")
-                self.current_position = None
+        price, size = order.average_price, order.filled_size
+        if order.side == 'buy':
+            self.current_position = {
+                'side': 'long',
+                'entry_price': price,
+                'size': size,
+                'entry_fees': order.fees,
+                'order_id': order.order_id,
+                'timestamp': self.clock(),
+                'stop_loss': price * (1 - self.config.stop_loss_percentage / 100),
+                'take_profit': price * (1 + self.config.take_profit_percentage / 100)
+            }
+            self.risk_manager.daily_trades += 1
+            self.record_trade({
+                'type': 'BUY',
+                'price': price,
+                'size': size,
+                'fees': order.fees,
+                'order_id': order.order_id,
+                'timestamp': self.clock()
+            })
+            logger.info(f"Opened long position: {size:.8f} at {price:.2f}, fees {order.fees:.2f}")
+            self._watch_position()
+            return
 
-    def check_stop_loss_take_profit(self, current_price: float):
-        """Check and execute stop loss or take profit"""
-        if not self.current_position:
+        position = self.current_position
+        if position is None:
+            logger.warning(f"Sell order {order.order_id} filled with no position on record")
             return
+        # A partial exit closes that share of the position, and of its entry fees
+        size = min(size, position['size'])
+        entry_fees = position['entry_fees'] * size / position['size']
+        pnl = (price - position['entry_price']) * size - entry_fees - order.fees
+        self.total_pnl += pnl
+        self.risk_manager.daily_pnl += pnl
+        self.record_trade({
+            'type': 'SELL',
+            'price': price,
+            'size': size,
+            'fees': order.fees,
+            'order_id': order.order_id,
+            'reason': order.tag,
+            'timestamp': self.clock(),
+            'pnl': pnl
+        })
+        logger.info(f"{order.tag} closed {size:.8f} at {price:.2f}, P&L: {pnl:.2f}")
+
+        remaining = position['size'] - size
+        if remaining > position['size'] * 1e-6:
+            position['size'] = remaining
+            position['entry_fees'] -= entry_fees
+            logger.warning(f"Sell order {order.order_id} {order.status} with {remaining:.8f} still open")
+        else:
+            self.current_position = None
+            self.triggers.remove(self.position_triggers.key)
+            self.position_triggers = None
 
+    def _watch_position(self):
+        """Put the new position's stop, take profit, trailing stop and break-even levels in the trigger index"""
         position = self.current_position
+        entry_price = position['entry_price']
+        triggers = PositionTriggers(position['order_id'], position['stop_loss'], position['take_profit'])
+        if self.config.trailing_stop_percentage:
+            triggers.trailing_fraction = self.config.trailing_stop_percentage / 100
+            triggers.peak = entry_price
+        if self.config.break_even_percentage:
+            # Entry fees included, so a stop at this level gives back nothing but the exit fee
+            triggers.break_even_stop = entry_price + position['entry_fees'] / position['size']
+            triggers.break_even_at = triggers.break_even_stop * (1 + self.config.break_even_percentage / 100)
+        self.position_triggers = triggers
+        self.triggers.add(triggers)
+
+    def record_trade(self, trade: Dict):
+        """Keep a bot trade in memory and in the journal"""
+        self.trades_executed.append(trade)
+        if self.journal:
+            self.journal.record_bot_trade(self.product_id, trade)
 
-        if (position['side'] == 'long' and 
-            (current_price <= position['stop_loss'] or current_price >= position['take_profit'])):
+    def check_stop_loss_take_profit(self, current_price: float):
+        """Check and execute stop loss, take profit and trailing stop exits"""
+        self.settle_orders()
+        # An exchange-side bracket exits on its own; only unprotected positions are checked here
+        if not self.current_position or self.pending_order or self.protective_order:
+            return
 
-            # Execute stop loss or take profit
-            order = self.client.place_market_order(
-                self.product_id, 
-                'sell', 
-                str(position['size'])
-            )
+        for triggers in self.triggers.update(current_price):
+            self.exit_triggered(triggers, current_price)
 
-            if order:
-                pnl = (current_price - position['entry_price']) * position['size']
-                self.total_pnl += pnl
+    def exit_triggered(self, triggers: PositionTriggers, price: float) -> Optional[ManagedOrder]:
+        """Sell the position whose exit trigger fired in the trigger index"""
+        with self._settle_lock:
+            if triggers is not self.position_triggers or self.pending_order or self.protective_order:
+                return None
+            logger.info(f"{triggers.fired} triggered at {price}")
+            return self.submit_order('sell', str(self.current_position['size']), triggers.fired)
 
-                reason = "Take Profit" if current_price >= position['take_profit'] else "Stop Loss"
-                logger.info(f"{reason} executed at {current_price}, P&L: {pnl:.2f}")
+    def process_tick(self, market_data: Dict) -> Dict:
+        """Run stop checks, analysis and execution for one market data update"""
+        started = time.perf_counter()
+        current_price = market_data['price']
 
-                self.current_position = None
+        # Check stop loss/take profit
+        with tracer.span('check_stop_loss_take_profit'):
+            self.check_stop_loss_take_profit(current_price)
+
+        # Analyze market and get trading signal
+        with tracer.span('analyze_market'):
+            analysis = self.analyze_market()
+
+        # Lazy %-formatting: the message is only built on the log thread, and only if INFO is enabled
+        logger.info("Price: %.2f, Signal: %s, Reason: %s", current_price, analysis['signal'], analysis['reason'],
+                    extra={'product': self.product_id, 'price': current_price, 'signal': analysis['signal']})
+        if self.journal:
+            self.journal.record_decision(self.product_id, analysis['signal'], analysis['reason'], current_price,
+                                         analysis.get('indicators'), market_data.get('timestamp'))
+
+        # Execute trade if signal is strong enough
+        signal_at = time.perf_counter()
+        with tracer.span('execute_trade', signal=analysis['signal']):
+            order = self.execute_trade(analysis['signal'], market_data)
+        if order is not None:
+            SIGNAL_TO_ORDER_SECONDS.observe(time.perf_counter() - signal_at, side=analysis['signal'].lower())
+
+        self._tick_seconds.observe(time.perf_counter() - started)
+        return analysis
+
+    def wait_for_next_check(self):
+        """Sleep until the next analysis, checking stops on every streamed tick meanwhile"""
+        if not self.market_hub:
+            time.sleep(self.config.check_interval)
+            return
+
+        # Indicators keep their check_interval cadence; only exits react to each tick
+        deadline = time.monotonic() + self.config.check_interval
+        seen_version = self.market_hub.version
+        while self.running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            ticker = self.market_hub.wait_for_ticker(self.product_id, seen_version, timeout=remaining)
+            if ticker:
+                seen_version = ticker['version']
+                # A pending entry is booked (and its bracket placed) on the first tick after it fills
+                if self.current_position or self.pending_order:
+                    with tracer.trace('stream_exit', product=self.product_id):
+                        self.check_stop_loss_take_profit(ticker['price'])
 
     def run_trading_loop(self):
         """Main trading loop"""
         logger.info("Starting trading bot...")
         self.running = True
+        self.reconcile_open_orders()
 
         while self.running:
             try:
                 logger.debug("Starting new trading loop iteration...")
                 
-                # Get market data
-                market_data = self.get_market_data()
+                # One trace per iteration, from market data to order placement
+                with tracer.trace('tick', product=self.product_id):
+                    with tracer.span('get_market_data'):
+                        market_data = self.get_market_data()
+                    if market_data:
+                        self.process_tick(market_data)
+
                 if not market_data:
                     logger.warning("Failed to get market data, retrying...")
                     time.sleep(10)
                     continue
 
-                current_price = market_data['price']
-
-                # Check stop loss/take profit
-                self.check_stop_loss_take_profit(current_price)
-
-                # Analyze market and get trading signal
-                analysis = self.analyze_market()
-
-                logger.info(f"Price: {current_price:.2f}, Signal: {analysis['signal']}, Reason: {analysis['reason']}")
-
-                # Execute trade if signal is strong enough
-                self.execute_trade(analysis['signal'], market_data)
-
                 # Wait before next iteration
-                logger.debug(f"Sleeping for {self.config.check_interval} seconds...")
-                time.sleep(self.config.check_interval)
+                logger.debug("Sleeping for %s seconds...", self.config.check_interval)
+                self.wait_for_next_check()
 
             except KeyboardInterrupt:
                 logger.info("Received interrupt signal, stopping bot...")
@@ -597,13 +1432,26 @@ class TradingBot:
     def stop(self):
         """Stop the trading bot"""
         self.running = False
+        with self._stop_lock:
+            if self._stopped:
+                return
+            self._stopped = True
 
-        # Close any open positions
-        if self.current_position:
+        # Let an order in flight finish, then close any open position
+        if self.pending_order:
+            self.orders.wait(self.pending_order)
+            self.settle_orders()
+        if self.current_position and not self.pending_order:
             logger.info("Closing open position before shutdown...")
-            market_data = self.get_market_data()
-            if market_data:
-                self.execute_trade('SELL', market_data)
+            order = self.close_position('Shutdown')
+            if order and not self.orders.wait(order):
+                logger.warning(f"Closing order {order.order_id} did not finish before shutdown")
+            self.settle_orders()
+        self._unsubscribe_orders()
+        if self._owns_orders:
+            self.orders.stop()
+        if self.journal:
+            self.journal.flush()
 
         # Print performance summary
         self.print_performance_summary()
@@ -624,6 +1472,25 @@ def signal_handler(signum, frame):
         bot.stop()
     sys.exit(0)
 
+def paper_config(config: TradingConfig) -> TradingConfig:
+    """The config for a paper run: simulated candles and fills must not reach the live candle store or journal"""
+    return replace(config, candle_store_dir=None, journal_path=config.paper_journal_path)
+
+def create_paper_exchange(config: TradingConfig, product_ids: List[str],
+                          market_hub: Optional[MarketDataHub] = None) -> PaperExchange:
+    """Simulated exchange following the streamed book, or a random walk when there is no feed"""
+    paper = PaperExchange({config.quote_currency: config.paper_balance_usd})
+    if market_hub:
+        paper.attach_hub(market_hub)
+        if config.paper_start_price:
+            for product_id in product_ids:
+                paper.set_price(product_id, config.paper_start_price)
+    else:
+        paper.start_synthetic_feed({product_id: config.paper_start_price or 60000.0 for product_id in product_ids},
+                                   interval=config.check_interval)
+    logger.info(f"Paper trading {', '.join(product_ids)} with {config.paper_balance_usd} {config.quote_currency}")
+    return paper
+
 def main():
     """Main function to run the trading bot"""
     global bot
@@ -639,9 +1506,30 @@ def main():
         trade_amount_usd=100.0,
         check_interval=30  # Check every 5 minutes
     )
+    if config.paper_trading:
+        config = paper_config(config)
+    configure_logging(config.log_level, config.log_path)
+
+    if config.metrics_port:
+        start_exporter(config.metrics_port)
+    if config.trace_path:
+        tracer.export_to(config.trace_path)
+
+    # Stream prices over the websocket feed when it is available
+    market_feed = None
+    if config.market_feed_url:
+        try:
+            market_feed = MarketDataFeed([f"{config.base_currency}-{config.quote_currency}"],
+                                         url=config.market_feed_url).start()
+        except RuntimeError as e:
+            logger.warning(f"Market data feed disabled: {e}")
+
+    paper = create_paper_exchange(config, [f"{config.base_currency}-{config.quote_currency}"],
+                                  market_feed.hub if market_feed else None) if config.paper_trading else None
+    client = CoinbaseClient(config.api_key, config.api_secret, rest_client=paper) if paper else None
 
     # Create and start the trading bot
-    bot = TradingBot(config)
+    bot = TradingBot(config, client=client, market_hub=market_feed.hub if market_feed else None)
 
     try:
         bot.run_trading_loop()
@@ -650,6 +1538,10 @@ def main():
     finally:
         if bot:
             bot.stop()
+        if market_feed:
+            market_feed.stop()
+        if paper:
+            paper.stop()
 
 if __name__ == "__main__":
     main()
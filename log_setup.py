@@ -0,0 +1,99 @@
+"""Non-blocking, structured logging for the bot, the engine and the backend
+
+Every logger call only builds a LogRecord and puts it on an in-memory
+queue; a QueueListener thread does the formatting and the disk and
+console I/O. The log file holds one JSON object per line and rotates by
+size. Fields passed with `extra={...}` become top-level JSON keys, so
+hot-path logs can carry price/signal values without string formatting:
+
+    logger.info("Tick processed", extra={'product': 'BTC-USDC', 'price': 64000.0})
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional, Union
+
+# Attributes every LogRecord has; anything else came from `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+# Next to this module, at the repo root, rather than in whatever the working directory is
+DEFAULT_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'trading_bot.log')
+
+_listener = None
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueue the record untouched, leaving %-formatting to the listener thread
+
+    QueueHandler.prepare() would merge the message args on the calling
+    thread. Records never leave the process, so nothing needs pickling.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with `extra` fields as top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: Union[int, str] = logging.INFO, path: Optional[str] = DEFAULT_LOG_PATH,
+                      max_bytes: int = 10 * 1024 * 1024, backups: int = 5, console: bool = True) -> QueueListener:
+    """Route the root logger through a queue to a rotating JSON file and/or the console
+
+    Safe to call more than once; the previous listener is stopped and replaced.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    handlers = []
+    if path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [_DeferredQueueHandler(log_queue)]
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+@atexit.register
+def _flush_on_exit():
+    # Drain whatever is still queued so the last records before exit reach the file
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
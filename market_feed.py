@@ -0,0 +1,387 @@
+"""Streaming market data from the Coinbase Advanced Trade websocket
+
+MarketDataFeed runs an asyncio websocket session in a background thread,
+subscribes to the ticker, level2 and market_trades channels plus
+heartbeats, and reconnects with backoff when the connection drops or
+goes quiet. Every message carries a per-connection sequence_num; a gap
+means an update was lost, so the feed reconnects and rebuilds its order
+books from the fresh snapshots. Decoded updates are published to a
+MarketDataHub, which keeps the latest ticker and book per product and
+fans updates out to in-process subscribers such as the bot and the
+dashboard backend.
+
+ReplayServer serves recorded messages over a local websocket so the
+feed can be exercised without touching the exchange.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    from websockets.asyncio.client import connect
+    from websockets.asyncio.server import serve
+    from websockets.exceptions import ConnectionClosed
+except ImportError:  # websockets >= 13 is only needed when the feed is used
+    connect = serve = None
+    ConnectionClosed = Exception
+
+logger = logging.getLogger(__name__)
+
+COINBASE_WS_URL = 'wss://advanced-trade-ws.coinbase.com'
+DEFAULT_CHANNELS = ('ticker', 'level2', 'market_trades')
+
+# Subscription names differ from the channel names on incoming messages
+MESSAGE_CHANNELS = {'ticker': 'ticker', 'ticker_batch': 'ticker', 'l2_data': 'level2',
+                    'market_trades': 'market_trades', 'heartbeats': 'heartbeats'}
+
+
+class SequenceGapError(Exception):
+    """Raised when messages were dropped and the session must resync"""
+
+
+class OrderBook:
+    """Level 2 book for one product, price level -> size"""
+
+    def __init__(self):
+        self.bids = {}
+        self.asks = {}
+
+    def clear(self):
+        self.bids.clear()
+        self.asks.clear()
+
+    def apply(self, side: str, price: float, size: float):
+        levels = self.bids if side == 'bid' else self.asks
+        if size == 0:
+            levels.pop(price, None)
+        else:
+            levels[price] = size
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return max(self.bids) if self.bids else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return min(self.asks) if self.asks else None
+
+    def top(self, depth: int = 10) -> Dict[str, List]:
+        return {
+            'bids': sorted(self.bids.items(), reverse=True)[:depth],
+            'asks': sorted(self.asks.items())[:depth]
+        }
+
+
+class MarketDataHub:
+    """Thread-safe latest-value cache and in-process fan-out for market data"""
+
+    def __init__(self):
+        self.tickers = {}
+        self.books = {}
+        self.last_trades = {}
+        self.subscribers = []
+        self.version = 0
+        self._condition = threading.Condition()
+
+    def subscribe(self, callback: Callable[[str, str, Dict], None],
+                  channels: Optional[Iterable[str]] = None) -> Callable[[], None]:
+        """Call callback(channel, product_id, data) for every update; returns an unsubscribe function"""
+        entry = (callback, set(channels) if channels else None)
+        with self._condition:
+            self.subscribers = self.subscribers + [entry]
+
+        def unsubscribe():
+            with self._condition:
+                self.subscribers = [item for item in self.subscribers if item is not entry]
+        return unsubscribe
+
+    def _publish(self, channel: str, product_id: str, data: Dict):
+        # Subscribers run on the feed thread, so they must be quick
+        for callback, channels in self.subscribers:
+            if channels is None or channel in channels:
+                try:
+                    callback(channel, product_id, data)
+                except Exception as e:
+                    logger.error(f"Market data subscriber failed: {e}")
+
+    def update_ticker(self, product_id: str, price: float, best_bid: Optional[float] = None,
+                      best_ask: Optional[float] = None, volume_24h: Optional[float] = None):
+        with self._condition:
+            self.version += 1
+            ticker = {
+                'price': price,
+                'best_bid': best_bid,
+                'best_ask': best_ask,
+                'volume_24h': volume_24h,
+                'received_at': time.monotonic(),
+                'version': self.version
+            }
+            self.tickers[product_id] = ticker
+            self._condition.notify_all()
+        self._publish('ticker', product_id, ticker)
+
+    def update_book(self, product_id: str, updates: Iterable[Dict], snapshot: bool = False):
+        with self._condition:
+            book = self.books.setdefault(product_id, OrderBook())
+            if snapshot:
+                book.clear()
+            for update in updates:
+                book.apply(update['side'], float(update['price_level']), float(update['new_quantity']))
+            data = {'best_bid': book.best_bid, 'best_ask': book.best_ask, 'snapshot': snapshot}
+        self._publish('level2', product_id, data)
+
+    def add_trades(self, trades: Iterable[Dict]):
+        for trade in trades:
+            product_id = trade.get('product_id')
+            data = {'price': float(trade['price']), 'size': float(trade['size']),
+                    'side': trade.get('side'), 'time': trade.get('time')}
+            self.last_trades[product_id] = data
+            self._publish('market_trades', product_id, data)
+
+    def reset_books(self):
+        with self._condition:
+            for book in self.books.values():
+                book.clear()
+
+    def ticker(self, product_id: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """Latest ticker, or None if there is none newer than max_age seconds"""
+        ticker = self.tickers.get(product_id)
+        if ticker is None or (max_age is not None and time.monotonic() - ticker['received_at'] > max_age):
+            return None
+        return ticker
+
+    def latest_price(self, product_id: str, max_age: Optional[float] = None) -> Optional[float]:
+        ticker = self.ticker(product_id, max_age)
+        return ticker['price'] if ticker else None
+
+    def wait_for_ticker(self, product_id: str, after_version: int = 0,
+                        timeout: Optional[float] = None) -> Optional[Dict]:
+        """Block until a ticker newer than after_version arrives for product_id"""
+        with self._condition:
+            def ready():
+                ticker = self.tickers.get(product_id)
+                return ticker is not None and ticker['version'] > after_version
+            if not self._condition.wait_for(ready, timeout):
+                return None
+            return self.tickers[product_id]
+
+
+class MarketDataFeed:
+    """Background websocket session that keeps a MarketDataHub current"""
+
+    def __init__(self, product_ids: Iterable[str], url: str = COINBASE_WS_URL,
+                 channels: Iterable[str] = DEFAULT_CHANNELS, hub: Optional[MarketDataHub] = None,
+                 jwt_factory: Optional[Callable[[], str]] = None, stale_after: float = 10.0,
+                 max_backoff: float = 30.0):
+        self.product_ids = list(product_ids)
+        self.url = url
+        self.channels = list(channels)
+        self.hub = hub or MarketDataHub()
+        # Only needed for authenticated channels such as 'user'
+        self.jwt_factory = jwt_factory
+        # Heartbeats arrive every second, so silence this long means a dead connection
+        self.stale_after = stale_after
+        self.max_backoff = max_backoff
+        self.connected = False
+        self.stats = {'messages': 0, 'reconnects': 0, 'sequence_gaps': 0, 'last_message_at': None}
+        self._last_sequence = None
+        self._thread = None
+        self._loop = None
+        self._stop = None
+
+    def start(self) -> 'MarketDataFeed':
+        if connect is None:
+            raise RuntimeError("websockets 13 or newer is required for the market data feed")
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_loop, name='market-feed', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        self._stop = asyncio.Event()
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self._loop.close()
+
+    async def _run(self):
+        attempt = 0
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                await self._session()
+            except SequenceGapError as e:
+                # Resubscribing from scratch replays the snapshots we need
+                logger.warning(f"{e}, resubscribing")
+            except (OSError, ConnectionClosed, asyncio.TimeoutError) as e:
+                logger.warning(f"Market data connection lost: {e}")
+            except Exception as e:
+                logger.error(f"Market data feed error: {e}")
+            finally:
+                self.connected = False
+
+            # A session that stayed up for a while starts the backoff over
+            attempt = 1 if time.monotonic() - started > self.max_backoff else attempt + 1
+            if self._stop.is_set():
+                break
+            self.stats['reconnects'] += 1
+            delay = random.uniform(0, min(self.max_backoff, 0.25 * (2 ** attempt)))
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _subscriptions(self) -> List[Dict]:
+        messages = []
+        for channel in self.channels + ['heartbeats']:
+            message = {'type': 'subscribe', 'product_ids': self.product_ids, 'channel': channel}
+            if self.jwt_factory:
+                message['jwt'] = self.jwt_factory()
+            messages.append(message)
+        return messages
+
+    async def _session(self):
+        async with connect(self.url, max_size=None, ping_interval=20) as websocket:
+            self._last_sequence = None
+            self.hub.reset_books()
+            for message in self._subscriptions():
+                await websocket.send(json.dumps(message))
+            self.connected = True
+            logger.info(f"Market data feed connected for {', '.join(self.product_ids)}")
+
+            stop_task = asyncio.ensure_future(self._stop.wait())
+            try:
+                while not self._stop.is_set():
+                    receive = asyncio.ensure_future(websocket.recv())
+                    done, _ = await asyncio.wait({receive, stop_task}, timeout=self.stale_after,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                    if receive not in done:
+                        receive.cancel()
+                        if stop_task in done:
+                            return
+                        raise asyncio.TimeoutError(f"No market data for {self.stale_after}s")
+                    self.handle_message(json.loads(receive.result()))
+            finally:
+                stop_task.cancel()
+
+    def handle_message(self, message: Dict):
+        """Check sequencing and route one decoded message to the hub"""
+        self.stats['messages'] += 1
+        self.stats['last_message_at'] = time.time()
+
+        sequence = message.get('sequence_num')
+        if sequence is not None:
+            if self._last_sequence is not None and sequence != self._last_sequence + 1:
+                self.stats['sequence_gaps'] += 1
+                expected = self._last_sequence + 1
+                self._last_sequence = None
+                raise SequenceGapError(f"Sequence gap: expected {expected}, got {sequence}")
+            self._last_sequence = sequence
+
+        channel = MESSAGE_CHANNELS.get(message.get('channel'))
+        if channel is None:
+            if message.get('type') == 'error':
+                logger.error(f"Market data feed error message: {message.get('message')}")
+            return
+
+        for event in message.get('events', []):
+            if channel == 'ticker':
+                for ticker in event.get('tickers', []):
+                    self.hub.update_ticker(
+                        ticker['product_id'],
+                        float(ticker['price']),
+                        best_bid=float(ticker['best_bid']) if ticker.get('best_bid') else None,
+                        best_ask=float(ticker['best_ask']) if ticker.get('best_ask') else None,
+                        volume_24h=float(ticker['volume_24_h']) if ticker.get('volume_24_h') else None
+                    )
+            elif channel == 'level2':
+                self.hub.update_book(event['product_id'], event.get('updates', []),
+                                     snapshot=event.get('type') == 'snapshot')
+            elif channel == 'market_trades':
+                self.hub.add_trades(event.get('trades', []))
+
+
+class ReplayServer:
+    """Local websocket server that replays recorded feed messages
+
+    Each connection receives the messages in order once it has sent its
+    first subscribe request, with sequence_num assigned per connection
+    unless the recording already carries one.
+    """
+
+    def __init__(self, messages: Iterable[Dict], interval: float = 0.0,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.messages = list(messages)
+        self.interval = interval
+        self.host = host
+        self.port = port
+        self.connections = 0
+        self._thread = None
+        self._loop = None
+        self._stop = None
+        self._ready = threading.Event()
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'ReplayServer':
+        """Load a recording with one JSON message per line"""
+        with open(path) as recording:
+            return cls((json.loads(line) for line in recording if line.strip()), **kwargs)
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self) -> 'ReplayServer':
+        if serve is None:
+            raise RuntimeError("websockets 13 or newer is required for the replay server")
+        self._thread = threading.Thread(target=self._run_loop, name='market-replay', daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        self._stop = asyncio.Event()
+        try:
+            self._loop.run_until_complete(self._serve())
+        finally:
+            self._loop.close()
+
+    async def _serve(self):
+        async with serve(self._handle, self.host, self.port) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await self._stop.wait()
+
+    async def _handle(self, websocket):
+        self.connections += 1
+        try:
+            await websocket.recv()
+            for sequence, message in enumerate(self.messages):
+                if 'sequence_num' not in message:
+                    message = dict(message, sequence_num=sequence)
+                await websocket.send(json.dumps(message))
+                if self.interval:
+                    await asyncio.sleep(self.interval)
+            await self._stop.wait()
+        except ConnectionClosed:
+            pass
@@ -0,0 +1,300 @@
+"""Run one TradingBot strategy per symbol inside a single process
+
+All bots share one CoinbaseClient (and with it the process-wide rate
+limiter), one OrderManager and one MarketDataHub. A single scheduler thread keeps a heap
+of when each symbol is next due, fetches prices for every due symbol
+in one go (streamed prices first, then one batched best_bid_ask request
+for the rest) and hands the ticks to a small worker pool. Positions and
+risk limits stay per symbol because each bot keeps its own
+RiskManager and position.
+
+Usage:
+    python multi_symbol_engine.py BTC-USDC ETH-USDC SOL-USDC --interval 30
+"""
+
+import argparse
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from coinbase_trading_bot import CoinbaseClient, TradingBot, TradingConfig, create_paper_exchange, paper_config
+from log_setup import configure_logging
+from market_feed import MarketDataFeed, MarketDataHub
+from metrics import start_exporter
+from order_manager import OrderManager
+from tracing import tracer
+from trade_journal import TradeJournal
+from trigger_index import PositionTriggers
+
+logger = logging.getLogger(__name__)
+
+# Product ids per best_bid_ask request, keeping the query string a sane length
+QUOTE_BATCH_SIZE = 50
+
+
+class MultiSymbolEngine:
+    """Shared scheduler, market data and rate limits for many TradingBots"""
+
+    def __init__(self, config: TradingConfig, symbols: Iterable[str],
+                 client: Optional[CoinbaseClient] = None, market_hub: Optional[MarketDataHub] = None,
+                 workers: int = 8, clock: Callable[[], datetime] = datetime.now):
+        self.config = config
+        self.client = client or CoinbaseClient(config.api_key, config.api_secret)
+        # One poller checks every symbol's open orders in batched requests
+        self.orders = OrderManager(self.client)
+        self.market_hub = market_hub
+        self.clock = clock
+        # One journal (and one write lock) shared by every bot
+        self.journal = TradeJournal(config.journal_path) if config.journal_path else None
+        self.bots = {}
+        self.running = False
+        self._schedule = []
+        self._inflight = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        # Bounded pool: order placement blocks on REST, but never one thread per symbol
+        self._workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='symbol-tick')
+
+        for symbol in symbols:
+            self.add_symbol(symbol)
+
+        if self.market_hub:
+            self.market_hub.subscribe(self._on_ticker, channels=['ticker'])
+
+    def add_symbol(self, symbol: str, **overrides) -> TradingBot:
+        """Start trading a symbol, optionally with its own config overrides"""
+        base_currency, quote_currency = symbol.upper().split('-')
+        config = replace(self.config, base_currency=base_currency, quote_currency=quote_currency, **overrides)
+        bot = TradingBot(config, client=self.client, clock=self.clock, market_hub=self.market_hub,
+                         journal=self.journal, order_manager=self.orders)
+        with self._lock:
+            self.bots[bot.product_id] = bot
+            heapq.heappush(self._schedule, (time.monotonic(), bot.product_id))
+        self._wake.set()
+        return bot
+
+    def remove_symbol(self, symbol: str) -> Optional[TradingBot]:
+        """Stop scheduling a symbol; its open position is left as is"""
+        with self._lock:
+            return self.bots.pop(symbol.upper(), None)
+
+    def fetch_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Current prices, from the stream where fresh and one batched REST call otherwise"""
+        prices = {}
+        missing = []
+        for symbol in symbols:
+            price = None
+            if self.market_hub:
+                price = self.market_hub.latest_price(symbol, max_age=self.bots[symbol].config.check_interval)
+            if price:
+                prices[symbol] = price
+            else:
+                missing.append(symbol)
+
+        for start in range(0, len(missing), QUOTE_BATCH_SIZE):
+            quotes = self.client.get_best_bid_ask(missing[start:start + QUOTE_BATCH_SIZE])
+            for symbol, quote in (quotes or {}).items():
+                if quote['price'] > 0:
+                    prices[symbol] = quote['price']
+        return prices
+
+    def run_once(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Fetch prices and run one synchronous tick for each symbol; returns the analyses"""
+        symbols = list(self.bots) if symbols is None else symbols
+        now = self.clock()
+        analyses = {}
+        for symbol, price in self.fetch_prices(symbols).items():
+            analyses[symbol] = self._tick(symbol, price, now)
+        return analyses
+
+    def _tick(self, symbol: str, price: float, now: datetime) -> Optional[Dict]:
+        bot = self.bots.get(symbol)
+        if bot is None:
+            return None
+        try:
+            with tracer.trace('tick', product=symbol):
+                bot.record_price(price, int(now.timestamp() * 1_000_000_000))
+                return bot.process_tick({'price': price, 'timestamp': now})
+        except Exception as e:
+            logger.error("Tick failed for %s: %s", symbol, e)
+            return None
+        finally:
+            with self._lock:
+                self._inflight.discard(symbol)
+
+    def _on_ticker(self, channel: str, symbol: str, ticker: Dict):
+        # Runs on the feed thread: the trigger index moves trailing stops and hands off only crossed exits
+        bot = self.bots.get(symbol)
+        if not bot or not self.running:
+            return
+        pending = bot.pending_order
+        if pending is not None:
+            # Normally booked by the order manager's notification already; this covers a missed one
+            if pending.done:
+                self._workers.submit(bot.settle_orders)
+            return
+        if not bot.current_position or bot.protective_order:
+            return
+        price = ticker['price']
+        fired = bot.triggers.update(price)
+        if not fired:
+            return
+        with self._lock:
+            busy = symbol in self._inflight
+            if not busy:
+                self._inflight.add(symbol)
+        if busy:
+            # The symbol's tick is running; put the triggers back so the next price fires them again
+            for triggers in fired:
+                bot.triggers.add(triggers)
+            return
+        self._workers.submit(self._exit, symbol, fired, price)
+
+    def _exit(self, symbol: str, fired: List[PositionTriggers], price: float):
+        try:
+            with tracer.trace('stream_exit', product=symbol):
+                for triggers in fired:
+                    self.bots[symbol].exit_triggered(triggers, price)
+        except Exception as e:
+            logger.error(f"Exit failed for {symbol}: {e}")
+        finally:
+            with self._lock:
+                self._inflight.discard(symbol)
+
+    def _due_symbols(self) -> List[str]:
+        """Pop every symbol whose next check is due and reschedule it"""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            while self._schedule and self._schedule[0][0] <= now:
+                _, symbol = heapq.heappop(self._schedule)
+                bot = self.bots.get(symbol)
+                if bot is None:
+                    continue
+                heapq.heappush(self._schedule, (now + bot.config.check_interval, symbol))
+                # A symbol still busy with its previous tick skips this round
+                if symbol not in self._inflight:
+                    self._inflight.add(symbol)
+                    due.append(symbol)
+        return due
+
+    def run(self):
+        """Scheduler loop; blocks until stop() is called"""
+        logger.info(f"Starting multi-symbol engine for {len(self.bots)} symbols")
+        for bot in list(self.bots.values()):
+            try:
+                bot.reconcile_open_orders()
+            except Exception as e:
+                logger.error(f"Could not reconcile open orders for {bot.product_id}: {e}")
+        self.running = True
+        while self.running:
+            due = self._due_symbols()
+            if due:
+                now = self.clock()
+                try:
+                    prices = self.fetch_prices(due)
+                except Exception as e:
+                    logger.error(f"Price fetch failed: {e}")
+                    prices = {}
+                for symbol in due:
+                    if symbol in prices:
+                        self._workers.submit(self._tick, symbol, prices[symbol], now)
+                    else:
+                        with self._lock:
+                            self._inflight.discard(symbol)
+
+            with self._lock:
+                delay = self._schedule[0][0] - time.monotonic() if self._schedule else 1.0
+            self._wake.wait(max(0.0, min(delay, 1.0)))
+            self._wake.clear()
+
+    def start(self) -> 'MultiSymbolEngine':
+        """Run the scheduler on a background thread"""
+        self._thread = threading.Thread(target=self.run, name='multi-symbol-engine', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, close_positions: bool = True):
+        """Stop scheduling, optionally close every open position, and shut the pool down"""
+        self.running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._workers.shutdown(wait=True)
+        if close_positions:
+            bots = list(self.bots.values())
+            # Every exit goes out at once; each bot then waits only for its own fill
+            for bot in bots:
+                if bot.current_position and not bot.pending_order:
+                    bot.close_position('Shutdown')
+            for bot in bots:
+                bot.stop()
+        self.orders.stop()
+
+    def status(self) -> Dict[str, Dict]:
+        """Per-symbol price, position and P&L summary"""
+        return {
+            symbol: {
+                'price': bot.price_history.latest,
+                'position': bot.current_position,
+                'pending_order': getattr(bot.pending_order, 'status', None),
+                'total_pnl': bot.total_pnl,
+                'daily_trades': bot.risk_manager.daily_trades,
+                'trades': len(bot.trades_executed)
+            }
+            for symbol, bot in list(self.bots.items())
+        }
+
+
+def main():
+    """Run the engine from the command line"""
+    parser = argparse.ArgumentParser(description='Trade many symbols with one TradingBot strategy each')
+    parser.add_argument('symbols', nargs='+', help='Product ids such as BTC-USDC ETH-USDC')
+    parser.add_argument('--interval', type=int, default=30, help='Seconds between analyses per symbol')
+    parser.add_argument('--workers', type=int, default=8, help='Worker threads for ticks and orders')
+    args = parser.parse_args()
+
+    config = replace(TradingConfig(), check_interval=args.interval)
+    if config.paper_trading:
+        config = paper_config(config)
+    configure_logging(config.log_level, config.log_path)
+    symbols = [symbol.upper() for symbol in args.symbols]
+
+    if config.metrics_port:
+        start_exporter(config.metrics_port)
+    if config.trace_path:
+        tracer.export_to(config.trace_path)
+
+    market_feed = None
+    if config.market_feed_url:
+        try:
+            market_feed = MarketDataFeed(symbols, url=config.market_feed_url).start()
+        except RuntimeError as e:
+            logger.warning(f"Market data feed disabled: {e}")
+
+    paper = create_paper_exchange(config, symbols, market_feed.hub if market_feed else None) if config.paper_trading else None
+    client = CoinbaseClient(config.api_key, config.api_secret, rest_client=paper) if paper else None
+
+    engine = MultiSymbolEngine(config, symbols, client=client, workers=args.workers,
+                               market_hub=market_feed.hub if market_feed else None)
+    try:
+        engine.run()
+    except KeyboardInterrupt:
+        logger.info("Received interrupt signal, stopping engine...")
+    finally:
+        engine.stop()
+        if market_feed:
+            market_feed.stop()
+        if paper:
+            paper.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,395 @@
+"""Parallel parameter sweeps over TradingConfig using the backtester
+
+Backtests fan out across a ProcessPoolExecutor. Candle columns are placed
+in a single shared memory block once, and every worker maps them as numpy
+views instead of receiving a pickled copy per trial. Each finished trial is
+appended to a JSON lines checkpoint, so an interrupted sweep resumes
+where it stopped.
+
+Usage:
+    python optimizer.py candles.csv --method random --trials 200 --checkpoint sweep.jsonl
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import fields, replace
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backtester import CANDLE_COLUMNS, Backtester, BacktestResult, load_candles
+from coinbase_trading_bot import TradingConfig
+from log_setup import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Default search space: field -> (low, high). Integer bounds give integer values.
+DEFAULT_SPACE = {
+    'sma_short_period': (3, 12),
+    'sma_long_period': (10, 40),
+    'rsi_oversold': (20, 40),
+    'rsi_overbought': (60, 80),
+    'stop_loss_percentage': (0.5, 5.0),
+    'take_profit_percentage': (1.0, 8.0)
+}
+
+# Backtest summary keys a sweep can rank by
+METRICS = tuple(BacktestResult(0.0, 0.0, 0.0, 0.0, 0.0, 0, 0.0).summary())
+
+# Metrics that are better when smaller
+MINIMIZED_METRICS = {'max_drawdown', 'max_drawdown_percent', 'fees'}
+
+# Random sampling redraws rejected parameter sets at most this many times per trial budget
+RANDOM_SAMPLE_ROUNDS = 50
+
+
+class SharedCandles:
+    """Candle columns stored back to back in one shared memory block"""
+
+    def __init__(self, candles: Dict[str, np.ndarray]):
+        self.length = len(candles['close'])
+        size = max(1, 8 * self.length * len(CANDLE_COLUMNS))
+        self.memory = shared_memory.SharedMemory(create=True, size=size)
+        for column, view in self._views(self.memory.buf, self.length).items():
+            view[:] = candles[column]
+
+    @staticmethod
+    def _views(buffer, length: int) -> Dict[str, np.ndarray]:
+        views = {}
+        for index, column in enumerate(CANDLE_COLUMNS):
+            dtype = np.int64 if column == 'time' else np.float64
+            views[column] = np.ndarray((length,), dtype=dtype, buffer=buffer, offset=index * 8 * length)
+        return views
+
+    def descriptor(self) -> Tuple[str, int]:
+        """Picklable handle that workers pass to attach()"""
+        return self.memory.name, self.length
+
+    @staticmethod
+    def attach(descriptor: Tuple[str, int]) -> Tuple[shared_memory.SharedMemory, Dict[str, np.ndarray]]:
+        """Map an existing block as zero-copy column arrays"""
+        name, length = descriptor
+        memory = shared_memory.SharedMemory(name=name)
+        return memory, SharedCandles._views(memory.buf, length)
+
+    def close(self):
+        """Release and remove the shared block"""
+        self.memory.close()
+        self.memory.unlink()
+
+
+# Per-worker state populated by _init_worker
+_worker_memory = None
+_worker_candles = None
+_worker_settings = None
+
+
+def _init_worker(descriptor: Tuple[str, int], settings: Dict):
+    global _worker_memory, _worker_candles, _worker_settings
+    _worker_memory, _worker_candles = SharedCandles.attach(descriptor)
+    _worker_settings = settings
+
+
+def _run_trial(params: Dict) -> Dict:
+    """Backtest one parameter set inside a worker process"""
+    config = replace(TradingConfig(**_worker_settings['base_config']), **params)
+    result = Backtester(
+        config,
+        _worker_candles,
+        initial_cash=_worker_settings['initial_cash'],
+        fee_rate=_worker_settings['fee_rate'],
+        slippage=_worker_settings['slippage']
+    ).run()
+    return {'params': params, 'summary': result.summary()}
+
+
+def _is_integer_range(bounds: Tuple) -> bool:
+    return all(isinstance(bound, int) for bound in bounds)
+
+
+def _from_unit(space: Dict[str, Tuple], point: Iterable[float]) -> Dict:
+    """Map a point in the unit hypercube to concrete parameter values"""
+    params = {}
+    for (name, (low, high)), u in zip(space.items(), point):
+        value = low + u * (high - low)
+        params[name] = int(round(value)) if _is_integer_range((low, high)) else round(value, 4)
+    return params
+
+
+def _to_unit(space: Dict[str, Tuple], params: Dict) -> List[float]:
+    return [(params[name] - low) / (high - low) if high != low else 0.0
+            for name, (low, high) in space.items()]
+
+
+def is_valid(params: Dict, base_config: TradingConfig) -> bool:
+    """Reject parameter sets whose fast/slow or oversold/overbought levels cross"""
+    config = replace(base_config, **params)
+    return (config.sma_short_period < config.sma_long_period and
+            config.rsi_oversold < config.rsi_overbought)
+
+
+def grid_candidates(space: Dict[str, Tuple], steps: int) -> List[Dict]:
+    """Evenly spaced grid with `steps` values per parameter"""
+    axes = np.linspace(0.0, 1.0, steps) if steps > 1 else np.array([0.5])
+    mesh = np.stack(np.meshgrid(*[axes] * len(space), indexing='ij'), axis=-1).reshape(-1, len(space))
+
+    candidates = []
+    seen = set()
+    for point in mesh:
+        params = _from_unit(space, point)
+        key = _trial_key(params)
+        if key not in seen:
+            seen.add(key)
+            candidates.append(params)
+    return candidates
+
+
+def random_candidates(space: Dict[str, Tuple], count: int, rng: random.Random) -> List[Dict]:
+    """Uniform random samples from the search space"""
+    return [_from_unit(space, [rng.random() for _ in space]) for _ in range(count)]
+
+
+class BayesianSearch:
+    """Gaussian process surrogate with expected-improvement acquisition
+
+    Scores are standardized and modelled with an RBF kernel over the unit
+    hypercube; each batch takes the candidates with the highest expected
+    improvement out of a random pool.
+    """
+
+    def __init__(self, space: Dict[str, Tuple], rng: random.Random,
+                 length_scale: float = 0.2, noise: float = 1e-4, pool_size: int = 2000):
+        self.space = space
+        self.rng = rng
+        self.length_scale = length_scale
+        self.noise = noise
+        self.pool_size = pool_size
+        self.points = []
+        self.scores = []
+
+    def observe(self, params: Dict, score: float):
+        self.points.append(_to_unit(self.space, params))
+        self.scores.append(score)
+
+    def _kernel(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        distances = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=-1)
+        return np.exp(-distances / (2 * self.length_scale ** 2))
+
+    def suggest(self, count: int) -> List[Dict]:
+        """Next batch of parameter sets to evaluate"""
+        pool = np.array([[self.rng.random() for _ in self.space] for _ in range(self.pool_size)])
+        if len(self.points) < 2:
+            return [_from_unit(self.space, point) for point in pool[:count]]
+
+        observed = np.array(self.points)
+        scores = np.array(self.scores)
+        spread = scores.std() or 1.0
+        targets = (scores - scores.mean()) / spread
+
+        gram = self._kernel(observed, observed) + self.noise * np.eye(len(observed))
+        cholesky = np.linalg.cholesky(gram)
+        alpha = np.linalg.solve(cholesky.T, np.linalg.solve(cholesky, targets))
+
+        cross = self._kernel(pool, observed)
+        mean = cross @ alpha
+        projected = np.linalg.solve(cholesky, cross.T)
+        std = np.sqrt(np.clip(1.0 - (projected ** 2).sum(axis=0), 1e-12, None))
+
+        best = targets.max()
+        z = (mean - best) / std
+        cdf = 0.5 * (1 + np.vectorize(math.erf)(z / math.sqrt(2)))
+        pdf = np.exp(-0.5 * z ** 2) / math.sqrt(2 * math.pi)
+        improvement = (mean - best) * cdf + std * pdf
+
+        return [_from_unit(self.space, pool[index]) for index in np.argsort(-improvement)[:count]]
+
+
+def _trial_key(params: Dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+def load_checkpoint(path: Optional[str]) -> List[Dict]:
+    """Completed trials from a previous run of the same sweep"""
+    if not path or not os.path.exists(path):
+        return []
+
+    trials = []
+    with open(path) as checkpoint:
+        for line in checkpoint:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                trials.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A partially written last line is expected after a hard kill
+                logger.warning(f"Skipping unreadable checkpoint line in {path}")
+    return trials
+
+
+def score_trial(trial: Dict, metric: str) -> float:
+    """Higher-is-better score for ranking trials"""
+    value = trial['summary'][metric]
+    return -value if metric in MINIMIZED_METRICS else value
+
+
+class ParameterSweep:
+    """Runs backtests for many TradingConfig variants across a process pool"""
+
+    def __init__(self, candles: Dict[str, np.ndarray], base_config: Optional[TradingConfig] = None,
+                 space: Optional[Dict[str, Tuple]] = None, metric: str = 'total_return_percent',
+                 workers: Optional[int] = None, checkpoint: Optional[str] = None,
+                 initial_cash: float = 500.0, fee_rate: float = 0.006,
+                 slippage: float = 0.0, seed: Optional[int] = None):
+        self.candles = candles
+        self.base_config = base_config or TradingConfig()
+        self.space = space or DEFAULT_SPACE
+        self.metric = metric
+        self.workers = workers or os.cpu_count() or 1
+        self.checkpoint = checkpoint
+        self.rng = random.Random(seed)
+        self.settings = {
+            'base_config': {item.name: getattr(self.base_config, item.name) for item in fields(self.base_config)},
+            'initial_cash': initial_cash,
+            'fee_rate': fee_rate,
+            'slippage': slippage
+        }
+
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}; expected one of: {', '.join(METRICS)}")
+        unknown = set(self.space) - {item.name for item in fields(TradingConfig)}
+        if unknown:
+            raise ValueError(f"Unknown TradingConfig fields in search space: {', '.join(sorted(unknown))}")
+
+        self.trials = load_checkpoint(checkpoint)
+        self.completed = {_trial_key(trial['params']) for trial in self.trials}
+        if self.trials:
+            logger.info(f"Resuming sweep with {len(self.trials)} completed trials from {checkpoint}")
+
+    def _record(self, trial: Dict):
+        self.trials.append(trial)
+        self.completed.add(_trial_key(trial['params']))
+        if self.checkpoint:
+            with open(self.checkpoint, 'a') as checkpoint:
+                checkpoint.write(json.dumps(trial) + '\n')
+
+    def _pending(self, candidates: Iterable[Dict]) -> List[Dict]:
+        pending = []
+        seen = set()
+        for params in candidates:
+            key = _trial_key(params)
+            if key in self.completed or key in seen or not is_valid(params, self.base_config):
+                continue
+            seen.add(key)
+            pending.append(params)
+        return pending
+
+    def _random_pending(self, count: int) -> List[Dict]:
+        """`count` new valid random parameter sets, redrawing the samples is_valid() rejects"""
+        pending = []
+        for _ in range(RANDOM_SAMPLE_ROUNDS):
+            if len(pending) >= count:
+                break
+            pending = self._pending(pending + random_candidates(self.space, count - len(pending), self.rng))
+        if len(pending) < count:
+            logger.warning(f"Found only {len(pending)} valid new parameter sets for {count} trials")
+        return pending[:count]
+
+    def _evaluate(self, executor: ProcessPoolExecutor, candidates: List[Dict]):
+        futures = {executor.submit(_run_trial, params) for params in candidates}
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                trial = future.result()
+                self._record(trial)
+                logger.info(f"Trial {len(self.trials)}: {trial['params']} -> "
+                            f"{self.metric}={trial['summary'][self.metric]}")
+
+    def run(self, method: str = 'random', trials: int = 100, grid_steps: int = 3) -> List[Dict]:
+        """Run the sweep and return every trial ranked best first"""
+        shared = SharedCandles(self.candles)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(shared.descriptor(), self.settings)
+            ) as executor:
+                if method == 'grid':
+                    self._evaluate(executor, self._pending(grid_candidates(self.space, grid_steps)))
+                elif method == 'random':
+                    self._evaluate(executor, self._random_pending(max(0, trials - len(self.trials))))
+                elif method == 'bayes':
+                    self._run_bayesian(executor, trials)
+                else:
+                    raise ValueError(f"Unknown sweep method: {method}")
+        finally:
+            shared.close()
+
+        return self.ranked()
+
+    def _run_bayesian(self, executor: ProcessPoolExecutor, trials: int):
+        search = BayesianSearch(self.space, self.rng)
+        for trial in self.trials:
+            if set(trial['params']) == set(self.space):
+                search.observe(trial['params'], score_trial(trial, self.metric))
+
+        while len(self.trials) < trials:
+            batch = min(self.workers, trials - len(self.trials))
+            candidates = self._pending(search.suggest(batch * 4))[:batch]
+            if not candidates:
+                candidates = self._pending(random_candidates(self.space, batch * 4, self.rng))[:batch]
+            if not candidates:
+                logger.warning("Search space exhausted before reaching the trial budget")
+                break
+
+            start = len(self.trials)
+            self._evaluate(executor, candidates)
+            for trial in self.trials[start:]:
+                search.observe(trial['params'], score_trial(trial, self.metric))
+
+    def ranked(self) -> List[Dict]:
+        return sorted(self.trials, key=lambda trial: score_trial(trial, self.metric), reverse=True)
+
+
+def main():
+    """Run a parameter sweep from the command line"""
+    parser = argparse.ArgumentParser(description='Sweep TradingConfig parameters with parallel backtests')
+    parser.add_argument('candles', help='Path to a .csv, .parquet or .npz candle file')
+    parser.add_argument('--method', choices=['grid', 'random', 'bayes'], default='random')
+    parser.add_argument('--trials', type=int, default=100, help='Trial budget for random and bayes')
+    parser.add_argument('--grid-steps', type=int, default=3, help='Values per parameter for grid')
+    parser.add_argument('--metric', choices=METRICS, default='total_return_percent')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--checkpoint', help='JSON lines file used to resume an interrupted sweep')
+    parser.add_argument('--initial-cash', type=float, default=500.0)
+    parser.add_argument('--fee', type=float, default=0.006)
+    parser.add_argument('--slippage', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--top', type=int, default=10, help='Number of ranked results to print')
+    args = parser.parse_args()
+    configure_logging(path=None)
+
+    sweep = ParameterSweep(
+        load_candles(args.candles),
+        metric=args.metric,
+        workers=args.workers,
+        checkpoint=args.checkpoint,
+        initial_cash=args.initial_cash,
+        fee_rate=args.fee,
+        slippage=args.slippage,
+        seed=args.seed
+    )
+    ranked = sweep.run(method=args.method, trials=args.trials, grid_steps=args.grid_steps)
+
+    for position, trial in enumerate(ranked[:args.top], start=1):
+        print(f"{position:>3}. {args.metric}={trial['summary'][args.metric]} {json.dumps(trial['params'])}")
+
+
+if __name__ == '__main__':
+    main()
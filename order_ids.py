@@ -0,0 +1,82 @@
+"""Collision-free client_order_id generation with local dedupe
+
+Ids used to be `bot_{int(time.time())}`, so two orders in the same second
+shared an id. Coinbase treats a repeated client_order_id as the same
+order, and the second order silently became the first. Ids now look like
+
+    bot-3f9a1c07d2-0192f3a4b5c-0000
+
+- a prefix naming the component (bot, web, ...)
+- a node tag hashed from the host's MAC address, the process id and
+  random bits, so processes and machines never share a sequence
+- milliseconds since the epoch, then a per-millisecond counter
+
+Timestamp and counter are zero-padded, so ids from one generator sort
+in the order they were issued. The sequence never goes backwards, even
+if the wall clock steps back.
+
+answered() records ids whose placement got a definite answer, accepted
+or rejected, and claim() refuses those, so a replayed signal or a double
+click cannot place the same order twice. An id whose placement got no
+answer (a timeout, a dropped connection) may be claimed again: resending
+it is how the order is recovered, since Coinbase treats a repeated
+client_order_id as the same order.
+"""
+
+import hashlib
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+# Per-millisecond counter width; the millisecond is borrowed from the future when it overflows
+SEQUENCE_LIMIT = 0x10000
+
+
+def _node_tag() -> str:
+    seed = f"{uuid.getnode()}-{os.getpid()}-{random.getrandbits(32)}"
+    return hashlib.sha1(seed.encode()).hexdigest()[:10]
+
+
+class ClientOrderIdGenerator:
+    """Monotonic, process- and node-unique client order ids"""
+
+    def __init__(self, prefix: str = 'bot', node: Optional[str] = None, remember: int = 10_000):
+        self.prefix = prefix
+        self.node = node or _node_tag()
+        # How many answered ids claim() remembers
+        self.remember = remember
+        self._last_ms = 0
+        self._sequence = 0
+        self._answered = OrderedDict()
+        self._lock = threading.Lock()
+
+    def next(self) -> str:
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms, self._sequence = now_ms, 0
+            else:
+                self._sequence += 1
+                if self._sequence >= SEQUENCE_LIMIT:
+                    self._last_ms, self._sequence = self._last_ms + 1, 0
+            return f"{self.prefix}-{self.node}-{self._last_ms:011x}-{self._sequence:04x}"
+
+    def claim(self, client_order_id: str) -> bool:
+        """Whether an id may be submitted: False once its placement got a definite answer"""
+        with self._lock:
+            return client_order_id not in self._answered
+
+    def answered(self, client_order_id: str):
+        """Record that the exchange accepted or rejected the order with this id"""
+        with self._lock:
+            self._answered[client_order_id] = None
+            if len(self._answered) > self.remember:
+                self._answered.popitem(last=False)
+
+
+# Shared by every bot in the process
+client_order_ids = ClientOrderIdGenerator()
@@ -0,0 +1,380 @@
+"""Order submission off the tick loop, with fills tracked to a final state
+
+TradingBot used to treat any response from place_market_order as a fill
+at the ticker price. OrderManager instead hands each order to a small
+submission pool and returns a ManagedOrder right away. A poller thread
+then refreshes every open order with one batched list_orders request per
+poll. Exchange snapshots from other sources, such as the authenticated
+user channel, can be merged with apply_updates(). The bot books the
+position from the order's filled size, average price and fees once it
+reaches a final status.
+
+When placement raises or gets no response, the order may or may not be
+on the exchange. It is marked UNKNOWN rather than FAILED, and each poll
+looks for its client_order_id among the product's recent orders. If it
+is not there, the placement is resent with the same client_order_id,
+which Coinbase treats as the same order. It is tracked like any other
+order once found or answered, and fails only if it is still missing
+after UNKNOWN_ORDER_TIMEOUT.
+
+submit_many() is the batch API (rebalances, exits across many pairs):
+every order goes out concurrently, under the client's rate limiter, and
+each one is tracked to its fill.
+
+With background=False, submission and the first status refresh run
+inline. Backtests use this, so every fill lands on the bar that placed
+the order.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from metrics import registry
+from order_ids import ClientOrderIdGenerator, client_order_ids
+from trade_journal import FINAL_ORDER_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Order ids per list_orders request
+STATUS_BATCH_SIZE = 50
+# Seconds an order whose placement went unanswered is looked for before it counts as failed
+UNKNOWN_ORDER_TIMEOUT = 60.0
+# Extra seconds of order history searched for it, to cover clock skew with the exchange
+UNKNOWN_ORDER_LOOKBACK = 60.0
+
+ORDER_FILL_SECONDS = registry.histogram('order_fill_seconds', 'Order submission to final status', ['side'])
+
+
+def _field(item, name: str, default=None):
+    if isinstance(item, dict):
+        return item.get(name, default)
+    return getattr(item, name, default)
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_order_response(response) -> Tuple[Optional[str], Optional[str]]:
+    """(order_id, error) from a create_order style response"""
+    if not response:
+        return None, 'no response from exchange'
+    if _field(response, 'success', True) is False:
+        error = _field(response, 'error_response') or {}
+        return None, _field(error, 'message') or _field(error, 'error') or _field(response, 'failure_reason')
+    success = _field(response, 'success_response')
+    order_id = (_field(success, 'order_id') if success else None) or _field(response, 'order_id')
+    return (order_id, None) if order_id else (None, 'response has no order id')
+
+
+@dataclass
+class ManagedOrder:
+    """One order's request and its latest known exchange state"""
+    product_id: str
+    side: str
+    size: str
+    limit_price: Optional[str] = None
+    tag: Optional[str] = None  # why the order was placed, for logs and trade records
+    client_order_id: Optional[str] = None
+    order_id: Optional[str] = None
+    # SUBMITTING until the exchange acknowledges it, then the exchange's status;
+    # UNKNOWN while a placement without an answer is looked for on the exchange
+    status: str = 'SUBMITTING'
+    filled_size: float = 0.0
+    average_price: Optional[float] = None
+    fees: float = 0.0
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.monotonic)
+    # Set for exchange-side bracket exits: limit_price is the take profit, stop_price the stop trigger
+    stop_price: Optional[str] = None
+    # STOP_TRIGGERED once a bracket's stop leg has fired
+    trigger_status: Optional[str] = None
+    # Set once cancel() has asked the exchange to cancel it; a later poll settles its final state
+    cancel_requested: bool = False
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINAL_ORDER_STATUSES
+
+
+class OrderManager:
+    """Asynchronous order submission and batched status tracking"""
+
+    def __init__(self, client, poll_interval: float = 1.0, workers: int = 8, background: bool = True,
+                 order_ids: ClientOrderIdGenerator = client_order_ids):
+        self.client = client
+        self.order_ids = order_ids
+        self.poll_interval = poll_interval
+        self.background = background
+        self._open = {}
+        # client_order_id -> order whose placement got no answer
+        self._unknown = {}
+        self._changed = threading.Condition()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._submitter = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='order-submit') if background else None
+        self._poller = None
+        self._listeners = []
+
+    def submit(self, product_id: str, side: str, size: str, limit_price: Optional[str] = None,
+               tag: Optional[str] = None, stop_price: Optional[str] = None,
+               client_order_id: Optional[str] = None) -> ManagedOrder:
+        """Queue an order for placement and return its tracking record immediately"""
+        # The id is fixed before placement, so the order can be found even if the response is lost
+        order = ManagedOrder(product_id, side.lower(), size, limit_price, tag,
+                             client_order_id or self.order_ids.next(), stop_price=stop_price)
+        if not self.background:
+            self._place(order)
+            self.poll()
+            return order
+
+        self._start_poller()
+        self._submitter.submit(self._place, order)
+        return order
+
+    def adopt(self, snapshot, tag: Optional[str] = None) -> ManagedOrder:
+        """Track an order that is already on the exchange, e.g. a bracket left by a previous run"""
+        configuration = _field(snapshot, 'order_configuration') or {}
+        settings = next(iter(configuration.values()), {}) if isinstance(configuration, dict) else {}
+        order = ManagedOrder(_field(snapshot, 'product_id'), (_field(snapshot, 'side') or '').lower(),
+                             settings.get('base_size'), settings.get('limit_price'), tag,
+                             _field(snapshot, 'client_order_id'), _field(snapshot, 'order_id'), status='OPEN',
+                             stop_price=settings.get('stop_trigger_price') or settings.get('stop_price'))
+        with self._changed:
+            self._open[order.order_id] = order
+        self.apply_updates([snapshot])
+        if self.background:
+            self._start_poller()
+        return order
+
+    def subscribe(self, callback: Callable[[ManagedOrder], None]) -> Callable[[], None]:
+        """Call callback(order) whenever an order reaches a final status; returns an unsubscribe function"""
+        with self._changed:
+            self._listeners = self._listeners + [callback]
+
+        def unsubscribe():
+            with self._changed:
+                self._listeners = [listener for listener in self._listeners if listener is not callback]
+        return unsubscribe
+
+    def _notify(self, finished: List[ManagedOrder]):
+        # Called outside the lock, so listeners may submit, cancel or wait on orders
+        for order in finished:
+            for listener in self._listeners:
+                try:
+                    listener(order)
+                except Exception as e:
+                    logger.error(f"Order listener failed for {order.order_id}: {e}")
+
+    def _start_poller(self):
+        with self._changed:
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll_loop, name='order-poller', daemon=True)
+                self._poller.start()
+
+    def submit_many(self, orders: Iterable[Dict]) -> List[ManagedOrder]:
+        """Queue several orders at once (rebalances, exits across pairs); they are placed concurrently"""
+        return [self.submit(order['product_id'], order['side'], order['size'], order.get('limit_price'),
+                            order.get('tag'), order.get('stop_price'), order.get('client_order_id'))
+                for order in orders]
+
+    def _place(self, order: ManagedOrder):
+        try:
+            if order.stop_price is not None:
+                response = self.client.place_bracket_order(order.product_id, order.size, order.limit_price,
+                                                           order.stop_price, client_order_id=order.client_order_id)
+            elif order.limit_price is None:
+                response = self.client.place_market_order(order.product_id, order.side, order.size,
+                                                          client_order_id=order.client_order_id)
+            else:
+                response = self.client.place_limit_order(order.product_id, order.side, order.size, order.limit_price,
+                                                         client_order_id=order.client_order_id)
+            order_id, error = parse_order_response(response)
+            # Only an explicit failure says the order was not placed
+            rejected = order_id is None and _field(response, 'success', True) is False
+        except Exception as e:
+            order_id, error, rejected = None, str(e), False
+
+        with self._changed:
+            order.error = error
+            if order_id or rejected:
+                self._unknown.pop(order.client_order_id, None)
+            if order_id:
+                order.order_id = order_id
+                order.status = 'OPEN'
+                self._open[order_id] = order
+            elif rejected:
+                self._finish(order, 'FAILED')
+            else:
+                order.status = 'UNKNOWN'
+                self._unknown[order.client_order_id] = order
+            self._changed.notify_all()
+        if rejected:
+            logger.error(f"{order.side} order for {order.product_id} was rejected: {error}")
+            self._notify([order])
+            return
+        if not order_id:
+            # Looked for, and resent, on the next poll
+            logger.warning(f"No answer placing {order.side} order {order.client_order_id} for {order.product_id} "
+                           f"({error}); looking for it on the exchange")
+            return
+        # Market orders usually fill at once; don't wait a whole poll interval to see it
+        self._wake.set()
+
+    def _finish(self, order: ManagedOrder, status: str):
+        order.status = status
+        self._open.pop(order.order_id, None)
+        ORDER_FILL_SECONDS.observe(time.monotonic() - order.submitted_at, side=order.side)
+
+    def apply_updates(self, orders: Iterable) -> int:
+        """Merge exchange order snapshots (list_orders or user channel); returns how many matched"""
+        matched = 0
+        finished = []
+        with self._changed:
+            for item in orders:
+                order = self._open.get(_field(item, 'order_id'))
+                if order is None:
+                    continue
+                matched += 1
+                order.filled_size = _float(_field(item, 'filled_size')) or 0.0
+                order.average_price = _float(_field(item, 'average_filled_price')) or order.average_price
+                order.fees = _float(_field(item, 'total_fees')) or 0.0
+                order.trigger_status = _field(item, 'trigger_status') or order.trigger_status
+                status = _field(item, 'status') or order.status
+                if status in FINAL_ORDER_STATUSES:
+                    self._finish(order, status)
+                    finished.append(order)
+                else:
+                    order.status = status
+            if matched:
+                self._changed.notify_all()
+        if any(order.filled_size > 0 for order in finished):
+            # Fills move balances; sizing must not read the cached pre-fill accounts
+            balances = getattr(self.client, 'balances', None)
+            if balances is not None:
+                balances.invalidate()
+        self._notify(finished)
+        return matched
+
+    def _resolve_unknown(self):
+        """Look for unanswered placements among their products' recent orders"""
+        with self._changed:
+            unknown = list(self._unknown.values())
+        if not unknown:
+            return
+        now, now_monotonic = time.time(), time.monotonic()
+        by_product = {}
+        for order in unknown:
+            by_product.setdefault(order.product_id, []).append(order)
+
+        found, failed, resend = [], [], []
+        for product_id, orders in by_product.items():
+            oldest = min(order.submitted_at for order in orders)
+            snapshots = self.client.list_recent_orders(
+                product_id, now - (now_monotonic - oldest) - UNKNOWN_ORDER_LOOKBACK)
+            if snapshots is None:
+                continue
+            by_client_id = {_field(item, 'client_order_id'): item for item in snapshots}
+            with self._changed:
+                for order in orders:
+                    snapshot = by_client_id.get(order.client_order_id)
+                    if snapshot is not None:
+                        del self._unknown[order.client_order_id]
+                        order.order_id = _field(snapshot, 'order_id')
+                        order.status = 'OPEN'
+                        order.error = None
+                        self._open[order.order_id] = order
+                        found.append(snapshot)
+                    elif now_monotonic - order.submitted_at > UNKNOWN_ORDER_TIMEOUT:
+                        del self._unknown[order.client_order_id]
+                        self._finish(order, 'FAILED')
+                        failed.append(order)
+                    else:
+                        resend.append(order)
+                self._changed.notify_all()
+
+        for order in failed:
+            logger.error(f"{order.side} order {order.client_order_id} for {order.product_id} was not found "
+                         f"on the exchange after {UNKNOWN_ORDER_TIMEOUT:.0f}s: {order.error}")
+        if found:
+            logger.info(f"Found {len(found)} order(s) whose placement response was lost")
+            self.apply_updates(found)
+        self._notify(failed)
+        # Not on the exchange yet: the same client_order_id either places it or returns the one already placed
+        for order in resend:
+            self._place(order)
+
+    def poll(self):
+        """Refresh every open order, in batches of STATUS_BATCH_SIZE ids per request"""
+        self._resolve_unknown()
+        with self._changed:
+            order_ids = list(self._open)
+        for start in range(0, len(order_ids), STATUS_BATCH_SIZE):
+            orders = self.client.get_orders(order_ids[start:start + STATUS_BATCH_SIZE])
+            if orders:
+                self.apply_updates(orders)
+
+    def _poll_loop(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if self._open or self._unknown:
+                try:
+                    self.poll()
+                except Exception as e:
+                    logger.error(f"Order status poll failed: {e}")
+
+    def wait(self, order: ManagedOrder, timeout: float = 30.0) -> bool:
+        """Block until the order reaches a final status; returns whether it did"""
+        deadline = time.monotonic() + timeout
+        while not order.done:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self.background:
+                with self._changed:
+                    if not order.done:
+                        self._changed.wait(remaining)
+            else:
+                time.sleep(min(remaining, self.poll_interval))
+                self.poll()
+        return True
+
+    def cancel(self, order: ManagedOrder, timeout: float = 10.0) -> bool:
+        """Cancel an order and wait for polling to see its final state; fills made before the cancel are kept"""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while order.order_id is None and not order.done and time.monotonic() < deadline:
+                self._changed.wait(deadline - time.monotonic())
+        if order.done:
+            return True
+        if order.order_id is None:
+            return False
+
+        with self._changed:
+            order.cancel_requested = True
+        self.client.cancel_orders([order.order_id])
+        # Read right away, the order may still show its pre-cancel state; a later poll sees whether
+        # the cancel won or the order filled first
+        return self.wait(order, max(0.0, deadline - time.monotonic()))
+
+    def open_orders(self) -> List[ManagedOrder]:
+        with self._changed:
+            return list(self._open.values())
+
+    def stop(self):
+        """Stop polling and finish queued submissions"""
+        self._stopped.set()
+        self._wake.set()
+        if self._submitter is not None:
+            self._submitter.shutdown(wait=True)
+        if self._poller is not None:
+            self._poller.join()
+            self._poller = None
@@ -0,0 +1,741 @@
+"""In-process simulated exchange for paper trading and offline load tests
+
+PaperExchange implements the subset of coinbase.rest.RESTClient that
+CoinbaseClient, TradingBotAdapter and TradeJournal call: accounts,
+products, best bid/ask, candles, order placement, order and fill
+listing and cancels. It can therefore stand in for the real client
+anywhere. Responses are dicts that also allow attribute access, like
+the SDK's response objects.
+
+Orders match against a per-product book:
+
+- market orders walk the book as takers, with taker fees and optional
+  extra slippage; liquidity they consume stays gone until the next
+  book update, so large orders move the price and can fill partially
+- limit orders take whatever crosses and rest the remainder; resting
+  orders fill as makers when later book updates cross them
+- stop-limit orders trigger when the last price crosses the stop
+- bracket orders rest at their take-profit limit and, once the last price
+  crosses the stop trigger, sell (or buy) whatever is left at market
+- balances carry holds for resting orders; orders the account cannot
+  pay for are rejected with INSUFFICIENT_FUND
+
+The book is driven by a feed: attach_hub() follows a MarketDataHub (a
+live MarketDataFeed, or a recorded session played through
+market_feed.ReplayServer), set_price()/set_book() take synthetic
+prices, and start_synthetic_feed() runs a random walk.
+"""
+
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Coinbase Advanced Trade entry-tier fee rates
+DEFAULT_MAKER_FEE = 0.004
+DEFAULT_TAKER_FEE = 0.006
+
+FINAL_STATUSES = ('FILLED', 'CANCELLED', 'EXPIRED', 'FAILED')
+
+GRANULARITY_SECONDS = {
+    'ONE_MINUTE': 60, 'FIVE_MINUTE': 300, 'FIFTEEN_MINUTE': 900, 'THIRTY_MINUTE': 1800,
+    'ONE_HOUR': 3600, 'TWO_HOUR': 7200, 'SIX_HOUR': 21600, 'ONE_DAY': 86400
+}
+
+# Sizes below this are float noise, not liquidity or unfilled quantity
+EPSILON = 1e-12
+
+# Fills are whole multiples of this, as with Coinbase's base_increment
+BASE_INCREMENT = 1e-8
+
+
+class PaperResponse(dict):
+    """dict with attribute access, mirroring the SDK's response objects"""
+
+    # No instance __dict__: callers that convert objects via vars()/__dict__ must see the dict itself
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+def _wrap(value):
+    if isinstance(value, dict):
+        return PaperResponse({key: _wrap(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_wrap(item) for item in value]
+    return value
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(timespec='microseconds').replace('+00:00', 'Z')
+
+
+def _parse_time(value) -> Optional[float]:
+    if value in (None, ''):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+
+
+def _amount(value) -> Optional[float]:
+    return float(value) if value not in (None, '') else None
+
+
+class PaperOrder:
+    """One order's terms, fill progress and remaining hold"""
+
+    def __init__(self, order_id: str, client_order_id: str, product_id: str, side: str,
+                 order_type: str, configuration: Dict, created: float):
+        self.order_id = order_id
+        self.client_order_id = client_order_id
+        self.product_id = product_id
+        self.side = side
+        self.order_type = order_type
+        self.configuration = configuration
+        self.created = created
+        settings = next(iter(configuration.values()))
+        self.time_in_force = 'IMMEDIATE_OR_CANCEL' if order_type == 'MARKET' else 'GOOD_UNTIL_CANCELLED'
+        self.base_size = _amount(settings.get('base_size'))
+        self.quote_size = _amount(settings.get('quote_size'))
+        self.limit_price = _amount(settings.get('limit_price'))
+        self.stop_price = _amount(settings.get('stop_price'))
+        self.stop_direction = settings.get('stop_direction')
+        self.stop_trigger_price = _amount(settings.get('stop_trigger_price'))
+        self.bracket_stopped = False
+        self.post_only = bool(settings.get('post_only'))
+        self.triggered = self.stop_price is None
+        self.status = 'OPEN'
+        self.filled_size = 0.0
+        self.filled_value = 0.0
+        self.total_fees = 0.0
+        self.number_of_fills = 0
+        self.last_fill_time = None
+        self.hold = 0.0
+
+    def remaining_base(self, price: float, fee_rate: float) -> float:
+        """Base units still wanted at this price"""
+        if self.base_size is not None:
+            return max(0.0, self.base_size - self.filled_size)
+        budget = self.quote_size - self.filled_value - self.total_fees
+        return max(0.0, budget / (price * (1 + fee_rate)))
+
+    @property
+    def done(self) -> bool:
+        if self.base_size is not None:
+            return self.filled_size >= self.base_size - EPSILON
+        # A quote-sized order is done once what is left of its budget buys less than one increment
+        return self.filled_size > 0 and self.remaining_base(self.filled_value / self.filled_size, 0.0) < BASE_INCREMENT
+
+    def to_dict(self) -> Dict:
+        if self.base_size:
+            completion = self.filled_size / self.base_size * 100
+        elif self.quote_size:
+            completion = (self.filled_value + self.total_fees) / self.quote_size * 100
+        else:
+            completion = 0.0
+        return {
+            'order_id': self.order_id,
+            'product_id': self.product_id,
+            'user_id': 'paper',
+            'order_configuration': self.configuration,
+            'side': self.side,
+            'client_order_id': self.client_order_id,
+            'status': self.status,
+            'time_in_force': self.time_in_force,
+            'created_time': _iso(self.created),
+            'completion_percentage': f"{min(completion, 100.0):.2f}",
+            'filled_size': repr(self.filled_size),
+            'average_filled_price': repr(self.filled_value / self.filled_size if self.filled_size else 0.0),
+            'number_of_fills': str(self.number_of_fills),
+            'filled_value': repr(self.filled_value),
+            'pending_cancel': False,
+            'size_in_quote': self.quote_size is not None,
+            'total_fees': repr(self.total_fees),
+            'size_inclusive_of_fees': self.quote_size is not None,
+            'total_value_after_fees': repr(self.filled_value + self.total_fees if self.side == 'BUY'
+                                           else self.filled_value - self.total_fees),
+            'trigger_status': ('STOP_TRIGGERED' if self.bracket_stopped or (self.stop_price is not None and self.triggered)
+                               else 'STOP_PENDING' if self.stop_price is not None or self.stop_trigger_price is not None
+                               else 'INVALID_ORDER_TYPE'),
+            'order_type': self.order_type,
+            'reject_reason': '',
+            'settled': self.status in FINAL_STATUSES,
+            'product_type': 'SPOT',
+            'outstanding_hold_amount': repr(self.hold),
+            'last_fill_time': _iso(self.last_fill_time)
+        }
+
+
+class PaperExchange:
+    """Matching-engine simulator behind the RESTClient interface"""
+
+    def __init__(self, balances: Optional[Dict[str, float]] = None,
+                 maker_fee_rate: float = DEFAULT_MAKER_FEE, taker_fee_rate: float = DEFAULT_TAKER_FEE,
+                 slippage: float = 0.0, latency: Union[float, Callable[[], float]] = 0.0,
+                 spread_bps: float = 2.0, depth_levels: int = 10, level_notional: float = 50_000.0,
+                 clock: Callable[[], float] = time.time):
+        self.maker_fee_rate = maker_fee_rate
+        self.taker_fee_rate = taker_fee_rate
+        # Extra fractional price slippage applied to taker fills, on top of walking the book
+        self.slippage = slippage
+        # Seconds each call waits before it is served (a number, or a callable for jitter)
+        self.latency = latency
+        # Shape of the synthetic book built around prices that arrive without level 2 data
+        self.spread_bps = spread_bps
+        self.depth_levels = depth_levels
+        self.level_notional = level_notional
+        self.clock = clock
+        self.stats = {'orders': 0, 'rejected': 0, 'fills': 0, 'cancels': 0}
+
+        self._balances = {currency: [float(amount), 0.0]
+                          for currency, amount in (balances or {'USDC': 10_000.0}).items()}
+        self._books = {}
+        self._last_prices = {}
+        self._level2 = set()
+        self._candles = {}
+        self._orders = {}
+        self._order_sequence = []
+        self._open = {}
+        self._client_ids = {}
+        self._fills = []
+        self._trade_ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._feed_thread = None
+        self._feed_stop = threading.Event()
+
+    # Feeds
+
+    def _delay(self):
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency > 0:
+            time.sleep(latency)
+
+    def _synthetic_book(self, price: float, best_bid: Optional[float], best_ask: Optional[float]) -> Dict:
+        half_spread = price * self.spread_bps / 20_000
+        bid = best_bid if best_bid else price - half_spread
+        ask = best_ask if best_ask else price + half_spread
+        step = price * self.spread_bps / 10_000
+        size = self.level_notional / price
+        return {
+            'bids': [[bid - i * step, size] for i in range(self.depth_levels)],
+            'asks': [[ask + i * step, size] for i in range(self.depth_levels)]
+        }
+
+    def _record_price(self, product_id: str, price: float):
+        self._last_prices[product_id] = price
+        minute = int(self.clock()) // 60 * 60
+        candles = self._candles.setdefault(product_id, {})
+        candle = candles.get(minute)
+        if candle is None:
+            candles[minute] = [price, price, price, price, 0.0]
+        else:
+            candle[1] = max(candle[1], price)
+            candle[2] = min(candle[2], price)
+            candle[3] = price
+
+    def set_price(self, product_id: str, price: float, best_bid: Optional[float] = None,
+                  best_ask: Optional[float] = None):
+        """New last price; rebuilds the synthetic book unless level 2 data drives this product"""
+        with self._lock:
+            self._record_price(product_id, price)
+            if product_id not in self._level2 or product_id not in self._books:
+                self._books[product_id] = self._synthetic_book(price, best_bid, best_ask)
+            self._match_open(product_id)
+
+    def set_book(self, product_id: str, bids: Iterable, asks: Iterable):
+        """Replace the book with explicit (price, size) levels"""
+        with self._lock:
+            self._level2.add(product_id)
+            self._books[product_id] = {
+                'bids': sorted(([float(p), float(s)] for p, s in bids), key=lambda level: -level[0]),
+                'asks': sorted(([float(p), float(s)] for p, s in asks), key=lambda level: level[0])
+            }
+            if product_id not in self._last_prices:
+                book = self._books[product_id]
+                if book['bids'] and book['asks']:
+                    self._record_price(product_id, (book['bids'][0][0] + book['asks'][0][0]) / 2)
+            self._match_open(product_id)
+
+    def attach_hub(self, hub, depth: int = 50) -> Callable[[], None]:
+        """Follow a MarketDataHub's tickers and level 2 books; returns an unsubscribe function"""
+        def on_update(channel, product_id, data):
+            if channel == 'level2':
+                book = hub.books.get(product_id)
+                if book is not None and book.bids and book.asks:
+                    top = book.top(depth)
+                    self.set_book(product_id, top['bids'], top['asks'])
+            elif channel == 'ticker' and data.get('price'):
+                self.set_price(product_id, data['price'], data.get('best_bid'), data.get('best_ask'))
+        return hub.subscribe(on_update, channels=['ticker', 'level2'])
+
+    def start_synthetic_feed(self, prices: Dict[str, float], interval: float = 1.0,
+                             volatility: float = 0.001, seed: Optional[int] = None) -> 'PaperExchange':
+        """Random-walk the given products' prices on a background thread"""
+        rng = random.Random(seed)
+        prices = dict(prices)
+        for product_id, price in prices.items():
+            self.set_price(product_id, price)
+
+        def run():
+            while not self._feed_stop.wait(interval):
+                for product_id in prices:
+                    prices[product_id] *= 1 + rng.gauss(0, volatility)
+                    self.set_price(product_id, prices[product_id])
+
+        self._feed_stop.clear()
+        self._feed_thread = threading.Thread(target=run, name='paper-feed', daemon=True)
+        self._feed_thread.start()
+        return self
+
+    def stop(self):
+        self._feed_stop.set()
+        if self._feed_thread is not None:
+            self._feed_thread.join()
+            self._feed_thread = None
+
+    # Matching
+
+    def _balance(self, currency: str) -> List[float]:
+        return self._balances.setdefault(currency, [0.0, 0.0])
+
+    def _fee_rate(self, liquidity: str) -> float:
+        return self.maker_fee_rate if liquidity == 'MAKER' else self.taker_fee_rate
+
+    def _affordable(self, order: PaperOrder, price: float, size: float, fee_rate: float) -> float:
+        base, quote = order.product_id.split('-')
+        if order.side == 'BUY':
+            funds = self._balance(quote)[0] + order.hold
+            return min(size, funds / (price * (1 + fee_rate)))
+        return min(size, self._balance(base)[0] + order.hold)
+
+    def _fill(self, order: PaperOrder, price: float, size: float, liquidity: str):
+        base, quote = order.product_id.split('-')
+        notional = price * size
+        fee = notional * self._fee_rate(liquidity)
+        if order.side == 'BUY':
+            cost = notional + fee
+            from_hold = min(cost, order.hold)
+            order.hold -= from_hold
+            self._balance(quote)[1] -= from_hold
+            self._balance(quote)[0] -= cost - from_hold
+            self._balance(base)[0] = round(self._balance(base)[0] + size, 8)
+        else:
+            from_hold = min(size, order.hold)
+            order.hold = round(order.hold - from_hold, 8)
+            self._balance(base)[1] = round(self._balance(base)[1] - from_hold, 8)
+            self._balance(base)[0] = round(self._balance(base)[0] - (size - from_hold), 8)
+            self._balance(quote)[0] += notional - fee
+
+        now = self.clock()
+        order.filled_size = round(order.filled_size + size, 8)
+        order.filled_value += notional
+        order.total_fees += fee
+        order.number_of_fills += 1
+        order.last_fill_time = now
+        trade_id = str(next(self._trade_ids))
+        self._fills.append({
+            'entry_id': trade_id,
+            'trade_id': trade_id,
+            'order_id': order.order_id,
+            'trade_time': _iso(now),
+            'trade_type': 'FILL',
+            'price': repr(price),
+            'size': repr(size),
+            'commission': repr(fee),
+            'product_id': order.product_id,
+            'sequence_timestamp': _iso(now),
+            'liquidity_indicator': liquidity,
+            'size_in_quote': False,
+            'user_id': 'paper',
+            'side': order.side
+        })
+        candle = self._candles.get(order.product_id, {}).get(int(now) // 60 * 60)
+        if candle is not None:
+            candle[4] += size
+        self.stats['fills'] += 1
+
+    def _take(self, order: PaperOrder, liquidity: str = 'TAKER'):
+        """Fill against the opposite side of the book up to the order's size, limit and funds"""
+        book = self._books.get(order.product_id)
+        if not book:
+            return
+        buying = order.side == 'BUY'
+        levels = book['asks'] if buying else book['bids']
+        fee_rate = self._fee_rate(liquidity)
+        for level in levels:
+            price, available = level
+            if available < BASE_INCREMENT:
+                continue
+            if order.limit_price is not None and (price > order.limit_price if buying else price < order.limit_price):
+                break
+            if liquidity == 'MAKER':
+                fill_price = order.limit_price
+            else:
+                fill_price = price * (1 + self.slippage) if buying else price * (1 - self.slippage)
+            size = self._affordable(order, fill_price, min(available, order.remaining_base(fill_price, fee_rate)), fee_rate)
+            size = round(math.floor(size / BASE_INCREMENT + 1e-6) * BASE_INCREMENT, 8)
+            if size <= EPSILON:
+                break
+            level[1] -= size
+            self._fill(order, fill_price, size, liquidity)
+            if order.done:
+                break
+        book['asks' if buying else 'bids'] = [level for level in levels if level[1] >= BASE_INCREMENT]
+
+    def _finish(self, order: PaperOrder, status: str):
+        """Close an order and return whatever it still holds"""
+        order.status = status
+        if order.hold:
+            base, quote = order.product_id.split('-')
+            balance = self._balance(quote if order.side == 'BUY' else base)
+            balance[0] += order.hold
+            balance[1] -= order.hold
+            order.hold = 0.0
+        self._open.pop(order.order_id, None)
+
+    def _crossed_stop(self, order: PaperOrder, price: float) -> bool:
+        if order.stop_direction == 'STOP_DIRECTION_STOP_UP':
+            return price >= order.stop_price
+        return price <= order.stop_price
+
+    def _match_open(self, product_id: str):
+        """Trigger stops and fill resting orders that the latest book now crosses"""
+        price = self._last_prices.get(product_id)
+        for order in [order for order in self._open.values() if order.product_id == product_id]:
+            if order.stop_trigger_price is not None and price is not None and (
+                    price <= order.stop_trigger_price if order.side == 'SELL' else price >= order.stop_trigger_price):
+                # The bracket's stop leg: the rest of the order goes out at market
+                order.bracket_stopped = True
+                order.limit_price = None
+                order.stop_trigger_price = None
+                self._take(order)
+                self._finish(order, 'FILLED' if order.done else 'CANCELLED')
+                continue
+            if not order.triggered:
+                if price is None or not self._crossed_stop(order, price):
+                    continue
+                order.triggered = True
+                self._take(order)
+            else:
+                self._take(order, liquidity='MAKER')
+            if order.done:
+                self._finish(order, 'FILLED')
+
+    # Orders
+
+    def _reject(self, configuration: Dict, error: str, message: str) -> PaperResponse:
+        self.stats['rejected'] += 1
+        return _wrap({
+            'success': False,
+            'failure_reason': 'UNKNOWN_FAILURE_REASON',
+            'order_id': '',
+            'error_response': {'error': error, 'message': message, 'error_details': '',
+                               'preview_failure_reason': error},
+            'order_configuration': configuration
+        })
+
+    def _accepted(self, order: PaperOrder) -> PaperResponse:
+        return _wrap({
+            'success': True,
+            'failure_reason': 'UNKNOWN_FAILURE_REASON',
+            'order_id': order.order_id,
+            'success_response': {'order_id': order.order_id, 'product_id': order.product_id,
+                                 'side': order.side, 'client_order_id': order.client_order_id},
+            'order_configuration': order.configuration
+        })
+
+    def create_order(self, client_order_id: str, product_id: str, side: str, order_configuration: Dict,
+                     **kwargs) -> PaperResponse:
+        self._delay()
+        side = side.upper()
+        order_types = {'market_market_ioc': 'MARKET', 'limit_limit_gtc': 'LIMIT',
+                       'stop_limit_stop_limit_gtc': 'STOP_LIMIT', 'trigger_bracket_gtc': 'BRACKET'}
+        kind = next(iter(order_configuration), None)
+        with self._lock:
+            # Coinbase treats a repeated client_order_id as the same order
+            existing = self._client_ids.get(client_order_id)
+            if existing is not None:
+                return self._accepted(self._orders[existing])
+            if kind not in order_types or len(order_configuration) != 1:
+                return self._reject(order_configuration, 'UNSUPPORTED_ORDER_CONFIGURATION',
+                                    f"Unsupported order configuration {kind}")
+            if product_id not in self._books:
+                return self._reject(order_configuration, 'INVALID_PRODUCT_ID', f"No market data for {product_id}")
+
+            order = PaperOrder(str(uuid.uuid4()), client_order_id, product_id, side,
+                               order_types[kind], order_configuration, self.clock())
+            if order.base_size is None and order.quote_size is None:
+                return self._reject(order_configuration, 'INVALID_SIZE', 'base_size or quote_size is required')
+            if order.order_type != 'MARKET' and (order.base_size is None or order.limit_price is None):
+                return self._reject(order_configuration, 'INVALID_LIMIT_PRICE', 'base_size and limit_price are required')
+
+            base, quote = product_id.split('-')
+            book = self._books[product_id]
+            if order.order_type == 'MARKET':
+                if side == 'BUY' and order.quote_size is not None and order.quote_size > self._balance(quote)[0] + EPSILON:
+                    return self._reject(order_configuration, 'INSUFFICIENT_FUND', 'Insufficient balance in source account')
+                if side == 'SELL' and order.base_size is not None and order.base_size > self._balance(base)[0] + EPSILON:
+                    return self._reject(order_configuration, 'INSUFFICIENT_FUND', 'Insufficient balance in source account')
+            else:
+                if order.post_only and order.triggered:
+                    opposite = book['asks'] if side == 'BUY' else book['bids']
+                    if opposite and (opposite[0][0] <= order.limit_price if side == 'BUY' else opposite[0][0] >= order.limit_price):
+                        return self._reject(order_configuration, 'INVALID_LIMIT_PRICE_POST_ONLY',
+                                            'Post-only order would cross the book')
+                # Resting orders reserve their worst-case cost
+                hold_currency, hold = ((quote, order.base_size * order.limit_price * (1 + self.taker_fee_rate))
+                                       if side == 'BUY' else (base, order.base_size))
+                balance = self._balance(hold_currency)
+                if hold > balance[0] + EPSILON:
+                    return self._reject(order_configuration, 'INSUFFICIENT_FUND', 'Insufficient balance in source account')
+                hold = min(hold, balance[0])
+                balance[0] -= hold
+                balance[1] += hold
+                order.hold = hold
+
+            self.stats['orders'] += 1
+            self._orders[order.order_id] = order
+            self._order_sequence.append(order.order_id)
+            if client_order_id:
+                self._client_ids[client_order_id] = order.order_id
+
+            if order.order_type == 'MARKET':
+                self._take(order)
+                self._finish(order, 'FILLED' if order.done else 'CANCELLED')
+            else:
+                self._open[order.order_id] = order
+                if order.triggered and not order.post_only:
+                    self._take(order)
+                elif not order.triggered and product_id in self._last_prices:
+                    self._match_open(product_id)
+                if order.done:
+                    self._finish(order, 'FILLED')
+            return self._accepted(order)
+
+    def market_order_buy(self, client_order_id: str, product_id: str, quote_size: Optional[str] = None,
+                         base_size: Optional[str] = None, **kwargs) -> PaperResponse:
+        settings = {'quote_size': quote_size} if quote_size else {'base_size': base_size}
+        return self.create_order(client_order_id, product_id, 'BUY', {'market_market_ioc': settings})
+
+    def market_order_sell(self, client_order_id: str, product_id: str, base_size: Optional[str] = None,
+                          quote_size: Optional[str] = None, **kwargs) -> PaperResponse:
+        settings = {'base_size': base_size} if base_size else {'quote_size': quote_size}
+        return self.create_order(client_order_id, product_id, 'SELL', {'market_market_ioc': settings})
+
+    def limit_order_gtc_buy(self, client_order_id: str, product_id: str, base_size: str, limit_price: str,
+                            post_only: bool = False, **kwargs) -> PaperResponse:
+        return self.create_order(client_order_id, product_id, 'BUY', {'limit_limit_gtc': {
+            'base_size': base_size, 'limit_price': limit_price, 'post_only': post_only}})
+
+    def limit_order_gtc_sell(self, client_order_id: str, product_id: str, base_size: str, limit_price: str,
+                             post_only: bool = False, **kwargs) -> PaperResponse:
+        return self.create_order(client_order_id, product_id, 'SELL', {'limit_limit_gtc': {
+            'base_size': base_size, 'limit_price': limit_price, 'post_only': post_only}})
+
+    def stop_limit_order_gtc_buy(self, client_order_id: str, product_id: str, base_size: str, limit_price: str,
+                                 stop_price: str, stop_direction: str, **kwargs) -> PaperResponse:
+        return self.create_order(client_order_id, product_id, 'BUY', {'stop_limit_stop_limit_gtc': {
+            'base_size': base_size, 'limit_price': limit_price, 'stop_price': stop_price,
+            'stop_direction': stop_direction}})
+
+    def stop_limit_order_gtc_sell(self, client_order_id: str, product_id: str, base_size: str, limit_price: str,
+                                  stop_price: str, stop_direction: str, **kwargs) -> PaperResponse:
+        return self.create_order(client_order_id, product_id, 'SELL', {'stop_limit_stop_limit_gtc': {
+            'base_size': base_size, 'limit_price': limit_price, 'stop_price': stop_price,
+            'stop_direction': stop_direction}})
+
+    def trigger_bracket_order_gtc_buy(self, client_order_id: str, product_id: str, base_size: str,
+                                      limit_price: str, stop_trigger_price: str, **kwargs) -> PaperResponse:
+        return self.create_order(client_order_id, product_id, 'BUY', {'trigger_bracket_gtc': {
+            'base_size': base_size, 'limit_price': limit_price, 'stop_trigger_price': stop_trigger_price}})
+
+    def trigger_bracket_order_gtc_sell(self, client_order_id: str, product_id: str, base_size: str,
+                                       limit_price: str, stop_trigger_price: str, **kwargs) -> PaperResponse:
+        return self.create_order(client_order_id, product_id, 'SELL', {'trigger_bracket_gtc': {
+            'base_size': base_size, 'limit_price': limit_price, 'stop_trigger_price': stop_trigger_price}})
+
+    def cancel_orders(self, order_ids: List[str], **kwargs) -> PaperResponse:
+        self._delay()
+        results = []
+        with self._lock:
+            for order_id in order_ids:
+                order = self._open.get(order_id)
+                if order is None:
+                    reason = 'UNKNOWN_CANCEL_ORDER' if order_id not in self._orders else 'DUPLICATE_CANCEL_REQUEST'
+                    results.append({'success': False, 'failure_reason': reason, 'order_id': order_id})
+                    continue
+                self._finish(order, 'CANCELLED')
+                self.stats['cancels'] += 1
+                results.append({'success': True, 'failure_reason': 'UNKNOWN_CANCEL_FAILURE_REASON', 'order_id': order_id})
+        return _wrap({'results': results})
+
+    def get_order(self, order_id: str, **kwargs) -> PaperResponse:
+        self._delay()
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None:
+                raise KeyError(f"Order {order_id} not found")
+            return _wrap({'order': order.to_dict()})
+
+    @staticmethod
+    def _page(items: List[Dict], limit: Optional[int], cursor: Optional[str]) -> Dict:
+        start = int(cursor) if cursor else 0
+        end = start + limit if limit else len(items)
+        return {'has_next': end < len(items), 'cursor': str(end) if end < len(items) else ''}, items[start:end]
+
+    def list_orders(self, order_ids: Optional[List[str]] = None, product_ids: Optional[List[str]] = None,
+                    order_status: Optional[List[str]] = None, limit: Optional[int] = None,
+                    start_date: Optional[str] = None, end_date: Optional[str] = None,
+                    order_side: Optional[str] = None, cursor: Optional[str] = None,
+                    product_id: Optional[str] = None, **kwargs) -> PaperResponse:
+        self._delay()
+        start, end = _parse_time(start_date), _parse_time(end_date)
+        products = set(product_ids or []) | ({product_id} if product_id else set())
+        with self._lock:
+            candidates = ([self._orders[order_id] for order_id in order_ids if order_id in self._orders]
+                          if order_ids else [self._orders[order_id] for order_id in reversed(self._order_sequence)])
+            orders = [
+                order.to_dict() for order in candidates
+                if (not products or order.product_id in products)
+                and (not order_status or order.status in order_status)
+                and (not order_side or order.side == order_side.upper())
+                and (start is None or order.created >= start)
+                and (end is None or order.created < end)
+            ]
+        page, orders = self._page(orders, limit, cursor)
+        return _wrap(dict(page, orders=orders, sequence='0'))
+
+    def get_fills(self, order_ids: Optional[List[str]] = None, trade_ids: Optional[List[str]] = None,
+                  product_ids: Optional[List[str]] = None, start_sequence_timestamp: Optional[str] = None,
+                  end_sequence_timestamp: Optional[str] = None, limit: Optional[int] = None,
+                  cursor: Optional[str] = None, order_id: Optional[str] = None,
+                  product_id: Optional[str] = None, **kwargs) -> PaperResponse:
+        self._delay()
+        orders = set(order_ids or []) | ({order_id} if order_id else set())
+        products = set(product_ids or []) | ({product_id} if product_id else set())
+        trades = set(trade_ids or [])
+        start, end = _parse_time(start_sequence_timestamp), _parse_time(end_sequence_timestamp)
+        with self._lock:
+            fills = [
+                fill for fill in reversed(self._fills)
+                if (not orders or fill['order_id'] in orders)
+                and (not products or fill['product_id'] in products)
+                and (not trades or fill['trade_id'] in trades)
+                and (start is None or _parse_time(fill['sequence_timestamp']) >= start)
+                and (end is None or _parse_time(fill['sequence_timestamp']) < end)
+            ]
+        page, fills = self._page(fills, limit, cursor)
+        return _wrap(dict(page, fills=fills))
+
+    # Accounts and market data
+
+    def get_accounts(self, limit: Optional[int] = None, cursor: Optional[str] = None, **kwargs) -> PaperResponse:
+        self._delay()
+        with self._lock:
+            accounts = [{
+                'uuid': f"paper-{currency.lower()}",
+                'name': f"{currency} Wallet",
+                'currency': currency,
+                'available_balance': {'value': repr(available), 'currency': currency},
+                'hold': {'value': repr(hold), 'currency': currency},
+                'default': True,
+                'active': True,
+                'type': 'ACCOUNT_TYPE_FIAT' if currency in ('USD', 'USDC') else 'ACCOUNT_TYPE_CRYPTO',
+                'ready': True
+            } for currency, (available, hold) in sorted(self._balances.items())]
+        page, accounts = self._page(accounts, limit, cursor)
+        return _wrap(dict(page, accounts=accounts, size=len(accounts)))
+
+    def get_portfolios(self, **kwargs) -> PaperResponse:
+        self._delay()
+        return _wrap({'portfolios': [{'name': 'Paper', 'uuid': 'paper', 'type': 'DEFAULT', 'deleted': False}]})
+
+    def _product(self, product_id: str) -> Dict:
+        base, quote = product_id.split('-')
+        price = self._last_prices.get(product_id, 0.0)
+        return {
+            'product_id': product_id,
+            'price': repr(price),
+            'base_currency_id': base,
+            'quote_currency_id': quote,
+            'base_increment': format(BASE_INCREMENT, '.8f'),
+            'quote_increment': '0.01',
+            'base_min_size': '0.00000001',
+            'quote_min_size': '1',
+            'status': 'online',
+            'product_type': 'SPOT',
+            'trading_disabled': False
+        }
+
+    def get_product(self, product_id: str, **kwargs) -> PaperResponse:
+        self._delay()
+        with self._lock:
+            if product_id not in self._books:
+                raise KeyError(f"Product {product_id} not found")
+            return _wrap(self._product(product_id))
+
+    def get_products(self, **kwargs) -> PaperResponse:
+        self._delay()
+        with self._lock:
+            products = [self._product(product_id) for product_id in sorted(self._books)]
+        return _wrap({'products': products, 'num_products': len(products)})
+
+    def get_best_bid_ask(self, product_ids: Optional[List[str]] = None, **kwargs) -> PaperResponse:
+        self._delay()
+        with self._lock:
+            pricebooks = []
+            for product_id in (product_ids or sorted(self._books)):
+                book = self._books.get(product_id)
+                if not book:
+                    continue
+                pricebooks.append({
+                    'product_id': product_id,
+                    'bids': [{'price': repr(price), 'size': repr(size)} for price, size in book['bids'][:1]],
+                    'asks': [{'price': repr(price), 'size': repr(size)} for price, size in book['asks'][:1]],
+                    'time': _iso(self.clock())
+                })
+        return _wrap({'pricebooks': pricebooks})
+
+    def get_candles(self, product_id: str, start: str, end: str, granularity: str = 'ONE_MINUTE',
+                    limit: Optional[int] = None, **kwargs) -> PaperResponse:
+        self._delay()
+        seconds = GRANULARITY_SECONDS.get(granularity, 60)
+        start, end = _parse_time(start), _parse_time(end)
+        buckets = {}
+        with self._lock:
+            for minute, (open_, high, low, close, volume) in sorted(self._candles.get(product_id, {}).items()):
+                if minute < start or minute >= end:
+                    continue
+                bucket = buckets.get(minute // seconds * seconds)
+                if bucket is None:
+                    buckets[minute // seconds * seconds] = [open_, high, low, close, volume]
+                else:
+                    bucket[1], bucket[2] = max(bucket[1], high), min(bucket[2], low)
+                    bucket[3], bucket[4] = close, bucket[4] + volume
+        candles = [{'start': str(bucket_start), 'low': repr(low), 'high': repr(high), 'open': repr(open_),
+                    'close': repr(close), 'volume': repr(volume)}
+                   for bucket_start, (open_, high, low, close, volume) in sorted(buckets.items(), reverse=True)]
+        return _wrap({'candles': candles[:limit] if limit else candles})
+
+    def balances(self) -> Dict[str, Dict[str, float]]:
+        """Available and held amount per currency"""
+        with self._lock:
+            return {currency: {'available': available, 'hold': hold}
+                    for currency, (available, hold) in self._balances.items()}
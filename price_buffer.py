@@ -0,0 +1,94 @@
+"""Fixed-capacity price history backed by preallocated numpy arrays
+
+Used by TradingBot for its indicator window and by the backend for the
+per-pair chart histories. Every value is written twice, at i and at
+i + capacity, so the newest n points are always one contiguous slice and
+window reads are zero-copy views rather than new lists.
+"""
+
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class PriceRingBuffer:
+    """Ring buffer of (epoch-ns timestamp, price) pairs"""
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._prices = np.zeros(2 * capacity, dtype=np.float64)
+        self._times = np.zeros(2 * capacity, dtype=np.int64)
+        self._next = 0
+        self._size = 0
+        # Incremented on every append so callers can cache derived data
+        self.version = 0
+
+    def append(self, price: float, timestamp_ns: Optional[int] = None):
+        """Add a price; the oldest point is overwritten once the buffer is full"""
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+        index = self._next
+        mirror = index + self.capacity
+        self._prices[index] = self._prices[mirror] = price
+        self._times[index] = self._times[mirror] = timestamp_ns
+        self._next = (index + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        self.version += 1
+
+    def extend(self, prices, timestamps_ns=None):
+        """Append many points in order"""
+        if timestamps_ns is None:
+            for price in prices:
+                self.append(price)
+        else:
+            for price, timestamp_ns in zip(prices, timestamps_ns):
+                self.append(price, timestamp_ns)
+
+    def clear(self):
+        self._next = 0
+        self._size = 0
+        self.version += 1
+
+    def _window(self, n: Optional[int]) -> slice:
+        count = self._size if n is None else max(0, min(n, self._size))
+        end = self._next + self.capacity
+        return slice(end - count, end)
+
+    def prices(self, n: Optional[int] = None) -> np.ndarray:
+        """Read-only view of the newest n prices (all when n is None), oldest first"""
+        view = self._prices[self._window(n)]
+        view.flags.writeable = False
+        return view
+
+    def timestamps(self, n: Optional[int] = None) -> np.ndarray:
+        """Read-only view of the newest n epoch-ns timestamps, oldest first"""
+        view = self._times[self._window(n)]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def latest(self) -> Optional[float]:
+        if not self._size:
+            return None
+        return float(self._prices[self._next + self.capacity - 1])
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, key):
+        return self.prices()[key]
+
+    def __iter__(self):
+        return iter(self.prices().tolist())
+
+    def to_payload(self, n: Optional[int] = None) -> Dict[str, List]:
+        """Compact columnar form: epoch-ms timestamps and prices"""
+        window = self._window(n)
+        return {
+            't': (self._times[window] // 1_000_000).tolist(),
+            'p': self._prices[window].tolist()
+        }
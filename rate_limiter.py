@@ -0,0 +1,135 @@
+"""Token-bucket rate limiting with named per-endpoint budgets
+
+Buckets refill continuously at `rate` tokens per second up to `capacity`
+(the burst size). Callers reserve tokens up front and then sleep for the
+returned delay, so waiting never holds the lock: many threads, or
+coroutines via acquire_async, can share one limiter. When the exchange
+answers 429 the bucket halves its rate and then recovers additively
+back to its configured rate.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# Coinbase Advanced Trade limits: public endpoints 10 req/s per IP,
+# private endpoints 30 req/s per key. Values are (rate, burst capacity).
+COINBASE_BUDGETS = {
+    'public': (10.0, 10),
+    'private': (30.0, 30)
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket with adaptive back-off"""
+
+    def __init__(self, rate: float, capacity: float, min_rate: Optional[float] = None,
+                 recovery_per_second: Optional[float] = None):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        # Additive increase back toward base_rate after a 429
+        self.recovery_per_second = recovery_per_second if recovery_per_second is not None else rate / 20
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate + self.recovery_per_second * elapsed)
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def reserve(self, tokens: float = 1, max_wait: Optional[float] = None) -> Optional[float]:
+        """Take tokens now and return how long to wait before using them
+
+        Returns None, without taking anything, if the wait would exceed
+        max_wait.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            deficit = tokens - self.tokens
+            wait = deficit / self.rate if deficit > 0 else 0.0
+            if max_wait is not None and wait > max_wait:
+                return None
+            # Tokens may go negative: later callers queue behind this reservation
+            self.tokens -= tokens
+            return wait
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take tokens only if they are available immediately"""
+        return self.reserve(tokens, max_wait=0) is not None
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """Block until tokens are available; False if that would exceed timeout"""
+        wait = self.reserve(tokens, max_wait=timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def acquire_async(self, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        """Coroutine version of acquire() that yields to the event loop while waiting"""
+        wait = self.reserve(tokens, max_wait=timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def penalize(self, retry_after: Optional[float] = None):
+        """Slow down after the server rejected a request with 429"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.throttled += 1
+            # Drain the bucket; honour Retry-After by going into debt for that long
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after:
+                self.tokens = min(self.tokens, -retry_after * self.rate)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                'rate': round(self.rate, 3),
+                'base_rate': self.base_rate,
+                'capacity': self.capacity,
+                'tokens': round(self.tokens, 3),
+                'throttled': self.throttled
+            }
+
+
+class RateLimiter:
+    """A set of named token buckets, one per endpoint class"""
+
+    def __init__(self, budgets: Dict[str, Tuple[float, float]]):
+        self.buckets = {name: TokenBucket(rate, capacity) for name, (rate, capacity) in budgets.items()}
+
+    def bucket(self, name: str) -> TokenBucket:
+        try:
+            return self.buckets[name]
+        except KeyError:
+            raise ValueError(f"Unknown rate limit budget: {name}")
+
+    def acquire(self, name: str, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        return self.bucket(name).acquire(tokens, timeout)
+
+    async def acquire_async(self, name: str, tokens: float = 1, timeout: Optional[float] = None) -> bool:
+        return await self.bucket(name).acquire_async(tokens, timeout)
+
+    def on_rate_limited(self, name: str, retry_after: Optional[float] = None):
+        self.bucket(name).penalize(retry_after)
+
+    def stats(self) -> Dict:
+        return {name: bucket.snapshot() for name, bucket in self.buckets.items()}
+
+
+# Limits are per API key and per IP, so every CoinbaseClient in the process shares this
+coinbase_rate_limiter = RateLimiter(COINBASE_BUDGETS)
@@ -105,15 +105,16 @@ const CryptoDashboard = () => {
   };
 
   const getChartData = (crypto) => {
-    if (!crypto || !crypto.price_history || crypto.price_history.length === 0) {
+    // price_history is columnar: t (epoch ms) and p (prices)
+    if (!crypto || !crypto.price_history || !crypto.price_history.p || crypto.price_history.p.length === 0) {
       return null;
     }
 
     return {
-      labels: crypto.price_history.map((_, index) => index.toString()),
+      labels: crypto.price_history.p.map((_, index) => index.toString()),
       datasets: [
         {
-          data: crypto.price_history.map(point => point.price),
+          data: crypto.price_history.p,
           borderColor: crypto.change_24h >= 0 ? '#10B981' : '#EF4444',
           backgroundColor: `${crypto.change_24h >= 0 ? '#10B981' : '#EF4444'}20`,
           borderWidth: 2,
@@ -113,6 +113,14 @@ const TradingDashboard = () => {
       }
     });
 
+    // Streamed BTC price between the 30s bot updates
+    socketService.on('ticker_update', (tickers) => {
+      const ticker = tickers['BTC-USDC'];
+      if (ticker && ticker.price) {
+        setBotData(prev => ({ ...prev, currentPrice: ticker.price }));
+      }
+    });
+
     // Fallback: Fetch data directly from API if WebSocket fails
     const fetchData = async () => {
       try {
@@ -171,6 +179,7 @@ const TradingDashboard = () => {
       socketService.off('disconnect');
       socketService.off('connect_error');
       socketService.off('bot_update');
+      socketService.off('ticker_update');
       socketService.disconnect();
     };
   }, []);
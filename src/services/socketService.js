@@ -1,9 +1,72 @@
 import io from 'socket.io-client';
 
+// State-sync channels and the events components subscribe to for each
+const CHANNEL_EVENTS = {
+  bot: 'bot_update',
+  sentiment: 'sentiment_update',
+  whales: 'whale_update',
+  crypto: 'crypto_update',
+  portfolio: 'portfolio_update',
+  tickers: 'ticker_update'
+};
+const STATE_EVENTS = new Set(Object.values(CHANNEL_EVENTS));
+
+const shallowCopy = (node) => (Array.isArray(node) ? [...node] : { ...node });
+
+// Copy every container from the root down to the one at `path`, reusing copies already made in this batch.
+// Returns the new root and the copied container, so writes never touch state a component already holds.
+function copyPath(root, path, fresh) {
+  const own = (node) => {
+    if (node === null || typeof node !== 'object') {
+      throw new Error(`No container at ${path.join('.')}`);
+    }
+    if (fresh.has(node)) {
+      return node;
+    }
+    const copy = shallowCopy(node);
+    fresh.add(copy);
+    return copy;
+  };
+  root = own(root);
+  let node = root;
+  for (const key of path) {
+    node = node[key] = own(node[key]);
+  }
+  return [root, node];
+}
+
+// Ops never mutate the state they are given, so every container they touch, and each one above it, is a new object
+function applyOps(state, ops) {
+  const fresh = new WeakSet();
+  for (const op of ops) {
+    const [type, path] = op;
+    if (type === 'set' && path.length === 0) {
+      state = op[2];
+    } else if (type === 'set') {
+      const [root, parent] = copyPath(state, path.slice(0, -1), fresh);
+      parent[path[path.length - 1]] = op[2];
+      state = root;
+    } else if (type === 'del') {
+      const [root, parent] = copyPath(state, path.slice(0, -1), fresh);
+      delete parent[path[path.length - 1]];
+      state = root;
+    } else if (type === 'shift') {
+      const [root, list] = copyPath(state, path, fresh);
+      list.splice(0, op[2]);
+      list.push(...op[3]);
+      state = root;
+    }
+  }
+  return state;
+}
+
 class SocketService {
   constructor() {
     this.socket = null;
     this.connected = false;
+    // channel -> { seq, state } as last received from the backend
+    this.channels = {};
+    this.listeners = {};
   }
 
   connect() {
@@ -34,14 +97,48 @@ class SocketService {
       this.connected = false;
     });
 
+    // The backend sends a full snapshot on connect, then only deltas
+    this.socket.on('state_snapshot', (snapshot) => {
+      Object.entries(snapshot.channels).forEach(([channel, { seq, state }]) => {
+        this.channels[channel] = { seq, state };
+        this.dispatch(channel);
+      });
+    });
+
+    this.socket.on('state_delta', ({ channel, seq, ops }) => {
+      const current = this.channels[channel];
+      const isFullState = ops.length === 1 && ops[0][0] === 'set' && ops[0][1].length === 0;
+      if (!isFullState && (!current || seq !== current.seq + 1)) {
+        // Missed a delta; ask for a fresh copy of this channel
+        this.socket.emit('state_resync', { channels: [channel] });
+        return;
+      }
+      try {
+        this.channels[channel] = { seq, state: applyOps(current ? current.state : null, ops) };
+      } catch (error) {
+        console.log('🔴 Could not apply state delta:', error);
+        this.socket.emit('state_resync', { channels: [channel] });
+        return;
+      }
+      this.dispatch(channel);
+    });
+
     return this.socket;
   }
 
+  dispatch(channel) {
+    const event = CHANNEL_EVENTS[channel];
+    // applyOps copies whatever changed, so unchanged parts keep their identity and changed ones get a new one
+    const { state } = this.channels[channel];
+    (this.listeners[event] || []).forEach((callback) => callback(state));
+  }
+
   disconnect() {
     if (this.socket) {
       this.socket.disconnect();
       this.socket = null;
       this.connected = false;
+      this.channels = {};
     }
   }
 
@@ -52,12 +149,20 @@ class SocketService {
   }
 
   on(event, callback) {
+    if (STATE_EVENTS.has(event)) {
+      (this.listeners[event] = this.listeners[event] || []).push(callback);
+      return;
+    }
     if (this.socket) {
       this.socket.on(event, callback);
     }
   }
 
   off(event, callback) {
+    if (STATE_EVENTS.has(event)) {
+      this.listeners[event] = callback ? (this.listeners[event] || []).filter((listener) => listener !== callback) : [];
+      return;
+    }
     if (this.socket) {
       this.socket.off(event, callback);
     }
@@ -0,0 +1,120 @@
+"""OrderManager placements that go unanswered: found on the exchange, resent, or failed"""
+
+import numpy as np
+
+import order_manager
+from backtester import Backtester
+from coinbase_trading_bot import TradingConfig
+from order_manager import OrderManager
+
+
+class FlakyExchange:
+    """Answers placements from a script, losing the responses marked as lost"""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.placed = {}  # client_order_id -> order snapshot
+        self.placements = []
+
+    def place_market_order(self, product_id, side, size, client_order_id=None):
+        self.placements.append(client_order_id)
+        answer = self.answers.pop(0)
+        if answer in ('placed', 'lost'):
+            # Resending a client_order_id returns the order it already placed
+            order = self.placed.setdefault(client_order_id, {
+                'order_id': f"order-{len(self.placed) + 1}", 'client_order_id': client_order_id,
+                'product_id': product_id, 'status': 'FILLED', 'filled_size': size,
+                'average_filled_price': '100', 'total_fees': '0.1'
+            })
+            if answer == 'placed':
+                return {'success': True, 'success_response': {'order_id': order['order_id']}}
+        raise TimeoutError('read timed out')
+
+    def list_recent_orders(self, product_id, since):
+        return [order for order in self.placed.values() if order['product_id'] == product_id]
+
+    def get_orders(self, order_ids):
+        return [order for order in self.placed.values() if order['order_id'] in order_ids]
+
+
+def test_unanswered_placement_missing_on_exchange_is_resent():
+    exchange = FlakyExchange(['unanswered', 'placed'])
+    manager = OrderManager(exchange, background=False)
+
+    order = manager.submit('BTC-USDC', 'buy', '0.5')
+
+    assert order.done and order.status == 'FILLED'
+    assert exchange.placements == [order.client_order_id] * 2
+    assert order.order_id == 'order-1' and order.filled_size == 0.5
+
+
+def test_lost_response_is_found_without_resending():
+    exchange = FlakyExchange(['lost'])
+    finished = []
+    manager = OrderManager(exchange, background=False)
+    manager.subscribe(finished.append)
+
+    order = manager.submit('BTC-USDC', 'sell', '0.25')
+
+    assert order.status == 'FILLED' and order.error is None
+    assert exchange.placements == [order.client_order_id]
+    assert finished == [order]
+
+
+def test_unanswered_placement_fails_after_timeout(monkeypatch):
+    monkeypatch.setattr(order_manager, 'UNKNOWN_ORDER_TIMEOUT', 0.0)
+    exchange = FlakyExchange(['unanswered'])
+    finished = []
+    manager = OrderManager(exchange, background=False)
+    manager.subscribe(finished.append)
+
+    order = manager.submit('BTC-USDC', 'buy', '0.5')
+
+    assert order.status == 'FAILED'
+    assert len(exchange.placements) == 1
+    assert finished == [order]
+
+
+def test_backtest_without_cash_rejects_orders():
+    closes = 100 + 10 * np.sin(np.arange(400) / 10)
+    candles = {'time': 1_700_000_000 + 60 * np.arange(400), 'open': closes, 'high': closes + 1,
+               'low': closes - 1, 'close': closes, 'volume': np.ones(400)}
+
+    result = Backtester(TradingConfig(), candles, initial_cash=0.0).run()
+
+    assert result.trades == [] and result.fills == []
+    assert result.final_equity == 0.0
+
+
+class SlowCancelExchange:
+    """Keeps reporting a cancelled order OPEN for a few reads, as the exchange may"""
+
+    def __init__(self, stale_reads):
+        self.order = {'order_id': 'order-1', 'status': 'OPEN', 'filled_size': '0'}
+        self.stale_reads = stale_reads
+        self.cancelled = False
+
+    def place_limit_order(self, product_id, side, size, price, client_order_id=None):
+        return {'success': True, 'success_response': {'order_id': 'order-1'}}
+
+    def cancel_orders(self, order_ids):
+        self.cancelled = True
+
+    def get_orders(self, order_ids):
+        if self.cancelled:
+            if self.stale_reads:
+                self.stale_reads -= 1
+            else:
+                self.order['status'] = 'CANCELLED'
+        return [dict(self.order)]
+
+
+def test_cancel_waits_for_a_poll_to_settle_the_order():
+    exchange = SlowCancelExchange(stale_reads=2)
+    manager = OrderManager(exchange, poll_interval=0.01, background=False)
+    order = manager.submit('BTC-USDC', 'sell', '0.5', limit_price='110')
+    assert order.status == 'OPEN'
+
+    assert manager.cancel(order, timeout=1.0)
+    assert order.cancel_requested and order.status == 'CANCELLED'
+    assert manager.open_orders() == []
@@ -0,0 +1,177 @@
+"""Per-iteration trace spans for the tick-to-order path
+
+A trace covers one bot iteration (market data -> stop checks ->
+analysis -> execution -> order placement). Spans inside it record
+monotonic start/end times relative to the trace start, plus their
+parent, so a slow balance fetch inside execute_trade shows up as its
+own span rather than as an unexplained slow tick.
+
+Spans opened while no trace is active on the thread are no-ops, so
+instrumented code costs almost nothing in backtests. Finished traces
+go to an in-memory ring and, when a path is configured, to a rotating
+JSONL file that other processes (the backend) can read back. The tick
+thread only queues a finished trace; a QueueListener thread serializes
+and writes it, as log_setup does for log records.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_NO_SPAN = nullcontext()
+
+
+class _ThreadState(threading.local):
+    # Class-level default: checking for an active trace is a plain attribute read
+    trace = None
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    return round(values[min(len(values) - 1, int(fraction * len(values)))], 3) if values else None
+
+
+def breakdown(traces: Iterable[Dict]) -> Dict:
+    """p50/p99/max milliseconds per trace name, and per span name within it"""
+    durations = {}
+    for trace in traces:
+        entry = durations.setdefault(trace['name'], {'total': [], 'spans': {}})
+        entry['total'].append(trace['duration_ms'])
+        for span in trace['spans']:
+            entry['spans'].setdefault(span['name'], []).append(span['duration_ms'])
+
+    def summarize(values):
+        values = sorted(values)
+        return {'count': len(values), 'p50_ms': _percentile(values, 0.50),
+                'p99_ms': _percentile(values, 0.99), 'max_ms': round(values[-1], 3)}
+
+    return {
+        name: dict(summarize(entry['total']),
+                   spans={span: summarize(values) for span, values in entry['spans'].items()})
+        for name, entry in durations.items()
+    }
+
+
+class _TraceFormatter(logging.Formatter):
+    """A queued trace dict as one JSON line, serialized on the writer thread"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, default=str)
+
+
+def read_trace_file(path: str, limit: int = 1000) -> List[Dict]:
+    """The last `limit` traces written to a trace file (current segment only)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as trace_file:
+        lines = deque(trace_file, maxlen=limit)
+    traces = []
+    for line in lines:
+        try:
+            traces.append(json.loads(line))
+        except ValueError:
+            continue  # A line still being written by the bot
+    return traces
+
+
+class Tracer:
+    """Thread-local trace/span recorder with a bounded ring of finished traces"""
+
+    def __init__(self, capacity: int = 1000):
+        self.traces = deque(maxlen=capacity)
+        self._local = _ThreadState()
+        self._lock = threading.Lock()
+        self._export_queue = None
+        self._exporter = None
+        self._next_id = 0
+
+    def export_to(self, path: str, max_bytes: int = 5 * 1024 * 1024, backups: int = 3):
+        """Also append finished traces as JSON lines to a size-rotated file, from a writer thread"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        handler.setFormatter(_TraceFormatter())
+        if self._exporter is None:
+            atexit.register(self.close)
+        else:
+            self.close()
+        self._export_queue = queue.SimpleQueue()
+        self._exporter = QueueListener(self._export_queue, handler)
+        self._exporter.start()
+
+    def close(self):
+        """Write out the traces still queued and stop the writer thread"""
+        exporter, self._exporter = self._exporter, None
+        self._export_queue = None
+        if exporter is not None:
+            exporter.stop()
+            for handler in exporter.handlers:
+                handler.close()
+
+    @contextmanager
+    def trace(self, name: str, **attributes):
+        """Start a trace on this thread; nested calls become spans of the outer trace"""
+        if self._local.trace is not None:
+            with self.span(name, **attributes):
+                yield
+            return
+
+        with self._lock:
+            self._next_id += 1
+            trace_id = self._next_id
+        started = time.perf_counter_ns()
+        trace = {'id': trace_id, 'name': name, 'attributes': attributes, 'started_at': time.time(), 'spans': []}
+        self._local.trace = trace
+        self._local.start_ns = started
+        self._local.stack = []
+        try:
+            yield trace
+        finally:
+            trace['duration_ms'] = (time.perf_counter_ns() - started) / 1e6
+            self._local.trace = None
+            self.traces.append(trace)
+            export_queue = self._export_queue
+            if export_queue is not None:
+                # No serialization or disk I/O here: the writer thread does both
+                export_queue.put(logging.makeLogRecord({'msg': trace, 'levelno': logging.INFO,
+                                                        'levelname': 'INFO', 'name': f"{__name__}.export"}))
+
+    def span(self, name: str, **attributes):
+        """Time a step of the active trace; a no-op when there is none"""
+        if self._local.trace is None:
+            return _NO_SPAN
+        return self._span(name, attributes)
+
+    @contextmanager
+    def _span(self, name: str, attributes: Dict):
+        trace, stack = self._local.trace, self._local.stack
+        span = {'name': name, 'parent': stack[-1]['name'] if stack else None,
+                'start_ms': (time.perf_counter_ns() - self._local.start_ns) / 1e6}
+        if attributes:
+            span['attributes'] = attributes
+        stack.append(span)
+        started = time.perf_counter_ns()
+        try:
+            yield span
+        except Exception as e:
+            span['error'] = str(e)
+            raise
+        finally:
+            span['duration_ms'] = (time.perf_counter_ns() - started) / 1e6
+            stack.pop()
+            trace['spans'].append(span)
+
+    def recent(self, limit: int = 50) -> List[Dict]:
+        return list(self.traces)[-limit:]
+
+
+# Shared by everything in the process
+tracer = Tracer()
@@ -0,0 +1,436 @@
+"""Persistent SQLite journal of exchange orders, fills and bot decisions
+
+Orders and fills are synced incrementally: each sync asks Coinbase only
+for what is newer than the stored watermark and follows the response
+cursor across pages, and orders that were still open are re-read by id
+until they reach a final status. Bot trades are written as they happen.
+Bot decisions, one per tick, are only queued by the tick thread; a
+writer thread inserts them in batches, one commit per batch, every
+DECISION_FLUSH_SECONDS or sooner once DECISION_BATCH_SIZE are waiting.
+The database runs in WAL mode so the backend's
+readers never block the sync writer, and every history query is served
+from indexes on product, time and order id.
+"""
+
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Queued decisions are committed at least this often, or as soon as a batch fills
+DECISION_FLUSH_SECONDS = 1.0
+DECISION_BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    client_order_id TEXT,
+    product_id TEXT,
+    side TEXT,
+    status TEXT,
+    order_type TEXT,
+    size REAL,
+    filled_size REAL,
+    average_filled_price REAL,
+    total_fees REAL,
+    completion_percentage TEXT,
+    created_time TEXT,
+    created_ts REAL,
+    raw TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_orders_product_time ON orders (product_id, created_ts);
+CREATE INDEX IF NOT EXISTS idx_orders_time ON orders (created_ts);
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status);
+
+CREATE TABLE IF NOT EXISTS fills (
+    trade_id TEXT PRIMARY KEY,
+    order_id TEXT,
+    product_id TEXT,
+    side TEXT,
+    size REAL,
+    price REAL,
+    commission REAL,
+    trade_time TEXT,
+    trade_ts REAL,
+    raw TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_fills_product_time ON fills (product_id, trade_ts);
+CREATE INDEX IF NOT EXISTS idx_fills_time ON fills (trade_ts);
+CREATE INDEX IF NOT EXISTS idx_fills_order ON fills (order_id);
+
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id TEXT,
+    ts REAL,
+    signal TEXT,
+    reason TEXT,
+    price REAL,
+    indicators TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_decisions_product_time ON decisions (product_id, ts);
+
+CREATE TABLE IF NOT EXISTS bot_trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id TEXT,
+    ts REAL,
+    type TEXT,
+    price REAL,
+    size REAL,
+    pnl REAL
+);
+CREATE INDEX IF NOT EXISTS idx_bot_trades_product_time ON bot_trades (product_id, ts);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Orders in these states never change again and need no re-reads
+FINAL_ORDER_STATUSES = ('FILLED', 'CANCELLED', 'EXPIRED', 'FAILED')
+
+# Page size for list_orders / get_fills while syncing
+SYNC_PAGE_SIZE = 250
+
+# Re-read a little before the watermark so late-sequenced fills are not missed
+SYNC_OVERLAP = timedelta(minutes=5)
+
+
+def _field(item, name: str, default=None):
+    """Read a field from an SDK response object or a plain dict"""
+    if isinstance(item, dict):
+        return item.get(name, default)
+    return getattr(item, name, default)
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _timestamp(value) -> Optional[float]:
+    """Epoch seconds from an ISO 8601 string, a datetime or a number"""
+    if value in (None, ''):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _raw(item) -> str:
+    if isinstance(item, dict):
+        return json.dumps(item, default=str)
+    if hasattr(item, 'to_dict'):
+        return json.dumps(item.to_dict(), default=str)
+    return json.dumps(getattr(item, '__dict__', {}), default=str)
+
+
+class TradeJournal:
+    """SQLite store for orders, fills, bot decisions and bot trades"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        # SQLite allows one writer at a time; serialize writes in-process instead of retrying
+        self._write_lock = threading.Lock()
+        self._decisions = []
+        self._decisions_lock = threading.Lock()
+        self._decisions_waiting = threading.Event()
+        self._decision_writer = None
+        with self._write_lock:
+            connection = self._connection()
+            connection.executescript(SCHEMA)
+            connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def _write(self, sql: str, rows: List[Tuple]):
+        if not rows:
+            return
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                connection.executemany(sql, rows)
+
+    def _get_state(self, name: str) -> Optional[str]:
+        row = self._connection().execute('SELECT value FROM sync_state WHERE name = ?', (name,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_state(self, name: str, value: str):
+        self._write('INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)', [(name, value)])
+
+    # Writes
+
+    def upsert_orders(self, orders) -> int:
+        rows = []
+        for order in orders:
+            order_id = _field(order, 'order_id')
+            if not order_id:
+                continue
+            created_time = _field(order, 'created_time')
+            configuration = _field(order, 'order_configuration') or {}
+            size = None
+            for settings in (configuration.values() if isinstance(configuration, dict) else []):
+                if isinstance(settings, dict):
+                    size = _float(settings.get('base_size') or settings.get('quote_size'))
+                    break
+            rows.append((
+                order_id, _field(order, 'client_order_id'), _field(order, 'product_id'),
+                _field(order, 'side'), _field(order, 'status'), _field(order, 'order_type'),
+                size if size is not None else _float(_field(order, 'size')),
+                _float(_field(order, 'filled_size')), _float(_field(order, 'average_filled_price')),
+                _float(_field(order, 'total_fees')), str(_field(order, 'completion_percentage', '0')),
+                created_time, _timestamp(created_time), _raw(order)
+            ))
+        self._write(
+            'INSERT OR REPLACE INTO orders (order_id, client_order_id, product_id, side, status, order_type, '
+            'size, filled_size, average_filled_price, total_fees, completion_percentage, created_time, '
+            'created_ts, raw) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+        return len(rows)
+
+    def upsert_fills(self, fills) -> int:
+        rows = []
+        for fill in fills:
+            trade_id = _field(fill, 'trade_id') or _field(fill, 'entry_id')
+            if not trade_id:
+                continue
+            trade_time = _field(fill, 'trade_time')
+            rows.append((
+                trade_id, _field(fill, 'order_id'), _field(fill, 'product_id'), _field(fill, 'side'),
+                _float(_field(fill, 'size')), _float(_field(fill, 'price')),
+                _float(_field(fill, 'commission')), trade_time, _timestamp(trade_time), _raw(fill)
+            ))
+        self._write(
+            'INSERT OR REPLACE INTO fills (trade_id, order_id, product_id, side, size, price, commission, '
+            'trade_time, trade_ts, raw) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+        return len(rows)
+
+    def record_decision(self, product_id: str, signal: str, reason: str, price: float,
+                        indicators: Optional[Dict] = None, timestamp: Optional[datetime] = None):
+        """Queue a decision for the writer thread; nothing touches SQLite on the caller's thread"""
+        ts = timestamp.timestamp() if timestamp else time.time()
+        with self._decisions_lock:
+            self._decisions.append((product_id, ts, signal, reason, price, dict(indicators or {})))
+            waiting = len(self._decisions)
+            if self._decision_writer is None:
+                self._decision_writer = threading.Thread(target=self._write_decisions, name='journal-writer',
+                                                         daemon=True)
+                self._decision_writer.start()
+                atexit.register(self.flush)
+        if waiting >= DECISION_BATCH_SIZE:
+            self._decisions_waiting.set()
+
+    def flush(self):
+        """Commit every queued decision now"""
+        with self._decisions_lock:
+            decisions, self._decisions = self._decisions, []
+        self._write(
+            'INSERT INTO decisions (product_id, ts, signal, reason, price, indicators) VALUES (?, ?, ?, ?, ?, ?)',
+            [(product_id, ts, signal, reason, price, json.dumps(indicators, default=str))
+             for product_id, ts, signal, reason, price, indicators in decisions]
+        )
+
+    def _write_decisions(self):
+        while True:
+            self._decisions_waiting.wait(DECISION_FLUSH_SECONDS)
+            self._decisions_waiting.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Could not write bot decisions to the journal: {e}")
+
+    def record_bot_trade(self, product_id: str, trade: Dict):
+        timestamp = trade.get('timestamp')
+        ts = timestamp.timestamp() if isinstance(timestamp, datetime) else time.time()
+        self._write(
+            'INSERT INTO bot_trades (product_id, ts, type, price, size, pnl) VALUES (?, ?, ?, ?, ?, ?)',
+            [(product_id, ts, trade['type'], trade['price'], trade['size'], trade.get('pnl'))]
+        )
+
+    def last_bot_trade(self, product_id: str) -> Optional[Dict]:
+        """The bot's most recent trade for a product, e.g. the entry behind a position still open"""
+        row = self._connection().execute(
+            'SELECT ts, type, price, size, pnl FROM bot_trades WHERE product_id = ? ORDER BY ts DESC, id DESC LIMIT 1',
+            (product_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    # Incremental sync
+
+    def sync(self, rest_client) -> Dict[str, int]:
+        """Pull new fills and new or still-open orders from a coinbase RESTClient"""
+        return {'fills': self.sync_fills(rest_client), 'orders': self.sync_orders(rest_client)}
+
+    def sync_fills(self, rest_client) -> int:
+        since = self._get_state('fills_watermark')
+        kwargs = {'limit': SYNC_PAGE_SIZE}
+        if since:
+            kwargs['start_sequence_timestamp'] = _iso(float(since) - SYNC_OVERLAP.total_seconds())
+
+        stored = 0
+        newest = float(since) if since else None
+        cursor = None
+        while True:
+            response = rest_client.get_fills(cursor=cursor, **kwargs) if cursor else rest_client.get_fills(**kwargs)
+            fills = _field(response, 'fills') or []
+            stored += self.upsert_fills(fills)
+            for fill in fills:
+                ts = _timestamp(_field(fill, 'trade_time'))
+                if ts and (newest is None or ts > newest):
+                    newest = ts
+            cursor = _field(response, 'cursor')
+            if not fills or not cursor:
+                break
+
+        if newest is not None:
+            self._set_state('fills_watermark', str(newest))
+        return stored
+
+    def sync_orders(self, rest_client) -> int:
+        since = self._get_state('orders_watermark')
+        kwargs = {'limit': SYNC_PAGE_SIZE}
+        if since:
+            kwargs['start_date'] = _iso(float(since) - SYNC_OVERLAP.total_seconds())
+
+        stored = 0
+        newest = float(since) if since else None
+        cursor = None
+        while True:
+            response = rest_client.list_orders(cursor=cursor, **kwargs) if cursor else rest_client.list_orders(**kwargs)
+            orders = _field(response, 'orders') or []
+            stored += self.upsert_orders(orders)
+            for order in orders:
+                ts = _timestamp(_field(order, 'created_time'))
+                if ts and (newest is None or ts > newest):
+                    newest = ts
+            cursor = _field(response, 'cursor')
+            if not orders or not cursor or not _field(response, 'has_next', True):
+                break
+
+        # Orders placed before the watermark may still be working; re-read them by id
+        placeholders = ','.join('?' * len(FINAL_ORDER_STATUSES))
+        open_ids = [row['order_id'] for row in self._connection().execute(
+            f'SELECT order_id FROM orders WHERE status NOT IN ({placeholders})', FINAL_ORDER_STATUSES)]
+        for start in range(0, len(open_ids), SYNC_PAGE_SIZE):
+            response = rest_client.list_orders(order_ids=open_ids[start:start + SYNC_PAGE_SIZE])
+            stored += self.upsert_orders(_field(response, 'orders') or [])
+
+        if newest is not None:
+            self._set_state('orders_watermark', str(newest))
+        return stored
+
+    # Queries
+
+    @staticmethod
+    def _filters(time_column: str, product_id=None, side=None, status=None, start=None, end=None,
+                 order_id=None) -> Tuple[str, List]:
+        clauses, params = [], []
+        for column, value in (('product_id', product_id), ('side', side), ('status', status), ('order_id', order_id)):
+            if value:
+                clauses.append(f'{column} = ?')
+                params.append(value.upper() if column in ('product_id', 'side', 'status') else value)
+        if start is not None:
+            clauses.append(f'{time_column} >= ?')
+            params.append(_timestamp(start))
+        if end is not None:
+            clauses.append(f'{time_column} < ?')
+            params.append(_timestamp(end))
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def _page(self, table: str, time_column: str, limit: int, offset: int, **filters) -> Tuple[List[sqlite3.Row], int]:
+        where, params = self._filters(time_column, **filters)
+        connection = self._connection()
+        total = connection.execute(f'SELECT COUNT(*) FROM {table}{where}', params).fetchone()[0]
+        rows = connection.execute(
+            f'SELECT * FROM {table}{where} ORDER BY {time_column} DESC LIMIT ? OFFSET ?',
+            params + [limit, offset]
+        ).fetchall()
+        return rows, total
+
+    def query_orders(self, limit: int = 50, offset: int = 0, product_id: Optional[str] = None,
+                     side: Optional[str] = None, status: Optional[str] = None,
+                     start=None, end=None) -> Tuple[List[Dict], int]:
+        """Newest-first orders in the dashboard's format, plus the total matching count"""
+        rows, total = self._page('orders', 'created_ts', limit, offset, product_id=product_id,
+                                 side=side, status=status, start=start, end=end)
+        orders = []
+        for row in rows:
+            price, filled_size = row['average_filled_price'], row['filled_size'] or 0
+            orders.append({
+                'id': row['order_id'],
+                'product_id': row['product_id'],
+                'side': row['side'],
+                'status': row['status'],
+                'size': row['size'] or 0,
+                'filled_size': filled_size,
+                'price': price or None,
+                'created_time': row['created_time'],
+                'completion_percentage': row['completion_percentage'],
+                'fee': row['total_fees'] or 0,
+                'total_value': price * filled_size if price and filled_size else 0
+            })
+        return orders, total
+
+    def query_fills(self, limit: int = 50, offset: int = 0, product_id: Optional[str] = None,
+                    side: Optional[str] = None, order_id: Optional[str] = None,
+                    start=None, end=None) -> Tuple[List[Dict], int]:
+        """Newest-first fills in the dashboard's format, plus the total matching count"""
+        rows, total = self._page('fills', 'trade_ts', limit, offset, product_id=product_id,
+                                 side=side, order_id=order_id, start=start, end=end)
+        fills = []
+        for row in rows:
+            price, size = row['price'] or 0, row['size'] or 0
+            fills.append({
+                'trade_id': row['trade_id'],
+                'order_id': row['order_id'],
+                'product_id': row['product_id'],
+                'side': row['side'],
+                'size': size,
+                'price': price,
+                'fee': row['commission'] or 0,
+                'created_at': row['trade_time'],
+                'total_value': price * size
+            })
+        return fills, total
+
+    def query_decisions(self, limit: int = 50, offset: int = 0, product_id: Optional[str] = None,
+                        start=None, end=None) -> Tuple[List[Dict], int]:
+        # Decisions this process has queued are included
+        self.flush()
+        rows, total = self._page('decisions', 'ts', limit, offset, product_id=product_id, start=start, end=end)
+        return [dict(row, indicators=json.loads(row['indicators'] or '{}')) for row in rows], total
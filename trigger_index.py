@@ -0,0 +1,280 @@
+"""Per-symbol index of exit triggers for long positions and lots
+
+check_stop_loss_take_profit used to compare each position's levels with
+every price. A TriggerIndex instead holds the levels of every position or
+lot on one symbol in heaps, so update(price) only touches the triggers
+that the price actually crossed:
+
+- stop losses sit in a max-heap and take profits in a min-heap
+- break-even levels sit in a min-heap. Reaching one raises that
+  position's stop loss to its break-even stop
+- trailing stops are grouped by peak price. A new high merges every group
+  below it into one group at the new peak, so one merge raises the
+  trailing stops of thousands of positions
+
+When a level changes, a new heap entry is pushed with a new version. Stale
+entries are dropped when they reach the top of a heap, or when the heaps
+are compacted. Each crossed trigger, break-even move or group merge costs
+O(log n), amortized. A fired position leaves the index; add() it again to
+keep watching it, e.g. after its exit order was rejected.
+"""
+
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass
+from typing import Hashable, List, Optional
+
+STOP_LOSS = 'Stop Loss'
+TAKE_PROFIT = 'Take Profit'
+TRAILING_STOP = 'Trailing Stop'
+
+# Stale heap entries allowed per live position before the heaps are rebuilt
+COMPACT_RATIO = 4
+
+
+@dataclass(eq=False)
+class PositionTriggers:
+    """Exit levels of one long position or lot; the index moves them in place"""
+    key: Hashable
+    stop_loss: Optional[float] = None
+    take_profit: Optional[float] = None
+    # The trailing stop sits this fraction below the highest price seen since peak
+    trailing_fraction: Optional[float] = None
+    peak: Optional[float] = None
+    # Reaching break_even_at raises stop_loss to break_even_stop, once
+    break_even_at: Optional[float] = None
+    break_even_stop: Optional[float] = None
+    # STOP_LOSS, TAKE_PROFIT or TRAILING_STOP once a trigger has fired
+    fired: Optional[str] = None
+
+    @property
+    def trailing_stop(self) -> Optional[float]:
+        if self.trailing_fraction is None or self.peak is None:
+            return None
+        return self.peak * (1 - self.trailing_fraction)
+
+
+class _Entry:
+    __slots__ = ('triggers', 'active', 'stop_version', 'group')
+
+    def __init__(self, triggers: PositionTriggers):
+        self.triggers = triggers
+        self.active = True
+        self.stop_version = 0
+        self.group = None
+
+
+class _TrailGroup:
+    """Trailing members sharing one peak, in a min-heap of (fraction, seq, entry)"""
+    __slots__ = ('peak', 'members', 'version', 'live')
+
+    def __init__(self, peak: float):
+        self.peak = peak
+        self.members = []
+        self.version = 0
+        self.live = True
+
+
+class TriggerIndex:
+    """Stops, take profits, trailing stops and break-even moves for one symbol"""
+
+    def __init__(self):
+        self.last_price = None
+        self._entries = {}
+        self._stops = []        # (-stop_loss, seq, entry, stop_version)
+        self._take_profits = []  # (take_profit, seq, entry)
+        self._break_evens = []  # (break_even_at, seq, entry)
+        self._peaks = []        # (peak, seq, group), lowest peak first
+        self._trailing = []     # (-best trailing stop, seq, group, version)
+        self._groups_by_peak = {}
+        self._seq = itertools.count()
+        self._stale = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def add(self, triggers: PositionTriggers):
+        """Watch a position's levels, replacing any triggers already held for its key"""
+        with self._lock:
+            self._discard(triggers.key)
+            triggers.fired = None
+            entry = _Entry(triggers)
+            self._entries[triggers.key] = entry
+            if triggers.stop_loss is not None:
+                heapq.heappush(self._stops, (-triggers.stop_loss, next(self._seq), entry, 0))
+            if triggers.take_profit is not None:
+                heapq.heappush(self._take_profits, (triggers.take_profit, next(self._seq), entry))
+            if triggers.break_even_at is not None:
+                heapq.heappush(self._break_evens, (triggers.break_even_at, next(self._seq), entry))
+            if triggers.trailing_fraction is not None:
+                # Without a peak, the trailing stop starts from the next price
+                if triggers.peak is None:
+                    triggers.peak = self.last_price or 0.0
+                self._join_group(entry, triggers.peak)
+
+    def remove(self, key: Hashable) -> Optional[PositionTriggers]:
+        """Stop watching a position; returns its triggers, if it was held"""
+        with self._lock:
+            entry = self._discard(key)
+            return entry.triggers if entry else None
+
+    def get(self, key: Hashable) -> Optional[PositionTriggers]:
+        """A held position's triggers, with its trailing peak brought up to date"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._sync(entry)
+            return entry.triggers
+
+    def update(self, price: float) -> List[PositionTriggers]:
+        """Apply a price: move break-even and trailing stops, then pop and return every fired position"""
+        with self._lock:
+            self.last_price = price
+            self._apply_break_evens(price)
+            self._raise_peaks(price)
+
+            fired = []
+            take_profits = self._take_profits
+            while take_profits and take_profits[0][0] <= price:
+                _, _, entry = heapq.heappop(take_profits)
+                if entry.active:
+                    self._fire(entry, TAKE_PROFIT, fired)
+
+            self._fire_stops(price, fired)
+            if self._stale > COMPACT_RATIO * len(self._entries) + 64:
+                self._compact()
+            return fired
+
+    def _discard(self, key: Hashable) -> Optional[_Entry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.active = False
+            self._stale += 1
+        return entry
+
+    def _sync(self, entry: _Entry):
+        if entry.group is not None:
+            entry.triggers.peak = entry.group.peak
+
+    def _fire(self, entry: _Entry, reason: str, fired: List[PositionTriggers]):
+        self._sync(entry)
+        del self._entries[entry.triggers.key]
+        entry.active = False
+        self._stale += 1
+        entry.triggers.fired = reason
+        fired.append(entry.triggers)
+
+    def _apply_break_evens(self, price: float):
+        break_evens = self._break_evens
+        while break_evens and break_evens[0][0] <= price:
+            _, _, entry = heapq.heappop(break_evens)
+            triggers = entry.triggers
+            if not entry.active:
+                continue
+            triggers.break_even_at = None
+            stop = triggers.break_even_stop
+            if stop is not None and (triggers.stop_loss is None or stop > triggers.stop_loss):
+                triggers.stop_loss = stop
+                entry.stop_version += 1
+                self._stale += 1
+                heapq.heappush(self._stops, (-stop, next(self._seq), entry, entry.stop_version))
+
+    def _join_group(self, entry: _Entry, peak: float):
+        group = self._groups_by_peak.get(peak)
+        if group is None:
+            group = self._groups_by_peak[peak] = _TrailGroup(peak)
+            heapq.heappush(self._peaks, (peak, next(self._seq), group))
+        entry.group = group
+        heapq.heappush(group.members, (entry.triggers.trailing_fraction, next(self._seq), entry))
+        if group.members[0][2] is entry:
+            self._push_group(group)
+
+    def _push_group(self, group: _TrailGroup):
+        """Re-publish a group's highest trailing stop, dropping the group once it is empty"""
+        members = group.members
+        while members and not members[0][2].active:
+            heapq.heappop(members)
+        group.version += 1
+        if not members:
+            group.live = False
+            self._groups_by_peak.pop(group.peak, None)
+            return
+        heapq.heappush(self._trailing, (-group.peak * (1 - members[0][0]), next(self._seq), group, group.version))
+
+    def _raise_peaks(self, price: float):
+        """Merge every trailing group whose peak is below the price into one group at the price"""
+        peaks = self._peaks
+        merged = []
+        while peaks and peaks[0][0] < price:
+            peak, _, group = heapq.heappop(peaks)
+            if group.live and group.peak == peak:
+                merged.append(group)
+        if not merged:
+            return
+        existing = self._groups_by_peak.get(price)
+        if existing is not None:
+            merged.append(existing)
+
+        # Small-to-large: only members of the smaller groups move
+        survivor = max(merged, key=lambda group: len(group.members))
+        for group in merged:
+            del self._groups_by_peak[group.peak]
+            if group is survivor:
+                continue
+            group.live = False
+            for item in group.members:
+                if item[2].active:
+                    item[2].group = survivor
+                    heapq.heappush(survivor.members, item)
+
+        survivor.peak = price
+        self._groups_by_peak[price] = survivor
+        if survivor is not existing:
+            heapq.heappush(peaks, (price, next(self._seq), survivor))
+        self._push_group(survivor)
+
+    def _fire_stops(self, price: float, fired: List[PositionTriggers]):
+        """Fire crossed stop losses and trailing stops, highest level first, so each exit gets the stop that hit it"""
+        stops, trailing = self._stops, self._trailing
+        while True:
+            while stops and not (stops[0][2].active and stops[0][3] == stops[0][2].stop_version):
+                heapq.heappop(stops)
+            while trailing and not (trailing[0][2].live and trailing[0][3] == trailing[0][2].version):
+                heapq.heappop(trailing)
+            stop = -stops[0][0] if stops else None
+            trailing_stop = -trailing[0][0] if trailing else None
+            if trailing_stop is not None and trailing_stop >= price and (stop is None or trailing_stop >= stop):
+                group = heapq.heappop(trailing)[2]
+                # Only the top member is fired; the rest wait their turn against the fixed stops
+                _, _, entry = heapq.heappop(group.members)
+                if entry.active:
+                    self._fire(entry, TRAILING_STOP, fired)
+                self._push_group(group)
+            elif stop is not None and stop >= price:
+                entry = heapq.heappop(stops)[2]
+                self._fire(entry, STOP_LOSS, fired)
+            else:
+                return
+
+    def _compact(self):
+        """Rebuild the heaps without entries for removed positions or superseded levels"""
+        self._stops = [item for item in self._stops if item[2].active and item[3] == item[2].stop_version]
+        self._take_profits = [item for item in self._take_profits if item[2].active]
+        self._break_evens = [item for item in self._break_evens if item[2].active]
+        groups = [group for group in self._groups_by_peak.values()]
+        for group in groups:
+            group.members = [item for item in group.members if item[2].active]
+        self._peaks = [(group.peak, next(self._seq), group) for group in groups]
+        self._trailing = []
+        for heap in (self._stops, self._take_profits, self._break_evens, self._peaks):
+            heapq.heapify(heap)
+        for group in groups:
+            heapq.heapify(group.members)
+            self._push_group(group)
+        self._stale = 0